@@ -0,0 +1,48 @@
+"""add telegram file cache
+
+Revision ID: 0009_add_telegram_file_cache
+Revises: 0008_add_student_token_version
+Create Date: 2026-10-18 12:00:00
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0009_add_telegram_file_cache"
+down_revision = "0008_add_student_token_version"
+branch_labels = None
+depends_on = None
+
+
+def _table_exists(bind, table_name: str) -> bool:
+    return sa.inspect(bind).has_table(table_name)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+
+    if not _table_exists(bind, "telegram_file_cache"):
+        op.create_table(
+            "telegram_file_cache",
+            sa.Column("id", sa.BigInteger(), primary_key=True, autoincrement=True),
+            sa.Column("kind", sa.String(length=50), nullable=False),
+            sa.Column("entity_id", sa.BigInteger(), nullable=False),
+            sa.Column("content_hash", sa.String(length=64), nullable=False),
+            sa.Column("file_id", sa.String(length=255), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+        )
+        op.create_index(
+            "uq_telegram_file_cache_entity",
+            "telegram_file_cache",
+            ["kind", "entity_id", "content_hash"],
+            unique=True,
+        )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+
+    if _table_exists(bind, "telegram_file_cache"):
+        op.drop_table("telegram_file_cache")
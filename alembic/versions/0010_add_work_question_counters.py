@@ -0,0 +1,56 @@
+"""add work question counters
+
+Revision ID: 0010_add_work_question_counters
+Revises: 0009_add_telegram_file_cache
+Create Date: 2026-10-18 15:00:00
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0010_add_work_question_counters"
+down_revision = "0009_add_telegram_file_cache"
+branch_labels = None
+depends_on = None
+
+_COUNTERS = ("total_questions", "answered_count")
+
+
+def _work_columns(bind) -> set[str]:
+    return {column["name"] for column in sa.inspect(bind).get_columns("works")}
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    columns = _work_columns(bind)
+
+    for name in _COUNTERS:
+        if name not in columns:
+            op.add_column("works", sa.Column(name, sa.Integer(), nullable=False, server_default="0"))
+            op.alter_column("works", name, existing_type=sa.Integer(), server_default=None)
+
+    op.execute(
+        """
+        UPDATE works
+        SET total_questions = (
+                SELECT COUNT(*) FROM work_questions_list
+                WHERE work_questions_list.work_id = works.id
+            ),
+            answered_count = (
+                SELECT COUNT(*) FROM work_questions_list
+                WHERE work_questions_list.work_id = works.id
+                  AND work_questions_list.status = 'answered'
+            )
+        """
+    )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    columns = _work_columns(bind)
+
+    for name in reversed(_COUNTERS):
+        if name in columns:
+            op.drop_column("works", name)
@@ -0,0 +1,74 @@
+"""add broadcasts
+
+Revision ID: 0011_add_broadcasts
+Revises: 0010_add_work_question_counters
+Create Date: 2026-10-18 17:00:00
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0011_add_broadcasts"
+down_revision = "0010_add_work_question_counters"
+branch_labels = None
+depends_on = None
+
+
+def _table_exists(bind, table_name: str) -> bool:
+    return sa.inspect(bind).has_table(table_name)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+
+    if not _table_exists(bind, "broadcasts"):
+        op.create_table(
+            "broadcasts",
+            sa.Column("id", sa.BigInteger(), primary_key=True, autoincrement=True),
+            sa.Column("html_text", sa.Text(), nullable=False),
+            sa.Column("status", sa.String(length=20), nullable=False),
+            sa.Column("admin_chat_id", sa.BigInteger(), nullable=False),
+            sa.Column("progress_message_id", sa.BigInteger(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.Column("finished_at", sa.DateTime(), nullable=True),
+        )
+        op.create_index("ix_broadcasts_status", "broadcasts", ["status"])
+
+    if not _table_exists(bind, "broadcast_deliveries"):
+        op.create_table(
+            "broadcast_deliveries",
+            sa.Column("id", sa.BigInteger(), primary_key=True, autoincrement=True),
+            sa.Column(
+                "broadcast_id",
+                sa.BigInteger(),
+                sa.ForeignKey("broadcasts.id", ondelete="CASCADE"),
+                nullable=False,
+            ),
+            sa.Column("telegram_id", sa.BigInteger(), nullable=False),
+            sa.Column("status", sa.String(length=20), nullable=False),
+            sa.Column("attempts", sa.Integer(), nullable=False),
+            sa.Column("error", sa.Text(), nullable=True),
+            sa.Column("sent_at", sa.DateTime(), nullable=True),
+        )
+        op.create_index(
+            "uq_broadcast_deliveries_recipient",
+            "broadcast_deliveries",
+            ["broadcast_id", "telegram_id"],
+            unique=True,
+        )
+        op.create_index(
+            "ix_broadcast_deliveries_broadcast_status",
+            "broadcast_deliveries",
+            ["broadcast_id", "status"],
+        )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+
+    if _table_exists(bind, "broadcast_deliveries"):
+        op.drop_table("broadcast_deliveries")
+    if _table_exists(bind, "broadcasts"):
+        op.drop_table("broadcasts")
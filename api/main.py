@@ -14,9 +14,11 @@ from api.routers.backup.router import router as backup_router
 from api.routers.ege.router import router as ege_router
 from api.routers.hand_works.router import router as hand_works_router
 from api.routers.images.router import router as images_router
+from api.routers.jobs.router import router as jobs_router
 from api.routers.pool.router import router as pool_router
 from api.routers.student.router import router as student_router
 from api.routers.student_auth.router import router as student_auth_router
+from api.routers.system.router import router as system_router
 from api.routers.tma.router import router as tma_router
 from api.routers.theory_documents.router import router as theory_documents_router
 from api.routers.topics.router import router as topics_router
@@ -44,6 +46,8 @@ app.include_router(hand_works_router)
 app.include_router(pool_router)
 app.include_router(ege_router)
 app.include_router(backup_router)
+app.include_router(system_router)
+app.include_router(jobs_router)
 
 # ── Serve TMA (Mini App) at /tma/ ─────────────────────────────────────────────
 # Must be registered BEFORE the admin SPA catch-all below.
@@ -148,7 +148,7 @@ def _restore_from_zip(zip_path: str, temp_dir: str) -> None:
         )
 
     # Re-run migrations to add columns that may be missing in the backup
-    from db.database import run_migrations
+    from db.migrations import run_migrations
     run_migrations()
 
     image_mapping = {
@@ -158,6 +158,8 @@ def _restore_from_zip(zip_path: str, temp_dir: str) -> None:
     }
     for folder_name, dest_dir in image_mapping.items():
         os.makedirs(dest_dir, exist_ok=True)
+        # Restored originals keep their backup mtimes, so derivatives cannot be trusted.
+        shutil.rmtree(os.path.join(dest_dir, "variants"), ignore_errors=True)
         for root, dirs, _ in os.walk(temp_dir):
             for d in dirs:
                 if d == folder_name:
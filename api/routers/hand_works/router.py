@@ -4,6 +4,7 @@ from datetime import UTC, datetime
 
 import telebot
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import FileResponse
 
 from api.dependencies import require_auth
@@ -11,18 +12,19 @@ from api.routers.hand_works.schemas import HandWorkCreate, SendTrainingRequest
 from db.crud import (
     delete_hand_work,
     get_all_hand_works,
-    get_all_questions,
     get_hand_work,
     get_hand_work_question_count,
     get_hand_work_questions,
-    insert_new_hand_work,
+    get_pool_snapshot,
+    insert_new_hand_works,
 )
 from utils.mini_app_links import get_tma_share_link, get_tma_start_url, is_public_web_app_url
-from utils.tags_helper import get_random_questions, get_random_questions_for_hard_tags_filter
-from utils.work_pdf import build_work_pdf
+from utils.tags_helper import get_hard_filter_questions_batch, get_random_questions_batch
+from utils.work_pdf import PdfRenderBusy, PdfRenderTimeout, build_work_pdf_async
 
 router = APIRouter(prefix="/api/admin", tags=["hand_works"])
 _ROOT_FOLDER = os.getenv("ROOT_FOLDER", os.path.abspath(os.getcwd()))
+_MAX_HAND_WORK_VARIANTS = 50
 
 
 def _build_share_link(identificator: str) -> str | None:
@@ -83,22 +85,44 @@ def remove_hand_work(work_id: int, _: str = Depends(require_auth)):
     return {"ok": True}
 
 
+def _serialize_hand_work(work) -> dict:
+    return {
+        "id": work.id,
+        "name": work.name,
+        "identificator": work.identificator,
+        "link": _build_share_link(work.identificator),
+        "web_link": _build_start_url(work.identificator),
+    }
+
+
 @router.post("/hand-works")
 def create_hand_work(req: HandWorkCreate, _: str = Depends(require_auth)):
-    all_questions = get_all_questions()
+    if not 1 <= req.variants <= _MAX_HAND_WORK_VARIANTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Количество вариантов должно быть от 1 до {_MAX_HAND_WORK_VARIANTS}",
+        )
+
+    snapshot = get_pool_snapshot()
 
     if req.mode == "hard_filter":
         if not req.hard_tags or not req.questions_count:
             raise HTTPException(status_code=400, detail="Укажите теги и количество вопросов")
-        result = get_random_questions_for_hard_tags_filter(
-            pool=all_questions,
+        result = get_hard_filter_questions_batch(
+            tag_index=snapshot.tag_index(active=False),
             tags_list=req.hard_tags,
             questions_count=req.questions_count,
+            variants=req.variants,
         )
     else:
         if not req.questions:
             raise HTTPException(status_code=400, detail="Добавьте хотя бы один вопрос")
-        result = get_random_questions(pool=all_questions, request_dict=req.questions)
+        result = get_random_questions_batch(
+            pool=None,
+            request_dict=req.questions,
+            variants=req.variants,
+            tag_index=snapshot.tag_index(active=False),
+        )
 
     if not result["is_ok"]:
         raise HTTPException(
@@ -106,13 +130,16 @@ def create_hand_work(req: HandWorkCreate, _: str = Depends(require_auth)):
             detail=f"Недостаточно вопросов: {result.get('tag', '')}",
         )
 
-    identificator = hashlib.sha256(str(datetime.now(UTC)).encode()).hexdigest()[:6]
     name = req.name or f"Тренировка {datetime.now().strftime('%Y%m%d%H%M')}"
-    work = insert_new_hand_work(
-        name=name,
-        identificator=identificator,
-        questions_ids_list=result["detail"],
-    )
+    works = insert_new_hand_works([
+        {
+            "name": name if req.variants == 1 else f"{name} (вариант {num})",
+            "identificator": hashlib.sha256(f"{datetime.now(UTC)}:{num}".encode()).hexdigest()[:6],
+            "questions_ids_list": questions_ids_list,
+        }
+        for num, questions_ids_list in enumerate(result["detail"], start=1)
+    ])
+    work = works[0]
 
     bot_token = os.getenv("BOT_API_KEY")
     admin_id = os.getenv("ADMIN_ID")
@@ -134,11 +161,8 @@ def create_hand_work(req: HandWorkCreate, _: str = Depends(require_auth)):
     #         pass
 
     return {
-        "id": work.id,
-        "name": work.name,
-        "identificator": work.identificator,
-        "link": _build_share_link(work.identificator),
-        "web_link": _build_start_url(work.identificator),
+        **_serialize_hand_work(work),
+        "variants": [_serialize_hand_work(item) for item in works],
     }
 
 
@@ -166,21 +190,26 @@ def send_training_to_user(req: SendTrainingRequest, _: str = Depends(require_aut
 
 
 @router.get("/hand-works/{identificator}/pdf")
-def download_hand_work_pdf(identificator: str, _: str = Depends(require_auth)):
-    hand_work = get_hand_work(identificator)
+async def download_hand_work_pdf(identificator: str, _: str = Depends(require_auth)):
+    hand_work = await run_in_threadpool(get_hand_work, identificator)
     if hand_work is None or getattr(hand_work, "is_deleted", 0):
         raise HTTPException(status_code=404, detail="Тренировка не найдена")
 
-    questions = get_hand_work_questions(identificator)
+    questions = await run_in_threadpool(get_hand_work_questions, identificator)
     if not questions:
         raise HTTPException(status_code=404, detail="В тренировке нет вопросов")
 
-    pdf_path, visible_name = build_work_pdf(
-        root_folder=_ROOT_FOLDER,
-        work_id=hand_work.id,
-        work_title=hand_work.name,
-        work_type_label="Работа от преподавателя",
-        questions=questions,
-    )
+    try:
+        pdf_path, visible_name = await build_work_pdf_async(
+            root_folder=_ROOT_FOLDER,
+            work_id=hand_work.id,
+            work_title=hand_work.name,
+            work_type_label="Работа от преподавателя",
+            questions=questions,
+        )
+    except PdfRenderBusy as exc:
+        raise HTTPException(status_code=503, detail=str(exc))
+    except PdfRenderTimeout:
+        raise HTTPException(status_code=504, detail="PDF формируется слишком долго, попробуйте позже")
 
     return FileResponse(pdf_path, media_type="application/pdf", filename=visible_name)
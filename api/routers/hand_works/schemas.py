@@ -9,6 +9,7 @@ class HandWorkCreate(BaseModel):
     mode: str = "tags"  # "tags" or "hard_filter"
     hard_tags: Optional[List[str]] = None
     questions_count: Optional[int] = None
+    variants: int = 1
 
 
 class SendTrainingRequest(BaseModel):
@@ -1,38 +1,93 @@
 import os
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Literal, Optional
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response
 from fastapi.responses import FileResponse
 
 from api.config import ROOT_FOLDER
+from utils.image_variants import image_version, variant_path
 
 router = APIRouter(prefix="/api/images", tags=["images"])
 
-_CACHE_HEADERS = {"Cache-Control": "public, max-age=86400"}
+_IMAGES_ROOT = os.path.join(ROOT_FOLDER, "data", "images")
+_USER_PHOTO_CACHE = "public, max-age=86400"
+# `?v=` carries the content hash, so a versioned URL never changes its bytes.
+_IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+# Unversioned URLs are revalidated on every use; an unchanged image costs a bodiless 304.
+_REVALIDATE_CACHE = "no-cache"
 
+ImageVariantName = Literal["pdf", "telegram", "web"]
 
-@router.get("/question/{question_id}")
-def get_question_image(question_id: int):
-    path = os.path.join(ROOT_FOLDER, "data", "images", "questions", f"{question_id}.png")
-    if not os.path.exists(path):
+
+def _is_not_modified(request: Request, etag: str, mtime: float) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match wins over If-Modified-Since (RFC 9110, 13.2.2).
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _conditional_file_response(
+    request: Request, path: str, media_type: str, etag: str, cache_control: str
+) -> Response:
+    mtime = os.stat(path).st_mtime
+    headers = {
+        "Cache-Control": cache_control,
+        "ETag": etag,
+        "Last-Modified": formatdate(mtime, usegmt=True),
+    }
+    if _is_not_modified(request, etag, mtime):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type=media_type, headers=headers)
+
+
+def _pool_image_response(
+    request: Request, kind: str, question_id: int, variant: Optional[str], v: Optional[str]
+) -> Response:
+    path = variant_path(_IMAGES_ROOT, kind, question_id, variant)
+    if path is None:
         raise HTTPException(status_code=404, detail="Image not found")
-    return FileResponse(path, media_type="image/png", headers=_CACHE_HEADERS)
+
+    version = image_version(_IMAGES_ROOT, kind, question_id)
+    media_type = "image/jpeg" if path.endswith(".jpg") else "image/png"
+    cache_control = _IMMUTABLE_CACHE if v is not None and v == version else _REVALIDATE_CACHE
+    return _conditional_file_response(
+        request, path, media_type, f'"{version}-{variant or "original"}"', cache_control
+    )
+
+
+@router.get("/question/{question_id}")
+def get_question_image(
+    question_id: int, request: Request, variant: Optional[ImageVariantName] = None, v: Optional[str] = None
+):
+    return _pool_image_response(request, "questions", question_id, variant, v)
 
 
 @router.get("/answer/{question_id}")
-def get_answer_image(question_id: int):
-    path = os.path.join(ROOT_FOLDER, "data", "images", "answers", f"{question_id}.png")
-    if not os.path.exists(path):
-        raise HTTPException(status_code=404, detail="Image not found")
-    return FileResponse(path, media_type="image/png", headers=_CACHE_HEADERS)
+def get_answer_image(
+    question_id: int, request: Request, variant: Optional[ImageVariantName] = None, v: Optional[str] = None
+):
+    return _pool_image_response(request, "answers", question_id, variant, v)
 
 
 @router.get("/user/{telegram_id}")
-def get_user_photo(telegram_id: int):
+def get_user_photo(telegram_id: int, request: Request):
     candidates = [
         os.path.join(ROOT_FOLDER, "data", "images", "users", f"{telegram_id}.jpg"),
         os.path.join(ROOT_FOLDER, "flet_apps", "assets", "users_photos", f"{telegram_id}.jpg"),
     ]
     for path in candidates:
         if os.path.exists(path):
-            return FileResponse(path, media_type="image/jpeg", headers=_CACHE_HEADERS)
+            stat = os.stat(path)
+            etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+            return _conditional_file_response(request, path, "image/jpeg", etag, _USER_PHOTO_CACHE)
     raise HTTPException(status_code=404, detail="Photo not found")
@@ -0,0 +1,14 @@
+from fastapi import APIRouter, Depends, HTTPException
+
+from api.dependencies import require_auth
+from utils.jobs import import_jobs
+
+router = APIRouter(prefix="/api/admin/jobs", tags=["jobs"])
+
+
+@router.get("/{job_id}")
+def get_job(job_id: str, _: str = Depends(require_auth)):
+    job = import_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Задача не найдена")
+    return job.to_dict()
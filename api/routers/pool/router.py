@@ -1,7 +1,9 @@
 import os
+import shutil
+import uuid
 from datetime import datetime
 
-from fastapi import APIRouter, BackgroundTasks, Depends, File, HTTPException, UploadFile
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
 from fastapi.responses import FileResponse
 
 from api.config import ROOT_FOLDER
@@ -9,25 +11,28 @@ from api.dependencies import require_auth
 from api.routers.pool.schemas import NewQuestion, QuestionUpdate
 from db.crud import (
     deactivate_question,
-    get_all_pool,
+    delete_telegram_file_ids,
+    get_pool_snapshot,
     get_question_from_pool,
-    insert_pool_data,
     insert_question_into_pool,
     switch_image_flag,
     update_question,
 )
 from db.models import Pool
-from utils.clearing import clear_folder
 from utils.excel import import_pool
-from utils.move_file import move_image
+from utils.image_variants import generate_image_variants, pool_image_versions, remove_image_variants
+from utils.jobs import Job, JobFailed, import_jobs
+from utils.telegram_files import ANSWER_IMAGE, QUESTION_IMAGE
 
 router = APIRouter(prefix="/api/admin/pool", tags=["pool"])
 
+_IMAGES_ROOT = os.path.join(ROOT_FOLDER, "data", "images")
+
 
 @router.get("")
 def list_pool(_: str = Depends(require_auth)):
-    pool = get_all_pool(active=True)
-    return [{"id": q.id, "text": q.text, "tags_list": q.tags_list} for q in pool]
+    pool = get_pool_snapshot().questions(active=True)
+    return [{"id": q.id, "text": q.text, "tags_list": list(q.tags_list)} for q in pool]
 
 
 @router.get("/template")
@@ -44,62 +49,41 @@ def get_pool_template(_: str = Depends(require_auth)):
     )
 
 
-@router.post("/import")
-def import_pool_excel(
-    file: UploadFile = File(...),
-    background_tasks: BackgroundTasks = BackgroundTasks(),
-    _: str = Depends(require_auth),
-):
-    filepath = os.path.join(
-        ROOT_FOLDER,
-        "data",
-        "temp",
-        f"pool_{datetime.now().strftime('%Y%m%d%H%M')}.xlsx",
-    )
-    os.makedirs(os.path.dirname(filepath), exist_ok=True)
-    with open(filepath, "wb") as f:
-        f.write(file.file.read())
-
-    import_data = import_pool(filepath)
+def _run_pool_import(job: Job, filepath: str) -> dict:
+    try:
+        import_data = import_pool(filepath, progress=job.progress)
+    finally:
+        os.remove(filepath)
 
     if not import_data["is_ok"]:
-        clear_folder(os.path.join(ROOT_FOLDER, "data", "temp"))
-        raise HTTPException(status_code=400, detail=import_data["comment"])
+        raise JobFailed(import_data["comment"], [row for row in import_data["rows"] if row["errors"]])
 
     if import_data["errors"]:
-        clear_folder(os.path.join(ROOT_FOLDER, "data", "temp"))
         error_rows = " ".join(str(r) for r in import_data["errors"])
-        raise HTTPException(
-            status_code=400,
-            detail=f"Ошибки в строках: {error_rows}. Исправьте и повторите загрузку.",
+        raise JobFailed(
+            f"Ошибки в строках: {error_rows}. Исправьте и повторите загрузку.",
+            [row for row in import_data["rows"] if row["errors"]],
         )
 
-    pool = insert_pool_data(import_data["data"])
-
-    for el in pool:
-        if bool(el.question_image):
-            src = os.path.join(ROOT_FOLDER, "data", "temp", f"q_{el.import_id}.png")
-            if os.path.exists(src):
-                move_image(
-                    src,
-                    os.path.join(ROOT_FOLDER, "data", "images", "questions", f"{el.id}.png"),
-                )
-        if bool(el.answer_image):
-            src = os.path.join(ROOT_FOLDER, "data", "temp", f"a_{el.import_id}.png")
-            if os.path.exists(src):
-                move_image(
-                    src,
-                    os.path.join(ROOT_FOLDER, "data", "images", "answers", f"{el.id}.png"),
-                )
-
-    background_tasks.add_task(clear_folder, os.path.join(ROOT_FOLDER, "data", "temp"))
     return {
-        "ok": True,
-        "imported_count": len(import_data["data"]),
-        "message": f"Вопросы успешно импортированы ({len(import_data['data'])})",
+        "imported_count": import_data["imported_count"],
+        "message": f"Вопросы успешно импортированы ({import_data['imported_count']})",
+        "rows": import_data["rows"],
     }
 
 
+@router.post("/import", status_code=202)
+def import_pool_excel(file: UploadFile = File(...), _: str = Depends(require_auth)):
+    """Queue the import; progress and row errors are served by `GET /api/admin/jobs/{job_id}`."""
+    filepath = os.path.join(ROOT_FOLDER, "data", "temp", f"pool_{uuid.uuid4().hex}.xlsx")
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    with open(filepath, "wb") as f:
+        shutil.copyfileobj(file.file, f)
+
+    job = import_jobs.submit("pool_import", _run_pool_import, filepath)
+    return {"ok": True, "job_id": job.id}
+
+
 @router.get("/{question_id}")
 def get_pool_question(question_id: int, _: str = Depends(require_auth)):
     q = get_question_from_pool(question_id)
@@ -116,6 +100,7 @@ def get_pool_question(question_id: int, _: str = Depends(require_auth)):
         "is_selfcheck": q.is_selfcheck,
         "question_image": bool(q.question_image),
         "answer_image": bool(q.answer_image),
+        **pool_image_versions(_IMAGES_ROOT, q.id, q.question_image, q.answer_image),
         "type": q.type,
         "is_active": q.is_active,
     }
@@ -176,6 +161,8 @@ def upload_question_image(
     os.makedirs(os.path.dirname(dest), exist_ok=True)
     with open(dest, "wb") as f:
         f.write(file.file.read())
+    generate_image_variants(_IMAGES_ROOT, "questions", question_id)
+    delete_telegram_file_ids(QUESTION_IMAGE, question_id)
     switch_image_flag(1, "question", question_id)
     return {"ok": True}
 
@@ -192,6 +179,8 @@ def remove_question_image(question_id: int, _: str = Depends(require_auth)):
             f"removed_{datetime.now().timestamp()}_{question_id}.png",
         )
         os.rename(old, new_path)
+    remove_image_variants(_IMAGES_ROOT, "questions", question_id)
+    delete_telegram_file_ids(QUESTION_IMAGE, question_id)
     switch_image_flag(0, "question", question_id)
     return {"ok": True}
 
@@ -206,6 +195,8 @@ def upload_answer_image(
     os.makedirs(os.path.dirname(dest), exist_ok=True)
     with open(dest, "wb") as f:
         f.write(file.file.read())
+    generate_image_variants(_IMAGES_ROOT, "answers", question_id)
+    delete_telegram_file_ids(ANSWER_IMAGE, question_id)
     switch_image_flag(1, "answer", question_id)
     return {"ok": True}
 
@@ -222,5 +213,7 @@ def remove_answer_image(question_id: int, _: str = Depends(require_auth)):
             f"removed_{datetime.now().timestamp()}_{question_id}.png",
         )
         os.rename(old, new_path)
+    remove_image_variants(_IMAGES_ROOT, "answers", question_id)
+    delete_telegram_file_ids(ANSWER_IMAGE, question_id)
     switch_image_flag(0, "answer", question_id)
     return {"ok": True}
@@ -1,7 +1,11 @@
+import os
+
 from fastapi import APIRouter, HTTPException
 
+from api.config import ROOT_FOLDER
 from db.crud import get_work_by_token, get_user_by_id, get_work_questions_joined_pool
-from utils.user_statistics import get_user_statistics
+from utils.image_variants import pool_image_versions
+from utils.user_statistics import get_work_statistics
 
 router = APIRouter(prefix="/api/student", tags=["student"])
 
@@ -16,12 +20,10 @@ def student_work_stats(token: str):
     if not user:
         raise HTTPException(status_code=404, detail="Пользователь не найден")
 
-    all_stats = get_user_statistics(user.telegram_id)
-    work_stats_list = [s for s in all_stats if s["general"]["work_id"] == work.id]
-    if not work_stats_list:
+    ws = get_work_statistics(work.id, user=user)
+    if ws is None:
         raise HTTPException(status_code=404, detail="Статистика не найдена")
 
-    ws = work_stats_list[-1]
     questions_list = get_work_questions_joined_pool(work.id)
 
     questions_data = [
@@ -35,6 +37,9 @@ def student_work_stats(token: str):
             "full_mark": q.full_mark,
             "question_image": bool(q.question_image),
             "answer_image": bool(q.answer_image),
+            **pool_image_versions(
+                os.path.join(ROOT_FOLDER, "data", "images"), q.question_id, q.question_image, q.answer_image
+            ),
         }
         for idx, q in enumerate(questions_list)
     ]
@@ -0,0 +1,12 @@
+from fastapi import APIRouter, Depends
+
+from api.dependencies import require_auth
+from db.database import get_pool_statistics
+
+router = APIRouter(prefix="/api/admin/system", tags=["system"])
+
+
+@router.get("/db-pool")
+def db_pool_statistics(_: str = Depends(require_auth)):
+    """Connection pool usage of this API worker: checked-out connections, overflow, checkout waits."""
+    return get_pool_statistics()
@@ -20,6 +20,7 @@ from aiogram import Bot
 from aiogram.client.default import DefaultBotProperties
 from aiogram.types import FSInputFile
 from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import FileResponse
 from pydantic import BaseModel
 
@@ -30,44 +31,43 @@ from api.routers.student_auth.service import (
     invite_expiration,
     verify_student_token,
 )
+from db import async_crud
 from db.crud import (
+    answer_and_advance,
     close_question,
-    create_new_work,
     create_user,
     end_work,
-    get_all_pool,
-    get_all_topics,
     get_current_work_question,
     get_hand_work,
     get_hand_work_question_count,
     get_hand_work_questions,
+    get_pool_snapshot,
     get_questions_list_by_id,
-    get_session,
     get_skipped_questions,
     get_theory_document_by_id,
     get_theory_documents,
     get_topic_by_id,
+    get_topic_catalog,
     get_user,
     get_user_by_id,
     get_user_works_by_user_id,
     get_work_by_id,
-    get_work_question_count,
     get_work_questions,
     get_work_questions_joined_pool,
-    insert_work_questions,
     open_next_question,
     remove_work,
     requeue_skipped_questions,
     issue_student_access_grant,
     revoke_user_web_access,
-    update_question_status,
 )
-from db.models import Pool, WorkQuestion
+from db.models import Pool
 from utils.answer_checker import check_answer
+from utils.image_variants import pool_image_versions
 from utils.mini_app_links import get_tma_invite_url, get_tma_start_url
+from utils.telegram_files import THEORY_DOCUMENT, send_cached_file
 from utils.tags_helper import get_ege_tags_list, get_questions_list_for_topic_work, get_random_questions
-from utils.user_statistics import get_user_statistics_by_user_id
-from utils.work_pdf import build_work_pdf
+from utils.user_statistics import get_user_statistics_by_user_id, get_work_statistics
+from utils.work_pdf import PdfRenderBusy, PdfRenderTimeout, build_work_pdf_async
 
 router = APIRouter(prefix="/api/tma", tags=["tma"])
 
@@ -75,6 +75,7 @@ _BOT_TOKEN = os.getenv("BOT_API_KEY", "")
 _BOT_NAME = (os.getenv("BOT_NAME", "") or "").lstrip("@")
 _ROOT_FOLDER = os.getenv("ROOT_FOLDER", ".")
 _THEORY_DIR = os.path.join(_ROOT_FOLDER, "data", "theory_documents")
+_IMAGES_ROOT = os.path.join(_ROOT_FOLDER, "data", "images")
 _BOT = Bot(token=_BOT_TOKEN, default=DefaultBotProperties(parse_mode="html")) if _BOT_TOKEN else None
 _LOGGER = logging.getLogger(__name__)
 
@@ -184,21 +185,18 @@ def _require_work(work_id: int, user_id: int):
     return work
 
 
-def _build_advance_response(work_id: int):
-    next_question = open_next_question(work_id)
+def _build_advance_response(result: Optional[dict]):
+    if result is None:
+        raise HTTPException(status_code=404, detail="Вопрос не найден")
 
-    if next_question is None:
-        skipped = get_skipped_questions(work_id)
-        if skipped:
-            return {"type": "skipped", "count": len(skipped)}
-        end_work(work_id)
+    if result["question"] is None:
+        if result["skipped"]:
+            return {"type": "skipped", "count": result["skipped"]}
         return {"type": "complete"}
 
-    row = get_current_work_question(work_id)
-    total = get_work_question_count(work_id)
     return {
         "type": "question",
-        "question": _row_to_question(row, total),
+        "question": _row_to_question(result["question"], result["total"]),
     }
 
 
@@ -214,6 +212,7 @@ def _row_to_question(row, total: int) -> dict:
         "full_mark": row.full_mark,
         "answer": None,
         "answer_image": bool(row.answer_image),
+        **pool_image_versions(_IMAGES_ROOT, row.question_id, row.question_image, row.answer_image),
     }
 
 
@@ -244,7 +243,7 @@ async def _send_work_pdf_to_chat(
         return
 
     try:
-        pdf_path, visible_name = build_work_pdf(
+        pdf_path, visible_name = await build_work_pdf_async(
             root_folder=_ROOT_FOLDER,
             work_id=work_id,
             work_title=work_title,
@@ -340,8 +339,12 @@ def register(body: RegisterBody, context: StudentContext = Depends(get_student_c
 @router.get("/topics")
 def list_topics(context: StudentContext = Depends(get_student_context)):
     _require_user(context)
-    topics = get_all_topics(active=True)
-    return [{"id": topic.id, "name": topic.name, "volume": topic.volume} for topic in topics]
+    catalog = get_topic_catalog()
+    return [
+        {"id": topic.id, "name": topic.name, "volume": topic.volume, "questions_count": topic.questions_count}
+        for volume in catalog.volumes()
+        for topic in catalog.topics(volume)
+    ]
 
 
 @router.post("/profile/web-access/start")
@@ -432,9 +435,14 @@ async def send_theory_document_to_chat(document_id: int, context: StudentContext
     visible_name = document.original_file_name or f"{document.title}.pdf"
 
     try:
-        await _BOT.send_document(
+        await send_cached_file(
+            _BOT.send_document,
+            kind=THEORY_DOCUMENT,
+            entity_id=document.id,
+            path=path,
+            media_field="document",
+            filename=visible_name,
             chat_id=user.telegram_id,
-            document=FSInputFile(path, filename=visible_name),
             caption=f"Теория: <b>{html.escape(document.title)}</b>",
         )
     except Exception as exc:
@@ -483,15 +491,13 @@ def get_active_work(context: StudentContext = Depends(get_student_context)):
             remove_work(active.id)
             return None
 
-    questions = get_work_questions(active.id)
-    answered = sum(1 for question in questions if question.status == "answered")
     return {
         "id": active.id,
         "work_type": active.work_type,
         "hand_work_id": active.hand_work_id,
         "topic_id": active.topic_id,
-        "total": len(questions),
-        "answered": answered,
+        "total": active.total_questions,
+        "answered": active.answered_count,
     }
 
 
@@ -563,32 +569,28 @@ async def create_work(
     if body.pdf_delivery == "telegram" and (context.auth_mode != "telegram" or not user.telegram_id):
         raise HTTPException(status_code=409, detail="PDF can be sent to Telegram only from Telegram session")
 
-    work = create_new_work(
-        user_id=user.id,
-        work_type=body.work_type,
-        topic_id=body.topic_id,
-        hand_work_id=body.hand_work_id,
-    )
-
     if body.work_type == "ege":
-        pool = get_all_pool(active=True)
+        snapshot = get_pool_snapshot()
         tags_list = get_ege_tags_list(each_question_limit=1)
-        result = get_random_questions(pool=pool, request_dict=tags_list)
+        result = get_random_questions(pool=None, request_dict=tags_list, tag_index=snapshot.tag_index(active=True))
         if not result["is_ok"]:
-            remove_work(work.id)
             raise HTTPException(status_code=500, detail="Не хватает вопросов для ЕГЭ-тренировки")
-        questions_list = get_questions_list_by_id(result["detail"])
+        questions_list = snapshot.get_many(result["detail"])
     elif body.work_type == "topic":
         result = get_questions_list_for_topic_work(topic_id=body.topic_id)
         if not result["is_ok"]:
-            remove_work(work.id)
             raise HTTPException(status_code=500, detail="Не хватает вопросов по этой теме")
         questions_list = result["detail"]
     else:
         questions_list = get_hand_work_questions(body.hand_work_id)
 
-    insert_work_questions(work, questions_list)
-    open_next_question(work.id)
+    work = await async_crud.create_work_with_questions(
+        user_id=user.id,
+        work_type=body.work_type,
+        topic_id=body.topic_id,
+        hand_work_id=body.hand_work_id,
+        questions_list=questions_list,
+    )
 
     if body.pdf_delivery == "telegram":
         if context.auth_mode != "telegram" or not user.telegram_id:
@@ -610,32 +612,43 @@ async def create_work(
     return {"work_id": work.id}
 
 
-@router.get("/works/{work_id}/pdf")
-def download_work_pdf(work_id: int, context: StudentContext = Depends(get_student_context)):
+def _load_work_pdf_payload(work_id: int, context: StudentContext):
     user = _require_user(context)
     work = _require_work(work_id, user.id)
-    work_title, work_type_label, questions_list = _get_work_pdf_payload(work)
-    pdf_path, visible_name = build_work_pdf(
-        root_folder=_ROOT_FOLDER,
-        work_id=work.id,
-        work_title=work_title,
-        work_type_label=work_type_label,
-        questions=questions_list,
+    return (work, *_get_work_pdf_payload(work))
+
+
+@router.get("/works/{work_id}/pdf")
+async def download_work_pdf(work_id: int, context: StudentContext = Depends(get_student_context)):
+    # The DB reads stay in the threadpool; only the render is awaited on the loop.
+    work, work_title, work_type_label, questions_list = await run_in_threadpool(
+        _load_work_pdf_payload, work_id, context
     )
+    try:
+        pdf_path, visible_name = await build_work_pdf_async(
+            root_folder=_ROOT_FOLDER,
+            work_id=work.id,
+            work_title=work_title,
+            work_type_label=work_type_label,
+            questions=questions_list,
+        )
+    except PdfRenderBusy as exc:
+        raise HTTPException(status_code=503, detail=str(exc))
+    except PdfRenderTimeout:
+        raise HTTPException(status_code=504, detail="PDF формируется слишком долго, попробуйте позже")
     return FileResponse(pdf_path, media_type="application/pdf", filename=visible_name)
 
 
 @router.get("/works/{work_id}/question")
 def get_question(work_id: int, context: StudentContext = Depends(get_student_context)):
     user = _require_user(context)
-    _require_work(work_id, user.id)
+    work = _require_work(work_id, user.id)
 
     row = get_current_work_question(work_id)
     if row is None:
         raise HTTPException(status_code=404, detail="Нет активного вопроса")
 
-    total = get_work_question_count(work_id)
-    return _row_to_question(row, total)
+    return _row_to_question(row, work.total_questions)
 
 
 @router.post("/works/{work_id}/answer")
@@ -643,23 +656,14 @@ def submit_answer(work_id: int, body: AnswerBody, context: StudentContext = Depe
     user = _require_user(context)
     _require_work(work_id, user.id)
 
-    with get_session() as session:
-        work_question = session.query(WorkQuestion).filter_by(id=body.work_question_id, work_id=work_id).first()
-        if not work_question:
-            raise HTTPException(status_code=404, detail="Вопрос не найден")
-        pool_question = session.query(Pool).filter_by(id=work_question.question_id).first()
-
-    if bool(pool_question.is_selfcheck):
-        raise HTTPException(status_code=400, detail="Этот вопрос требует самопроверки")
-
-    mark = check_answer(pool_question, body.answer.strip())
-    close_question(
-        q_id=body.work_question_id,
-        user_answer=body.answer.strip(),
-        user_mark=mark,
-        end_datetime=datetime.now(),
-    )
-    return _build_advance_response(work_id)
+    user_answer = body.answer.strip()
+
+    def grade(question):
+        if bool(question.is_selfcheck):
+            raise HTTPException(status_code=400, detail="Этот вопрос требует самопроверки")
+        return user_answer, check_answer(question, user_answer)
+
+    return _build_advance_response(answer_and_advance(work_id, body.work_question_id, grade))
 
 
 @router.post("/works/{work_id}/self-check")
@@ -667,36 +671,19 @@ def submit_self_check(work_id: int, body: SelfCheckBody, context: StudentContext
     user = _require_user(context)
     _require_work(work_id, user.id)
 
-    with get_session() as session:
-        work_question = session.query(WorkQuestion).filter_by(id=body.work_question_id, work_id=work_id).first()
-        if not work_question:
-            raise HTTPException(status_code=404, detail="Вопрос не найден")
-        pool_question = session.query(Pool).filter_by(id=work_question.question_id).first()
+    def grade(question):
+        if body.mark < 0 or body.mark > question.full_mark:
+            raise HTTPException(status_code=400, detail=f"Балл должен быть от 0 до {question.full_mark}")
+        return "самостоятельная проверка", body.mark
 
-    if body.mark < 0 or body.mark > pool_question.full_mark:
-        raise HTTPException(status_code=400, detail=f"Балл должен быть от 0 до {pool_question.full_mark}")
-
-    close_question(
-        q_id=body.work_question_id,
-        user_answer="самостоятельная проверка",
-        user_mark=body.mark,
-        end_datetime=datetime.now(),
-    )
-    return _build_advance_response(work_id)
+    return _build_advance_response(answer_and_advance(work_id, body.work_question_id, grade))
 
 
 @router.post("/works/{work_id}/skip")
 def skip_question(work_id: int, body: SkipBody, context: StudentContext = Depends(get_student_context)):
     user = _require_user(context)
     _require_work(work_id, user.id)
-
-    with get_session() as session:
-        work_question = session.query(WorkQuestion).filter_by(id=body.work_question_id, work_id=work_id).first()
-        if not work_question:
-            raise HTTPException(status_code=404, detail="Вопрос не найден")
-
-    update_question_status(body.work_question_id, "skipped")
-    return _build_advance_response(work_id)
+    return _build_advance_response(answer_and_advance(work_id, body.work_question_id))
 
 
 @router.post("/works/{work_id}/requeue-skipped", status_code=204)
@@ -733,11 +720,9 @@ def get_work_results(work_id: int, context: StudentContext = Depends(get_student
     if work.end_datetime is None:
         raise HTTPException(status_code=400, detail="Работа ещё не завершена")
 
-    all_stats = get_user_statistics_by_user_id(user.id)
-    stats_list = [stat for stat in all_stats if stat["general"]["work_id"] == work_id]
-    if not stats_list:
+    stats = get_work_statistics(work_id, user=user)
+    if stats is None:
         raise HTTPException(status_code=404, detail="Статистика не найдена")
-    stats = stats_list[-1]
 
     questions_list = get_work_questions_joined_pool(work_id)
     questions_data = [
@@ -751,6 +736,9 @@ def get_work_results(work_id: int, context: StudentContext = Depends(get_student
             "full_mark": question.full_mark,
             "question_image": bool(question.question_image),
             "answer_image": bool(question.answer_image),
+            **pool_image_versions(
+                _IMAGES_ROOT, question.question_id, question.question_image, question.answer_image
+            ),
         }
         for index, question in enumerate(questions_list)
     ]
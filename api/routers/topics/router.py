@@ -1,6 +1,8 @@
 import os
+import shutil
+import uuid
 
-from fastapi import APIRouter, BackgroundTasks, Depends, File, HTTPException, UploadFile
+from fastapi import APIRouter, Depends, File, UploadFile
 from fastapi.responses import FileResponse
 
 from api.config import ROOT_FOLDER
@@ -10,37 +12,36 @@ from db.crud import (
     create_topic,
     deactivate_topic,
     get_active_pool_tag_counts,
-    get_all_topics,
-    get_topics_table,
+    get_topic_catalog,
     insert_topics_data,
     update_topic,
 )
-from utils.clearing import clear_folder
 from utils.excel import export_topics_list, import_topics_list
+from utils.jobs import Job, JobFailed, import_jobs
 
 router = APIRouter(prefix="/api/admin/topics", tags=["topics"])
 
 
 @router.get("")
 def list_topics(_: str = Depends(require_auth)):
-    topics = get_topics_table()
+    catalog = get_topic_catalog()
     tag_counter = get_active_pool_tag_counts()
 
-    result: dict = {}
-    for t in topics:
-        if t.volume not in result:
-            result[t.volume] = []
-        result[t.volume].append(
+    return {
+        volume: [
             {
                 "id": t.id,
                 "name": t.name,
+                "questions_count": t.questions_count,
                 "tags": [
                     {"tag": tag, "count": tag_counter.get(tag, 0)}
-                    for tag in sorted(t.tags_list)
+                    for tag in t.tags_list
                 ],
             }
-        )
-    return result
+            for t in catalog.topics(volume)
+        ]
+        for volume in catalog.volumes()
+    }
 
 
 @router.post("")
@@ -65,8 +66,7 @@ def update_topic_endpoint(
 
 @router.get("/export")
 def export_topics_excel(_: str = Depends(require_auth)):
-    topics_list = get_all_topics(active=True)
-    export_topics_list(topics_list)
+    export_topics_list(get_topic_catalog().topics())
     filepath = os.path.join(ROOT_FOLDER, "data", "temp", "chembot_topics_list.xlsx")
     return FileResponse(
         filepath,
@@ -75,30 +75,31 @@ def export_topics_excel(_: str = Depends(require_auth)):
     )
 
 
-@router.post("/import")
-def import_topics_excel(
-    file: UploadFile = File(...),
-    background_tasks: BackgroundTasks = BackgroundTasks(),
-    _: str = Depends(require_auth),
-):
-    from datetime import datetime
-
-    filepath = os.path.join(
-        ROOT_FOLDER,
-        "data",
-        "temp",
-        f"topics_{datetime.now().strftime('%Y%m%d%H%M')}.xlsx",
-    )
-    os.makedirs(os.path.dirname(filepath), exist_ok=True)
-    with open(filepath, "wb") as f:
-        f.write(file.file.read())
-
-    import_data = import_topics_list(filepath)
+def _run_topics_import(job: Job, filepath: str) -> dict:
+    try:
+        job.progress("parse", 0)
+        import_data = import_topics_list(filepath)
+    finally:
+        os.remove(filepath)
 
     if not import_data["is_ok"]:
-        clear_folder(os.path.join(ROOT_FOLDER, "data", "temp"))
-        raise HTTPException(status_code=400, detail=import_data["comment"])
+        raise JobFailed(import_data["comment"])
+    os.remove(os.path.join(ROOT_FOLDER, "data", "temp", import_data["filename"]))
 
+    topics_count = sum(len(topics) for topics in import_data["data"].values())
+    job.progress("import", 0, topics_count)
     insert_topics_data(import_data["data"])
-    background_tasks.add_task(clear_folder, os.path.join(ROOT_FOLDER, "data", "temp"))
-    return {"ok": True, "message": import_data["comment"]}
+    job.progress("import", topics_count, topics_count)
+    return {"message": import_data["comment"], "imported_count": topics_count}
+
+
+@router.post("/import", status_code=202)
+def import_topics_excel(file: UploadFile = File(...), _: str = Depends(require_auth)):
+    """Queue the import; progress is served by `GET /api/admin/jobs/{job_id}`."""
+    filepath = os.path.join(ROOT_FOLDER, "data", "temp", f"topics_{uuid.uuid4().hex}.xlsx")
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    with open(filepath, "wb") as f:
+        shutil.copyfileobj(file.file, f)
+
+    job = import_jobs.submit("topics_import", _run_topics_import, filepath)
+    return {"ok": True, "job_id": job.id}
@@ -5,6 +5,8 @@ from fastapi import FastAPI
 
 from utils.backup_job import load_settings
 from utils.backup_job import run_backup as _run_backup_job
+from utils.jobs import import_jobs
+from utils.work_pdf import shutdown_pdf_renderer
 
 _scheduler = BackgroundScheduler(timezone="UTC")
 
@@ -32,3 +34,5 @@ async def lifespan(app: FastAPI):
         reschedule(settings["time"])
     yield
     _scheduler.shutdown(wait=False)
+    import_jobs.shutdown(wait=False)
+    shutdown_pdf_renderer()
@@ -0,0 +1,39 @@
+"""
+In-memory SQLite stand-in for `db.database` used by the benchmarks.
+
+The models use a couple of MySQL-only column types, so they are compiled to
+plain INTEGER for SQLite. Import this module before anything from `db.crud`.
+"""
+
+import sys
+import types
+
+from sqlalchemy import BigInteger, create_engine, event
+from sqlalchemy.dialects.mysql import TINYINT
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import scoped_session, sessionmaker
+
+from db.models import Base
+
+
+@compiles(BigInteger, "sqlite")
+@compiles(TINYINT, "sqlite")
+def _compile_integer(type_, compiler, **kw):
+    return "INTEGER"
+
+
+engine = create_engine("sqlite://")
+Base.metadata.create_all(engine)
+Session = scoped_session(sessionmaker(bind=engine))
+
+_fake_database = types.ModuleType("db.database")
+_fake_database.engine = engine
+_fake_database.Session = Session
+sys.modules["db.database"] = _fake_database
+
+statements = {"count": 0}
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _count_statement(*args, **kwargs):
+    statements["count"] += 1
@@ -0,0 +1,113 @@
+"""
+Database statements and latency per answered question in the bot.
+
+Compares the previous handler sequence (close the question, open the next one,
+reload the user, their works and the question list, end the work separately) with
+`answer_and_advance`, which the handlers now call once per answer. The bot runs the
+same helpers through `db.async_crud`, so the statement counts are the bot's.
+
+Run from the project root:
+    python -m benchmarks.bench_answer_queries
+"""
+
+import time
+from datetime import datetime
+
+from benchmarks._sqlite import Session, statements
+from db import crud
+from db.models import Pool, User, Work, WorkQuestion
+
+WORK_SIZES = (10, 30)
+REPEATS = 5
+_TELEGRAM_ID = 1000
+
+
+def _seed_pool(size: int):
+    session = Session()
+    session.bulk_insert_mappings(
+        Pool,
+        [
+            {
+                "id": question_id,
+                "type": "topic",
+                "level": 1,
+                "full_mark": 1,
+                "answer": "1",
+                "is_rotate": 0,
+                "is_selfcheck": 0,
+                "created_at": datetime.now(),
+            }
+            for question_id in range(1, size + 1)
+        ],
+    )
+    session.add(User(id=1, name="student", telegram_id=_TELEGRAM_ID))
+    session.commit()
+    session.close()
+
+
+def _seed_work(size: int) -> list[int]:
+    session = Session()
+    work = Work(user_id=1, work_type="topic", start_datetime=datetime.now(), total_questions=size)
+    session.add(work)
+    session.flush()
+    questions = [
+        WorkQuestion(
+            work_id=work.id,
+            question_id=position,
+            position=position,
+            status="current" if position == 1 else "waiting",
+            current_work_id=work.id if position == 1 else None,
+        )
+        for position in range(1, size + 1)
+    ]
+    session.add_all(questions)
+    session.commit()
+    ids = [work.id] + [question.id for question in questions]
+    session.close()
+    return ids
+
+
+def _answer_previously(work_id: int, question_id: int):
+    crud.close_question(q_id=question_id, user_answer="1", user_mark=1, end_datetime=datetime.now())
+    if crud.open_next_question(work_id) is None:
+        crud.get_skipped_questions(work_id)
+        crud.end_work(work_id)
+        return
+    user = crud.get_user(_TELEGRAM_ID)
+    work = crud.get_user_works(user.telegram_id)[0]
+    crud.get_work_questions(work.id)
+
+
+def _answer_now(work_id: int, question_id: int):
+    crud.answer_and_advance(work_id, question_id, grade=lambda question: ("1", 1))
+
+
+def _measure(answer, size: int) -> tuple[float, float]:
+    elapsed = 0.0
+    executed = 0
+    for _ in range(REPEATS):
+        work_id, *question_ids = _seed_work(size)
+        statements["count"] = 0
+        started = time.perf_counter()
+        for question_id in question_ids:
+            answer(work_id, question_id)
+        elapsed += time.perf_counter() - started
+        executed += statements["count"]
+    answers = REPEATS * size
+    return elapsed / answers * 1000, executed / answers
+
+
+def main():
+    _seed_pool(max(WORK_SIZES))
+    print(f"{'questions':>9} | {'before, ms':>10} | {'stmts':>5} | {'after, ms':>9} | {'stmts':>5}")
+    for size in WORK_SIZES:
+        before_ms, before_statements = _measure(_answer_previously, size)
+        after_ms, after_statements = _measure(_answer_now, size)
+        print(
+            f"{size:>9} | {before_ms:>10.2f} | {before_statements:>5.1f} "
+            f"| {after_ms:>9.2f} | {after_statements:>5.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
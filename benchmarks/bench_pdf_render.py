@@ -0,0 +1,102 @@
+"""
+Concurrent work PDF renders next to light requests.
+
+Renders CONCURRENT distinct 34-question, image-heavy PDFs (cache misses) while a
+probe plays a question/answer endpoint: a small sync handler run in a thread every
+10 ms. Compares the previous path (sync `build_work_pdf` in the threadpool, as the
+sync endpoint did) with `build_work_pdf_async` (process pool). Reports the wall time
+for the PDF batch and the probe latency, which grows when renders hold the GIL.
+
+Run from the project root:
+    python -m benchmarks.bench_pdf_render
+"""
+
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from types import SimpleNamespace
+
+from PIL import Image
+
+import utils.work_pdf as work_pdf
+
+QUESTIONS = 34
+CONCURRENCY = (1, 2, 4)
+PROBE_INTERVAL = 0.01
+
+
+def _prepare_root(root: str) -> list:
+    images = os.path.join(root, "data", "images", "questions")
+    os.makedirs(images, exist_ok=True)
+    for q_id in range(1, QUESTIONS + 1):
+        Image.effect_noise((400, 200), 60).convert("RGB").save(os.path.join(images, f"{q_id}.png"))
+    return [
+        SimpleNamespace(id=q_id, text=f"Задание {q_id} " * 20, question_image=1, is_selfcheck=0)
+        for q_id in range(1, QUESTIONS + 1)
+    ]
+
+
+def _probe_handler() -> int:
+    return sum(range(2_000))
+
+
+async def _probe(stop: asyncio.Event, latencies: list):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.to_thread(_probe_handler)
+        latencies.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(PROBE_INTERVAL)
+
+
+async def _run(render, count: int) -> tuple[float, list]:
+    stop, latencies = asyncio.Event(), []
+    probe = asyncio.create_task(_probe(stop, latencies))
+    started = time.perf_counter()
+    await asyncio.gather(*(render(i) for i in range(count)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await probe
+    return elapsed, latencies
+
+
+def _p95(values: list) -> float:
+    return statistics.quantiles(values, n=20)[-1] if len(values) > 1 else values[0]
+
+
+def main():
+    with tempfile.TemporaryDirectory() as root:
+        questions = _prepare_root(root)
+        run_id = [0]
+
+        def kwargs(i: int) -> dict:
+            run_id[0] += 1
+            return dict(
+                root_folder=root, work_id=i, work_title=f"Работа {run_id[0]}",
+                work_type_label="Работа от преподавателя", questions=questions,
+            )
+
+        async def inline(i: int):
+            return await asyncio.to_thread(lambda: work_pdf.build_work_pdf(**kwargs(i)))
+
+        async def pooled(i: int):
+            return await work_pdf.build_work_pdf_async(**kwargs(i), timeout=600)
+
+        # Start the render processes outside the measurement.
+        asyncio.run(pooled(0))
+
+        print(f"render workers: {work_pdf.WORK_PDF_RENDER_WORKERS}, cpus: {os.cpu_count()}")
+        print(f"{'pdfs':>5} | {'mode':>12} | {'batch, s':>8} | {'probe p50, ms':>13} | {'probe p95, ms':>13}")
+        for count in CONCURRENCY:
+            for mode, render in (("threadpool", inline), ("process pool", pooled)):
+                elapsed, latencies = asyncio.run(_run(render, count))
+                print(
+                    f"{count:>5} | {mode:>12} | {elapsed:>8.2f} | "
+                    f"{statistics.median(latencies):>13.2f} | {_p95(latencies):>13.2f}"
+                )
+        work_pdf.shutdown_pdf_renderer()
+
+
+if __name__ == "__main__":
+    main()
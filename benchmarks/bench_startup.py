@@ -0,0 +1,53 @@
+"""
+Cold import time of the service entry modules.
+
+Each module is imported in a fresh interpreter, the way a uvicorn worker or the
+bot process starts. The check also confirms that the import leaves the
+engines uncreated, so no connection and no migration happened.
+
+Run from the project root:
+    python -m benchmarks.bench_startup
+"""
+
+import statistics
+import subprocess
+import sys
+
+MODULES = ("db.database", "db.crud", "api.main")
+REPEATS = 5
+
+_PROBE = """
+import time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+import db.database as database
+print(elapsed, database._engine is None and database._async_engine is None)
+"""
+
+
+def _measure(module: str) -> tuple[float, bool]:
+    timings = []
+    lazy = True
+    for _ in range(REPEATS):
+        result = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(module=module)],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        elapsed, engines_untouched = result.stdout.split()
+        timings.append(float(elapsed))
+        lazy = lazy and engines_untouched == "True"
+    return statistics.median(timings) * 1000, lazy
+
+
+def main():
+    print(f"{'module':>12} | {'import, ms (median)':>19} | {'engine created':>14}")
+    for module in MODULES:
+        import_ms, lazy = _measure(module)
+        print(f"{module:>12} | {import_ms:>19.1f} | {'no' if lazy else 'YES':>14}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Time to pick the questions of one topic work from synthetic pools.
+
+Compares the previous limiter loop (re-filter the topic pool for every tag on
+every round) with `sample_topic_questions`, which consumes per-tag shuffled
+id queues once.
+
+Run from the project root:
+    python -m benchmarks.bench_topic_sampler
+"""
+
+import random
+import time
+from types import SimpleNamespace
+
+import benchmarks._sqlite  # noqa: F401  (keeps db.crud away from MySQL)
+from db.pool_cache import _build_tag_index
+from utils.tags_helper import sample_topic_questions
+
+POOL_SIZES = (1_000, 10_000, 100_000)
+TOPIC_TAGS = [f"topic_{num}" for num in range(6)]
+QUESTIONS_LIMIT = 20
+REPEATS = 5
+
+
+def _synthetic_pool(size: int, rng: random.Random) -> list:
+    return [
+        SimpleNamespace(id=q_id, tags_list=tuple(rng.sample(TOPIC_TAGS, rng.randint(1, 2))))
+        for q_id in range(1, size + 1)
+    ]
+
+
+def _legacy(pool: list, rng: random.Random) -> list:
+    pool = list(pool)
+    result = []
+    limiter = 100
+    while len(result) != QUESTIONS_LIMIT:
+        for tag in TOPIC_TAGS:
+            filtered_pool = [q for q in pool if tag in q.tags_list]
+            if filtered_pool:
+                q = rng.choice(filtered_pool)
+                result.append(q)
+                pool.remove(q)
+            if len(result) == QUESTIONS_LIMIT:
+                break
+        limiter -= 1
+        if limiter == 0:
+            break
+    return result
+
+
+def _measure(fn) -> float:
+    started = time.perf_counter()
+    for _ in range(REPEATS):
+        fn()
+    return (time.perf_counter() - started) / REPEATS * 1000
+
+
+def main():
+    print(f"{'pool':>8} | {'limiter loop, ms':>16} | {'id queues, ms':>13}")
+    for size in POOL_SIZES:
+        rng = random.Random(size)
+        pool = _synthetic_pool(size, rng)
+        tag_index = _build_tag_index(pool)
+
+        legacy_ms = _measure(lambda: _legacy(pool, rng))
+        sampler_ms = _measure(lambda: sample_topic_questions(tag_index, TOPIC_TAGS, QUESTIONS_LIMIT, rng))
+        print(f"{size:>8} | {legacy_ms:>16.2f} | {sampler_ms:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Latency of opening one result page as the user's history grows.
+
+Compares the previous approach (build statistics for every finished work,
+then keep one) with `get_work_statistics`, which reads a single work.
+
+Run from the project root:
+    python -m benchmarks.bench_work_statistics
+"""
+
+import time
+from datetime import datetime
+
+from benchmarks._sqlite import Session, statements
+from db.models import Pool, User, Work, WorkQuestion
+from utils.user_statistics import get_user_statistics_by_user_id, get_work_statistics
+
+QUESTIONS_PER_WORK = 30
+HISTORY_SIZES = (10, 100, 500, 1000)
+REPEATS = 20
+
+
+def _seed_history(user_id: int, works_count: int) -> int:
+    session = Session()
+    session.add(User(id=user_id, name=f"user {user_id}", telegram_id=user_id))
+    now = datetime.now()
+    last_work_id = None
+    for _ in range(works_count):
+        work = Work(user_id=user_id, work_type="topic", start_datetime=now, end_datetime=now)
+        session.add(work)
+        session.flush()
+        session.bulk_insert_mappings(
+            WorkQuestion,
+            [
+                {
+                    "work_id": work.id,
+                    "question_id": position,
+                    "position": position,
+                    "status": "answered",
+                    "user_mark": position % 3,
+                }
+                for position in range(1, QUESTIONS_PER_WORK + 1)
+            ],
+        )
+        last_work_id = work.id
+    session.commit()
+    session.close()
+    return last_work_id
+
+
+def _seed_pool():
+    session = Session()
+    session.bulk_insert_mappings(
+        Pool,
+        [
+            {
+                "id": question_id,
+                "type": "topic",
+                "level": 1,
+                "full_mark": 2,
+                "is_rotate": 0,
+                "is_selfcheck": 0,
+                "created_at": datetime.now(),
+            }
+            for question_id in range(1, QUESTIONS_PER_WORK + 1)
+        ],
+    )
+    session.commit()
+    session.close()
+
+
+def _measure(func) -> tuple[float, int]:
+    statements["count"] = 0
+    started = time.perf_counter()
+    for _ in range(REPEATS):
+        func()
+    elapsed = (time.perf_counter() - started) / REPEATS
+    return elapsed * 1000, statements["count"] // REPEATS
+
+
+def main():
+    _seed_pool()
+    print(f"{'works':>6} | {'all works, ms':>14} | {'single work, ms':>16} | {'stmts (single)':>14}")
+    for user_id, works_count in enumerate(HISTORY_SIZES, start=1):
+        work_id = _seed_history(user_id, works_count)
+
+        def legacy():
+            stats = get_user_statistics_by_user_id(user_id)
+            return [item for item in stats if item["general"]["work_id"] == work_id][-1]
+
+        legacy_ms, _ = _measure(legacy)
+        scoped_ms, scoped_statements = _measure(lambda: get_work_statistics(work_id))
+        print(f"{works_count:>6} | {legacy_ms:>14.2f} | {scoped_ms:>16.2f} | {scoped_statements:>14}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Async variants of the crud functions the bot calls from its handlers: the answer /
+advance path of a work, the broadcast helpers and the Telegram file-id cache.
+
+Each function opens an `AsyncSession` and runs a `_helper(session, ...)` from
+`db.crud` through `run_sync`. Where `db.crud` also has a synchronous function of
+the same name, it shares that helper, so both stay in lockstep while the bot and
+async Mini App endpoints no longer block the event loop.
+"""
+
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import List, Optional
+
+from db.crud import (
+    _answer_and_advance,
+    _close_question,
+    _create_broadcast,
+    _create_work_with_questions,
+    _delete_telegram_file_ids,
+    _end_work,
+    _finish_broadcast,
+    _get_broadcast_status_counts,
+    _get_current_work_question,
+    _get_pending_broadcast_deliveries,
+    _get_running_broadcasts,
+    _get_skipped_questions,
+    _get_telegram_file_id,
+    _get_user,
+    _get_user_works,
+    _get_work_by_id,
+    _get_work_questions,
+    _open_next_question,
+    _save_broadcast_deliveries,
+    _save_telegram_file_id,
+    _update_question_status,
+)
+from db.database import AsyncSession
+from db.models import Broadcast, User, Work, WorkQuestion
+
+
+@asynccontextmanager
+async def get_async_session():
+    session = AsyncSession()
+    try:
+        yield session
+        await session.commit()
+    except Exception:
+        await session.rollback()
+        raise
+    finally:
+        await session.close()
+
+
+async def get_user(telegram_id: int) -> User:
+    async with get_async_session() as session:
+        return await session.run_sync(_get_user, telegram_id)
+
+
+async def get_user_works(tid: int) -> List[Work]:
+    async with get_async_session() as session:
+        return await session.run_sync(_get_user_works, tid)
+
+
+async def open_next_question(work_id: int) -> Optional[WorkQuestion]:
+    async with get_async_session() as session:
+        return await session.run_sync(_open_next_question, work_id)
+
+
+async def close_question(q_id: int, user_answer: str, user_mark: int, end_datetime: datetime,
+                         start_datetime: datetime = None):
+    async with get_async_session() as session:
+        await session.run_sync(_close_question, q_id, user_answer, user_mark, end_datetime, start_datetime)
+
+
+async def get_skipped_questions(work_id: int) -> List[WorkQuestion]:
+    async with get_async_session() as session:
+        return await session.run_sync(_get_skipped_questions, work_id)
+
+
+async def update_question_status(q_id: int, status: str):
+    async with get_async_session() as session:
+        await session.run_sync(_update_question_status, q_id, status)
+
+
+async def end_work(work_id: int) -> Work:
+    async with get_async_session() as session:
+        return await session.run_sync(_end_work, work_id)
+
+
+async def answer_and_advance(work_id: int, work_question_id: int, grade=None) -> Optional[dict]:
+    """Answer (or, without `grade`, skip) a question and open the next one in one transaction."""
+    async with get_async_session() as session:
+        return await session.run_sync(_answer_and_advance, work_id, work_question_id, grade)
+
+
+async def get_work_by_id(work_id: int) -> Optional[Work]:
+    async with get_async_session() as session:
+        return await session.run_sync(_get_work_by_id, work_id)
+
+
+async def get_work_questions(work_id: int) -> List[WorkQuestion]:
+    async with get_async_session() as session:
+        return await session.run_sync(_get_work_questions, work_id)
+
+
+async def get_current_work_question(work_id: int):
+    """Return the WorkQuestion with status='current', joined with Pool data."""
+    async with get_async_session() as session:
+        return await session.run_sync(_get_current_work_question, work_id)
+
+
+async def create_work_with_questions(
+    user_id: int,
+    work_type: str,
+    topic_id: Optional[int],
+    questions_list: list,
+    hand_work_id: Optional[str] = None,
+) -> Work:
+    """Create a work, insert its questions and open the first one in a single transaction."""
+    async with get_async_session() as session:
+        return await session.run_sync(
+            _create_work_with_questions, user_id, work_type, topic_id, questions_list, hand_work_id
+        )
+
+
+async def get_telegram_file_id(kind: str, entity_id: int, content_hash: str) -> Optional[str]:
+    async with get_async_session() as session:
+        return await session.run_sync(_get_telegram_file_id, kind, entity_id, content_hash)
+
+
+async def save_telegram_file_id(kind: str, entity_id: int, content_hash: str, file_id: str):
+    async with get_async_session() as session:
+        await session.run_sync(_save_telegram_file_id, kind, entity_id, content_hash, file_id)
+
+
+async def delete_telegram_file_id(kind: str, entity_id: int, content_hash: str):
+    async with get_async_session() as session:
+        await session.run_sync(_delete_telegram_file_ids, kind, entity_id, content_hash)
+
+
+async def create_broadcast(html_text: str, admin_chat_id: int, progress_message_id: Optional[int] = None) -> Broadcast:
+    async with get_async_session() as session:
+        return await session.run_sync(_create_broadcast, html_text, admin_chat_id, progress_message_id)
+
+
+async def get_pending_broadcast_deliveries(broadcast_id: int) -> list:
+    async with get_async_session() as session:
+        return await session.run_sync(_get_pending_broadcast_deliveries, broadcast_id)
+
+
+async def get_broadcast_status_counts(broadcast_id: int) -> dict[str, int]:
+    async with get_async_session() as session:
+        return await session.run_sync(_get_broadcast_status_counts, broadcast_id)
+
+
+async def save_broadcast_deliveries(deliveries: list[dict]):
+    async with get_async_session() as session:
+        await session.run_sync(_save_broadcast_deliveries, deliveries)
+
+
+async def finish_broadcast(broadcast_id: int, status: str = "done"):
+    async with get_async_session() as session:
+        await session.run_sync(_finish_broadcast, broadcast_id, status)
+
+
+async def get_running_broadcasts() -> List[Broadcast]:
+    async with get_async_session() as session:
+        return await session.run_sync(_get_running_broadcasts)
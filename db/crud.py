@@ -1,10 +1,10 @@
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import Iterable, List, Optional
 from contextlib import contextmanager
 import uuid
 
 from sqlalchemy.orm import aliased
-from sqlalchemy import func, or_
+from sqlalchemy import case, func, insert, or_, tuple_, update
 
 from db.models import (
     Pool,
@@ -21,8 +21,13 @@ from db.models import (
     TheoryDocument,
     TheoryDocumentTag,
     StudentAccessGrant,
+    TelegramFileCache,
+    Broadcast,
+    BroadcastDelivery,
 )
 from db.database import Session
+from db.pool_cache import PoolRecord, PoolSnapshot, pool_snapshot_cache
+from db.topic_cache import TopicCatalog, TopicRecord, topic_catalog_cache
 
 
 @contextmanager
@@ -59,37 +64,68 @@ def _normalized_tags(tags_list: list | None) -> list[str]:
     return result
 
 
-def _get_or_create_tag(session, slug: str) -> Tag:
-    tag = session.query(Tag).filter_by(slug=slug).first()
-    if tag is None:
-        tag = Tag(slug=slug, label=slug)
-        session.add(tag)
-        session.flush()
-    return tag
+def _resolve_tag_ids(session, slugs: Iterable[str]) -> dict[str, int]:
+    """slug -> tag id for all `slugs`: one IN query, plus one bulk insert and re-read for missing slugs."""
+    slugs = list(dict.fromkeys(slugs))
+    if not slugs:
+        return {}
+
+    tag_ids = dict(session.query(Tag.slug, Tag.id).filter(Tag.slug.in_(slugs)).all())
+    missing = [slug for slug in slugs if slug not in tag_ids]
+    if missing:
+        # IGNORE: a concurrent writer may have created the same slug in the meantime.
+        session.execute(
+            insert(Tag).prefix_with("IGNORE", dialect="mysql"),
+            [{"slug": slug, "label": slug} for slug in missing],
+        )
+        tag_ids.update(session.query(Tag.slug, Tag.id).filter(Tag.slug.in_(missing)).all())
+    return tag_ids
 
 
-def _sync_pool_tags(session, pool_id: int, tags_list: list | None):
-    normalized = _normalized_tags(tags_list)
-    session.query(PoolTag).filter_by(pool_id=pool_id).delete()
-    for slug in normalized:
-        tag = _get_or_create_tag(session, slug)
-        session.add(PoolTag(pool_id=pool_id, tag_id=tag.id))
+def _sync_tag_links(session, link_model, owner_column, tags_by_owner: dict, fresh: bool = False):
+    """Make `link_model` rows match `tags_by_owner` ({owner id: tags list}), writing only the difference.
+
+    `fresh` owners were just inserted and have no links yet, so their current links are not read.
+    """
+    if not tags_by_owner:
+        return
+
+    normalized = {owner_id: _normalized_tags(tags_list) for owner_id, tags_list in tags_by_owner.items()}
+    tag_ids = _resolve_tag_ids(session, (slug for slugs in normalized.values() for slug in slugs))
+    wanted = {(owner_id, tag_ids[slug]) for owner_id, slugs in normalized.items() for slug in slugs}
+
+    current = set()
+    if not fresh:
+        current = set(
+            session.query(owner_column, link_model.tag_id)
+            .filter(owner_column.in_(list(normalized)))
+            .all()
+        )
+
+    stale = current - wanted
+    if stale:
+        session.query(link_model).filter(
+            tuple_(owner_column, link_model.tag_id).in_(list(stale))
+        ).delete(synchronize_session=False)
+
+    added = wanted - current
+    if added:
+        session.execute(
+            insert(link_model),
+            [{owner_column.key: owner_id, "tag_id": tag_id} for owner_id, tag_id in sorted(added)],
+        )
+
+
+def _sync_pool_tags(session, pool_id: int, tags_list: list | None, fresh: bool = False):
+    _sync_tag_links(session, PoolTag, PoolTag.pool_id, {pool_id: tags_list}, fresh=fresh)
 
 
 def _sync_topic_tags(session, topic_id: int, tags_list: list | None):
-    normalized = _normalized_tags(tags_list)
-    session.query(TopicTag).filter_by(topic_id=topic_id).delete()
-    for slug in normalized:
-        tag = _get_or_create_tag(session, slug)
-        session.add(TopicTag(topic_id=topic_id, tag_id=tag.id))
+    _sync_tag_links(session, TopicTag, TopicTag.topic_id, {topic_id: tags_list})
 
 
-def _sync_theory_document_tags(session, document_id: int, tags_list: list | None):
-    normalized = _normalized_tags(tags_list)
-    session.query(TheoryDocumentTag).filter_by(document_id=document_id).delete()
-    for slug in normalized:
-        tag = _get_or_create_tag(session, slug)
-        session.add(TheoryDocumentTag(document_id=document_id, tag_id=tag.id))
+def _sync_theory_document_tags(session, document_id: int, tags_list: list | None, fresh: bool = False):
+    _sync_tag_links(session, TheoryDocumentTag, TheoryDocumentTag.document_id, {document_id: tags_list}, fresh=fresh)
 
 
 def _load_pool_tags_map(session, pool_ids: list[int]) -> dict[int, list[str]]:
@@ -206,10 +242,10 @@ def _normalize_work_source(
     return None, None
 
 
-def _with_for_update(query):
+def _with_for_update(query, **kwargs):
     lock_method = getattr(query, "with_for_update", None)
     if callable(lock_method):
-        return lock_method()
+        return lock_method(**kwargs)
     return query
 
 
@@ -393,11 +429,16 @@ def remove_user(user_id: int):
         return user
 
 
+def _end_work(session, work_id: int) -> Work:
+    work = session.query(Work).filter_by(id=work_id).first()
+    work.end_datetime = datetime.now()
+    work.share_token = str(uuid.uuid4())
+    return work
+
+
 def end_work(work_id: int) -> Work:
     with get_session() as session:
-        work = session.query(Work).filter_by(id=work_id).first()
-        work.end_datetime = datetime.now()
-        work.share_token = str(uuid.uuid4())
+        work = _end_work(session, work_id)
         session.commit()
         return work
 
@@ -429,17 +470,20 @@ def remove_work(work_id: int) -> Work:
         return work
 
 
+def _get_user_works(session, tid: int) -> List[Work]:
+    users_alias = aliased(User)
+    return (
+        session.query(Work)
+        .join(users_alias, Work.user_id == users_alias.id)
+        .filter(users_alias.telegram_id == tid, users_alias.is_deleted == 0)
+        .order_by(Work.start_datetime.desc())
+        .all()
+    )
+
+
 def get_user_works(tid: int) -> List[Work]:
     with get_session() as session:
-        users_alias = aliased(User)
-        works = (
-            session.query(Work)
-            .join(users_alias, Work.user_id == users_alias.id)
-            .filter(users_alias.telegram_id == tid, users_alias.is_deleted == 0)
-            .order_by(Work.start_datetime.desc())
-            .all()
-        )
-        return works
+        return _get_user_works(session, tid)
 
 
 def get_user_works_by_user_id(user_id: int) -> List[Work]:
@@ -460,14 +504,6 @@ def get_topic_by_id(topic_id: int):
         return topic
 
 
-def get_topic_by_name_and_volume(topic_name: str, volume: str) -> Topic:
-    with get_session() as session:
-        topic = session.query(Topic).filter_by(name=topic_name, volume=volume).first()
-        if topic:
-            _hydrate_topic_tags(session, [topic])
-        return topic
-
-
 def get_topics_table() -> List[Topic]:
     with get_session() as session:
         data = session.query(Topic).filter_by(is_active=1).all()
@@ -512,6 +548,47 @@ def get_pool_by_id(id: int) -> Pool:
         return result
 
 
+def _load_pool_records() -> list[PoolRecord]:
+    with get_session() as session:
+        rows = (
+            session.query(
+                Pool.id,
+                Pool.type,
+                Pool.level,
+                Pool.text,
+                Pool.question_image,
+                Pool.answer,
+                Pool.answer_image,
+                Pool.full_mark,
+                Pool.is_rotate,
+                Pool.is_selfcheck,
+                Pool.is_active,
+            )
+            .order_by(Pool.id.asc())
+            .all()
+        )
+        tag_rows = (
+            session.query(PoolTag.pool_id, Tag.slug)
+            .join(Tag, Tag.id == PoolTag.tag_id)
+            .order_by(PoolTag.pool_id.asc(), Tag.slug.asc())
+            .all()
+        )
+
+    tags_map: dict[int, list[str]] = {}
+    for pool_id, slug in tag_rows:
+        tags_map.setdefault(pool_id, []).append(slug)
+
+    return [
+        PoolRecord(*row, tags_list=tuple(tags_map.get(row.id, ())))
+        for row in rows
+    ]
+
+
+def get_pool_snapshot() -> PoolSnapshot:
+    """Cached pool records and tag index; see `db.pool_cache`."""
+    return pool_snapshot_cache.get(_load_pool_records)
+
+
 def get_all_topics(active: bool) -> List[Topic]:
     with get_session() as session:
         if active:
@@ -523,11 +600,30 @@ def get_all_topics(active: bool) -> List[Topic]:
         return data
 
 
-def get_topic_by_volume(volume: str) -> List[Topic]:
+def _load_topic_records() -> list[TopicRecord]:
     with get_session() as session:
-        data = session.query(Topic).filter_by(is_active=1, volume=volume).all()
-        _hydrate_topic_tags(session, data)
-        return data
+        topics = (
+            session.query(Topic.id, Topic.name, Topic.volume)
+            .filter(Topic.is_active == 1)
+            .order_by(Topic.id.asc())
+            .all()
+        )
+        tags_map = _load_topic_tags_map(session, [topic.id for topic in topics])
+
+    tag_index = get_pool_snapshot().tag_index(active=True)
+    records = []
+    for topic in topics:
+        tags = tuple(tags_map.get(topic.id, ()))
+        question_ids = set()
+        for tag in tags:
+            question_ids.update(tag_index.get(tag, ()))
+        records.append(TopicRecord(topic.id, topic.name, topic.volume, tags, len(question_ids)))
+    return records
+
+
+def get_topic_catalog() -> TopicCatalog:
+    """Cached active topics by volume; see `db.topic_cache`."""
+    return topic_catalog_cache.get(_load_topic_records)
 
 
 def rename_user(user_id: int, new_name: str) -> None:
@@ -551,10 +647,13 @@ def get_all_questions() -> List[Pool]:
         return data
 
 
+def _get_user(session, telegram_id: int) -> User:
+    return session.query(User).filter_by(telegram_id=telegram_id, is_deleted=0).first()
+
+
 def get_user(telegram_id: int) -> User:
     with get_session() as session:
-        user = session.query(User).filter_by(telegram_id=telegram_id, is_deleted=0).first()
-        return user
+        return _get_user(session, telegram_id)
 
 
 def get_user_by_username(username: str) -> User | None:
@@ -604,15 +703,18 @@ def link_telegram_to_user(user_id: int, telegram_id: int) -> User:
         return target_user
 
 
+def _get_work_questions(session, work_id: int) -> List[WorkQuestion]:
+    return (
+        session.query(WorkQuestion)
+        .filter_by(work_id=work_id)
+        .order_by(WorkQuestion.position.asc())
+        .all()
+    )
+
+
 def get_work_questions(work_id: int) -> List[WorkQuestion]:
     with get_session() as session:
-        questions = (
-            session.query(WorkQuestion)
-            .filter_by(work_id=work_id)
-            .order_by(WorkQuestion.position.asc())
-            .all()
-        )
-        return questions
+        return _get_work_questions(session, work_id)
 
 
 def get_question_from_pool(question_id: int) -> Pool:
@@ -678,20 +780,82 @@ def create_new_work(
         return work
 
 
+def _insert_work_questions(session, work_id: int, questions_list: list, open_first: bool = False) -> int:
+    """One multi-row INSERT; with `open_first` the first question is inserted already current.
+
+    Returns the number of inserted rows; the caller keeps `Work.total_questions` in step.
+    """
+    if not questions_list:
+        return 0
+    started_at = datetime.now()
+    rows = [
+        {
+            "work_id": work_id,
+            "question_id": question.id,
+            "position": position,
+            "status": "current" if open_first and position == 1 else "waiting",
+            "current_work_id": work_id if open_first and position == 1 else None,
+            "start_datetime": started_at if open_first and position == 1 else None,
+        }
+        for position, question in enumerate(questions_list, start=1)
+    ]
+    session.execute(insert(WorkQuestion), rows)
+    return len(rows)
+
+
 def insert_work_questions(work: Work, questions_list: List[Pool]):
     with get_session() as session:
-        for index, question in enumerate(questions_list):
-            pos = index + 1
-
-            q = WorkQuestion(
-                work_id=work.id,
-                question_id=question.id,
-                position=pos,
+        inserted = _insert_work_questions(session, work.id, questions_list)
+        if inserted:
+            session.execute(
+                update(Work)
+                .where(Work.id == work.id)
+                .values(total_questions=Work.total_questions + inserted)
             )
-            session.add(q)
         session.commit()
 
 
+def _create_work_with_questions(
+    session,
+    user_id: int,
+    work_type: str,
+    topic_id: Optional[int],
+    questions_list: list,
+    hand_work_id: Optional[str] = None,
+) -> Work:
+    normalized_topic_id, normalized_hand_work_id = _normalize_work_source(
+        work_type=work_type,
+        topic_id=topic_id,
+        hand_work_id=hand_work_id,
+    )
+    work = Work(
+        user_id=user_id,
+        work_type=work_type,
+        topic_id=normalized_topic_id,
+        hand_work_id=normalized_hand_work_id,
+        total_questions=len(questions_list),
+        answered_count=0,
+    )
+    session.add(work)
+    session.flush()
+    _insert_work_questions(session, work.id, questions_list, open_first=True)
+    return work
+
+
+def create_work_with_questions(
+    user_id: int,
+    work_type: str,
+    topic_id: Optional[int],
+    questions_list: list,
+    hand_work_id: Optional[str] = None,
+) -> Work:
+    """Create a work, insert its questions and open the first one in a single transaction."""
+    with get_session() as session:
+        work = _create_work_with_questions(session, user_id, work_type, topic_id, questions_list, hand_work_id)
+        session.commit()
+        return work
+
+
 def switch_image_flag(value: int, img_type: str, q_id: int):
     with get_session() as session:
         q = session.query(Pool).filter_by(id=q_id).first()
@@ -703,15 +867,19 @@ def switch_image_flag(value: int, img_type: str, q_id: int):
             q.answer_image = value
 
         session.commit()
+    pool_snapshot_cache.invalidate()
+
+
+def _update_question_status(session, q_id: int, status: str):
+    q = session.query(WorkQuestion).filter_by(id=q_id).first()
+    q.status = status
+    q.current_work_id = q.work_id if status == "current" else None
+    q.start_datetime = None
 
 
 def update_question_status(q_id: int, status: str):
     with get_session() as session:
-        q = session.query(WorkQuestion).filter_by(id=q_id).first()
-        q.status = status
-        q.current_work_id = q.work_id if status == "current" else None
-        q.start_datetime = None
-
+        _update_question_status(session, q_id, status)
         session.commit()
 
 
@@ -721,6 +889,8 @@ def deactivate_question(q_id: int):
         q.is_active = 0
 
         session.commit()
+    pool_snapshot_cache.invalidate()
+    topic_catalog_cache.invalidate()
 
 
 def update_question(question: Pool):
@@ -737,44 +907,62 @@ def update_question(question: Pool):
         _sync_pool_tags(session, q.id, q.tags_list)
 
         session.commit()
+    pool_snapshot_cache.invalidate()
+    topic_catalog_cache.invalidate()
+
+
+def _close_question(session, q_id: int, user_answer: str, user_mark: int, end_datetime: datetime,
+                    start_datetime: datetime = None):
+    q = session.query(WorkQuestion).filter_by(id=q_id).first()
+    if q.status != "answered":
+        session.execute(
+            update(Work)
+            .where(Work.id == q.work_id)
+            .values(answered_count=Work.answered_count + 1)
+        )
+    q.status = "answered"
+    q.current_work_id = None
+    q.user_answer = user_answer
+    q.user_mark = user_mark
+    q.start_datetime = start_datetime
+    q.end_datetime = end_datetime
 
 
 def close_question(q_id: int, user_answer: str, user_mark: int, end_datetime: datetime,
                    start_datetime: datetime = None):
     with get_session() as session:
-        q = session.query(WorkQuestion).filter_by(id=q_id).first()
-        q.status = "answered"
-        q.current_work_id = None
-        q.user_answer = user_answer
-        q.user_mark = user_mark
-        q.start_datetime = start_datetime
-        q.end_datetime = end_datetime
-
+        _close_question(session, q_id, user_answer, user_mark, end_datetime, start_datetime)
         session.commit()
 
 
+def _open_next_question(session, work_id: int) -> Optional[WorkQuestion]:
+    keeper = _heal_current_work_questions(session, work_id)
+    if keeper is not None:
+        return keeper
+
+    q = _get_first_waiting_work_question_locked(session, work_id)
+    if q is not None:
+        q.status = "current"
+        q.current_work_id = q.work_id
+        q.start_datetime = datetime.now()
+    return q
+
+
 def open_next_question(work_id: int) -> WorkQuestion:
     with get_session() as session:
-        keeper = _heal_current_work_questions(session, work_id)
-        if keeper is not None:
-            session.commit()
-            return keeper
-
-        q = _get_first_waiting_work_question_locked(session, work_id)
+        q = _open_next_question(session, work_id)
         if q is not None:
-            q.status = "current"
-            q.current_work_id = q.work_id
-            q.start_datetime = datetime.now()
             session.commit()
-            return q
-        return None
+        return q
+
+
+def _get_skipped_questions(session, work_id: int) -> List[WorkQuestion]:
+    return session.query(WorkQuestion).filter_by(work_id=work_id, status="skipped").all()
 
 
 def get_skipped_questions(work_id: int) -> List[WorkQuestion]:
     with get_session() as session:
-        data = session.query(WorkQuestion).filter_by(work_id=work_id, status="skipped").all()
-
-        return data
+        return _get_skipped_questions(session, work_id)
 
 
 def get_output_mark(input_mark: int):
@@ -785,24 +973,30 @@ def get_output_mark(input_mark: int):
         return data.output_mark
 
 
-def insert_new_hand_work(name: str, identificator: str, questions_ids_list: list) -> HandWork:
+def insert_new_hand_works(works: list[dict]) -> List[HandWork]:
+    """Create hand works from dicts with `name`, `identificator` and `questions_ids_list`.
+
+    All of them go in one transaction, so a failed variant leaves no siblings behind.
+    """
     with get_session() as session:
-        w = HandWork(
-            name=name,
-            identificator=identificator,
-        )
-        session.add(w)
+        hand_works = [HandWork(name=work["name"], identificator=work["identificator"]) for work in works]
+        session.add_all(hand_works)
         session.flush()
-        for index, question_id in enumerate(questions_ids_list, start=1):
-            session.add(
-                HandWorkQuestion(
-                    hand_work_id=w.id,
-                    question_id=question_id,
-                    position=index,
-                )
-            )
+        rows = [
+            {"hand_work_id": hand_work.id, "question_id": question_id, "position": position}
+            for hand_work, work in zip(hand_works, works)
+            for position, question_id in enumerate(work["questions_ids_list"], start=1)
+        ]
+        if rows:
+            session.execute(insert(HandWorkQuestion), rows)
         session.commit()
-        return w
+        return hand_works
+
+
+def insert_new_hand_work(name: str, identificator: str, questions_ids_list: list) -> HandWork:
+    return insert_new_hand_works(
+        [{"name": name, "identificator": identificator, "questions_ids_list": questions_ids_list}]
+    )[0]
 
 
 def get_hand_work(identificator: str) -> HandWork:
@@ -885,19 +1079,22 @@ def insert_pool_data(data: List[Pool]):
         for el in data:
             session.add(el)
         session.flush()
-        for el in data:
-            _sync_pool_tags(session, el.id, el.tags_list)
+        _sync_tag_links(session, PoolTag, PoolTag.pool_id, {el.id: el.tags_list for el in data}, fresh=True)
         session.commit()
-        return data
+    pool_snapshot_cache.invalidate()
+    topic_catalog_cache.invalidate()
+    return data
 
 
 def insert_question_into_pool(q: Pool) -> Pool:
     with get_session() as session:
         session.add(q)
         session.flush()
-        _sync_pool_tags(session, q.id, q.tags_list)
+        _sync_pool_tags(session, q.id, q.tags_list, fresh=True)
         session.commit()
-        return q
+    pool_snapshot_cache.invalidate()
+    topic_catalog_cache.invalidate()
+    return q
 
 
 def create_topic(name: str, volume: str) -> Topic:
@@ -905,7 +1102,8 @@ def create_topic(name: str, volume: str) -> Topic:
         t = Topic(name=name, volume=volume, tags_list=[], is_active=1)
         session.add(t)
         session.commit()
-        return t
+    topic_catalog_cache.invalidate()
+    return t
 
 
 def deactivate_topic(topic_id: int):
@@ -914,6 +1112,7 @@ def deactivate_topic(topic_id: int):
         if t:
             t.is_active = 0
             session.commit()
+    topic_catalog_cache.invalidate()
 
 
 def update_topic(topic_id: int, tags_list: list):
@@ -923,7 +1122,8 @@ def update_topic(topic_id: int, tags_list: list):
             t.tags_list = tags_list
             _sync_topic_tags(session, t.id, t.tags_list)
             session.commit()
-            return t
+    topic_catalog_cache.invalidate()
+    return t
 
 
 def get_theory_document_by_id(document_id: int, active_only: bool = False) -> TheoryDocument | None:
@@ -992,7 +1192,7 @@ def create_theory_document(
         )
         session.add(document)
         session.flush()
-        _sync_theory_document_tags(session, document.id, document.tags_list)
+        _sync_theory_document_tags(session, document.id, document.tags_list, fresh=True)
         session.commit()
         _hydrate_theory_document_tags(session, [document])
         return document
@@ -1047,37 +1247,39 @@ def deactivate_theory_document(document_id: int) -> bool:
 
 # ── TMA-specific helpers ──────────────────────────────────────────────────────
 
-def get_work_by_id(work_id: int) -> Work:
-    with get_session() as session:
-        return session.query(Work).filter_by(id=work_id).first()
+def _get_work_by_id(session, work_id: int) -> Work:
+    return session.query(Work).filter_by(id=work_id).first()
 
 
-def get_current_work_question(work_id: int):
-    """Return the WorkQuestion with status='current', joined with Pool data."""
+def get_work_by_id(work_id: int) -> Work:
     with get_session() as session:
-        result = (
-            session.query(
-                WorkQuestion.id,
-                WorkQuestion.position,
-                WorkQuestion.question_id,
-                Pool.text,
-                Pool.question_image,
-                Pool.is_selfcheck,
-                Pool.full_mark,
-                Pool.answer,
-                Pool.answer_image,
-            )
-            .join(Pool, WorkQuestion.question_id == Pool.id)
-            .filter(WorkQuestion.work_id == work_id, WorkQuestion.status == "current")
-            .order_by(WorkQuestion.position.asc())
-            .first()
+        return _get_work_by_id(session, work_id)
+
+
+def _get_current_work_question(session, work_id: int):
+    return (
+        session.query(
+            WorkQuestion.id,
+            WorkQuestion.position,
+            WorkQuestion.question_id,
+            Pool.text,
+            Pool.question_image,
+            Pool.is_selfcheck,
+            Pool.full_mark,
+            Pool.answer,
+            Pool.answer_image,
         )
-        return result
+        .join(Pool, WorkQuestion.question_id == Pool.id)
+        .filter(WorkQuestion.work_id == work_id, WorkQuestion.status == "current")
+        .order_by(WorkQuestion.position.asc())
+        .first()
+    )
 
 
-def get_work_question_count(work_id: int) -> int:
+def get_current_work_question(work_id: int):
+    """Return the WorkQuestion with status='current', joined with Pool data."""
     with get_session() as session:
-        return session.query(WorkQuestion).filter_by(work_id=work_id).count()
+        return _get_current_work_question(session, work_id)
 
 
 def requeue_skipped_questions(work_id: int):
@@ -1091,6 +1293,120 @@ def requeue_skipped_questions(work_id: int):
         session.commit()
 
 
+def _get_work_questions_with_pool_locked(session, work_id: int) -> list:
+    query = (
+        session.query(
+            WorkQuestion.id,
+            WorkQuestion.position,
+            WorkQuestion.question_id,
+            WorkQuestion.status,
+            Pool.text,
+            Pool.question_image,
+            Pool.is_selfcheck,
+            Pool.full_mark,
+            Pool.answer,
+            Pool.answer_image,
+            Pool.type,
+            Pool.is_rotate,
+        )
+        .join(Pool, WorkQuestion.question_id == Pool.id)
+        .filter(WorkQuestion.work_id == work_id)
+        .order_by(WorkQuestion.position.asc())
+    )
+    return _with_for_update(query, of=WorkQuestion).all()
+
+
+def _answer_and_advance(session, work_id: int, work_question_id: int, grade=None) -> Optional[dict]:
+    """Close a work question and open the next one: one SELECT ... FOR UPDATE, one UPDATE of
+    the questions and one of the `works` counters.
+
+    `grade(row)` gets the question joined with Pool and returns `(user_answer, user_mark)`;
+    without `grade` the question is skipped. Returns None if the question is not in the work,
+    otherwise `{"question", "total", "answered", "skipped", "share_token"}` where `question`
+    is the newly opened row (with the columns of `_get_current_work_question`) or None. A work
+    with nothing left is ended and `share_token` is its new result link token.
+    """
+    rows = _get_work_questions_with_pool_locked(session, work_id)
+    closing = next((row for row in rows if row.id == work_question_id), None)
+    if closing is None:
+        return None
+
+    now = datetime.now()
+    if grade is None:
+        closing_values = {"status": "skipped", "current_work_id": None, "start_datetime": None}
+    else:
+        user_answer, user_mark = grade(closing)
+        closing_values = {
+            "status": "answered",
+            "current_work_id": None,
+            "user_answer": user_answer,
+            "user_mark": user_mark,
+            "start_datetime": None,
+            "end_datetime": now,
+        }
+
+    others = [row for row in rows if row.id != work_question_id]
+    skipped = sum(row.status == "skipped" for row in others) + (grade is None)
+    answered = sum(row.status == "answered" for row in others) + (grade is not None)
+    close_statement = update(WorkQuestion).where(WorkQuestion.id == work_question_id)
+
+    if any(row.status == "current" for row in others):
+        # Another question is already open; let the healing path pick the one to keep.
+        session.execute(close_statement.values(**closing_values))
+        _open_next_question(session, work_id)
+        next_row = _get_current_work_question(session, work_id)
+    else:
+        next_row = next((row for row in others if row.status == "waiting"), None)
+        if next_row is None:
+            session.execute(close_statement.values(**closing_values))
+        else:
+            opening_values = {"status": "current", "current_work_id": work_id, "start_datetime": now}
+            if next_row.id > work_question_id:
+                # InnoDB checks the unique current_work_id per row, walking the primary key
+                # upwards, so one statement is safe only when the closing row comes first.
+                session.execute(
+                    update(WorkQuestion)
+                    .where(WorkQuestion.id.in_([work_question_id, next_row.id]))
+                    .values(**{
+                        name: case(
+                            (WorkQuestion.id == work_question_id, closing_values.get(name, getattr(WorkQuestion, name))),
+                            else_=opening_values.get(name, getattr(WorkQuestion, name)),
+                        )
+                        for name in {**closing_values, **opening_values}
+                    })
+                )
+            else:
+                session.execute(close_statement.values(**closing_values))
+                session.execute(
+                    update(WorkQuestion).where(WorkQuestion.id == next_row.id).values(**opening_values)
+                )
+
+    work_values = {}
+    if answered != sum(row.status == "answered" for row in rows):
+        # Set from the locked rows rather than incremented, so a drifted counter heals here.
+        work_values["answered_count"] = answered
+    share_token = None
+    if next_row is None and not skipped:
+        share_token = str(uuid.uuid4())
+        work_values.update(end_datetime=now, share_token=share_token)
+    if work_values:
+        session.execute(update(Work).where(Work.id == work_id).values(**work_values))
+
+    return {
+        "question": next_row,
+        "total": len(rows),
+        "answered": answered,
+        "skipped": skipped,
+        "share_token": share_token,
+    }
+
+
+def answer_and_advance(work_id: int, work_question_id: int, grade=None) -> Optional[dict]:
+    """Answer (or, without `grade`, skip) a question and open the next one in one transaction."""
+    with get_session() as session:
+        return _answer_and_advance(session, work_id, work_question_id, grade)
+
+
 def get_completed_user_works(tid: int) -> List[Work]:
     """Return only finished works (end_datetime is not None), newest first."""
     with get_session() as session:
@@ -1125,6 +1441,7 @@ def insert_topics_data(data):
             el.is_active = 0
         session.commit()
 
+        tags_by_topic = {}
         for volume, topics_data in data.items():
             for topic_name, tags_list in topics_data.items():
                 if len(list(filter(lambda item: item['volume'] == volume and item['topic_name'].lower() == topic_name.lower(), old_topic_names))) == 1:
@@ -1133,7 +1450,7 @@ def insert_topics_data(data):
                     topic.volume = volume
                     topic.is_active = 1
                     session.flush()
-                    _sync_topic_tags(session, topic.id, topic.tags_list)
+                    tags_by_topic[topic.id] = topic.tags_list
                 else:
                     t = Topic(
                         name=topic_name,
@@ -1143,9 +1460,11 @@ def insert_topics_data(data):
                     )
                     session.add(t)
                     session.flush()
-                    _sync_topic_tags(session, t.id, t.tags_list)
+                    tags_by_topic[t.id] = t.tags_list
 
+        _sync_tag_links(session, TopicTag, TopicTag.topic_id, tags_by_topic)
         session.commit()
+    topic_catalog_cache.invalidate()
 
 
 def get_topic_tags(topic_id: int) -> list[str]:
@@ -1173,3 +1492,172 @@ def get_active_pool_tag_counts() -> dict[str, int]:
         for slug, _ in rows:
             counts[slug] = counts.get(slug, 0) + 1
         return counts
+
+
+# ── Statistics helpers ────────────────────────────────────────────────────────
+
+def _finished_works_overview_query(session):
+    return (
+        session.query(
+            Work.id,
+            Work.user_id,
+            Work.work_type,
+            Work.share_token,
+            Work.start_datetime,
+            Work.end_datetime,
+            Topic.name.label("topic_name"),
+            HandWork.name.label("hand_work_name"),
+        )
+        .outerjoin(Topic, Topic.id == Work.topic_id)
+        .outerjoin(HandWork, HandWork.identificator == Work.hand_work_id)
+        .filter(Work.end_datetime.isnot(None))
+    )
+
+
+def get_finished_works_overview(user_id: int) -> list:
+    """Finished works of a user with their topic / hand work names, newest first."""
+    with get_session() as session:
+        return (
+            _finished_works_overview_query(session)
+            .filter(Work.user_id == user_id)
+            .order_by(Work.start_datetime.desc())
+            .all()
+        )
+
+
+def get_finished_work_overview(work_id: int):
+    with get_session() as session:
+        return _finished_works_overview_query(session).filter(Work.id == work_id).first()
+
+
+def get_works_question_marks(work_ids: list[int]) -> list:
+    """Per-question marks of the given works joined with `pool.full_mark` in one query."""
+    if not work_ids:
+        return []
+    with get_session() as session:
+        return (
+            session.query(
+                WorkQuestion.id,
+                WorkQuestion.work_id,
+                WorkQuestion.question_id,
+                WorkQuestion.position,
+                WorkQuestion.status,
+                func.coalesce(WorkQuestion.user_mark, 0).label("user_mark"),
+                Pool.full_mark,
+            )
+            .outerjoin(Pool, Pool.id == WorkQuestion.question_id)
+            .filter(WorkQuestion.work_id.in_(work_ids))
+            .order_by(WorkQuestion.work_id.asc(), WorkQuestion.position.asc())
+            .all()
+        )
+
+
+def get_output_marks_map() -> dict[int, int]:
+    with get_session() as session:
+        rows = session.query(Converting.input_mark, Converting.output_mark).all()
+        return {input_mark: output_mark for input_mark, output_mark in rows}
+
+
+# ── Telegram file_id cache ────────────────────────────────────────────────────
+
+def _get_telegram_file_id(session, kind: str, entity_id: int, content_hash: str) -> str | None:
+    row = (
+        session.query(TelegramFileCache.file_id)
+        .filter_by(kind=kind, entity_id=entity_id, content_hash=content_hash)
+        .first()
+    )
+    return row.file_id if row else None
+
+
+def _save_telegram_file_id(session, kind: str, entity_id: int, content_hash: str, file_id: str):
+    # IGNORE: two sends of the same file may race; either file_id is valid.
+    session.execute(
+        insert(TelegramFileCache).prefix_with("IGNORE", dialect="mysql"),
+        [{
+            "kind": kind,
+            "entity_id": entity_id,
+            "content_hash": content_hash,
+            "file_id": file_id,
+            "created_at": datetime.now(),
+        }],
+    )
+
+
+def _delete_telegram_file_ids(session, kind: str, entity_id: int, content_hash: str | None = None):
+    query = session.query(TelegramFileCache).filter_by(kind=kind, entity_id=entity_id)
+    if content_hash is not None:
+        query = query.filter_by(content_hash=content_hash)
+    query.delete(synchronize_session=False)
+
+
+def delete_telegram_file_ids(kind: str, entity_id: int):
+    """Forget every uploaded copy of an entity's file, e.g. after its image is replaced or removed."""
+    with get_session() as session:
+        _delete_telegram_file_ids(session, kind, entity_id)
+
+
+# ── Broadcasts ────────────────────────────────────────────────────────────────
+
+def _create_broadcast(session, html_text: str, admin_chat_id: int, progress_message_id: Optional[int] = None) -> Broadcast:
+    """Create a broadcast with a pending delivery row for every active user with a Telegram id."""
+    broadcast = Broadcast(
+        html_text=html_text,
+        status="running",
+        admin_chat_id=admin_chat_id,
+        progress_message_id=progress_message_id,
+    )
+    session.add(broadcast)
+    session.flush()
+
+    telegram_ids = (
+        session.query(User.telegram_id)
+        .filter(User.is_deleted == 0, User.telegram_id.isnot(None))
+        .distinct()
+        .all()
+    )
+    if telegram_ids:
+        session.execute(
+            insert(BroadcastDelivery),
+            [
+                {"broadcast_id": broadcast.id, "telegram_id": telegram_id, "status": "pending", "attempts": 0}
+                for (telegram_id,) in telegram_ids
+            ],
+        )
+    return broadcast
+
+
+def _get_pending_broadcast_deliveries(session, broadcast_id: int) -> list:
+    return (
+        session.query(BroadcastDelivery.id, BroadcastDelivery.telegram_id)
+        .filter_by(broadcast_id=broadcast_id, status="pending")
+        .order_by(BroadcastDelivery.id.asc())
+        .all()
+    )
+
+
+def _get_broadcast_status_counts(session, broadcast_id: int) -> dict[str, int]:
+    rows = (
+        session.query(BroadcastDelivery.status, func.count(BroadcastDelivery.id))
+        .filter_by(broadcast_id=broadcast_id)
+        .group_by(BroadcastDelivery.status)
+        .all()
+    )
+    return {status: count for status, count in rows}
+
+
+def _save_broadcast_deliveries(session, deliveries: list[dict]):
+    """Bulk UPDATE by primary key; every dict carries `id` and the columns to set."""
+    if deliveries:
+        session.execute(update(BroadcastDelivery), deliveries)
+
+
+def _finish_broadcast(session, broadcast_id: int, status: str = "done"):
+    session.execute(
+        update(Broadcast)
+        .where(Broadcast.id == broadcast_id)
+        .values(status=status, finished_at=datetime.now())
+    )
+
+
+def _get_running_broadcasts(session) -> List[Broadcast]:
+    return session.query(Broadcast).filter_by(status="running").order_by(Broadcast.id.asc()).all()
@@ -1,116 +1,92 @@
-import time
-import logging
-import uuid
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker, scoped_session
-from db.models import Base, Converting, HandWork, Pool, Topic, User, Work, WorkQuestion
-from dotenv import load_dotenv
+"""
+Engines and session factories.
+
+Nothing connects at import time: the engines are created on first use, and
+schema migrations run only from `python -m db.migrations` (see `db/migrations.py`).
+"""
+
+import threading
 from os import getenv
 
+from dotenv import load_dotenv
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker, scoped_session
+
+from db.engine_config import engine_kwargs, get_app_role, load_pool_settings, pool_statistics
+
 load_dotenv()
-DATABASE_URL = f"mysql+mysqlconnector://{getenv('DB_USER')}:{getenv('DB_PASSWORD')}@{getenv('DB_HOST')}:{getenv('DB_PORT')}/{getenv('DB_NAME')}"
-
-engine = create_engine(
-    DATABASE_URL,
-    echo=False,
-    pool_pre_ping=True
-)
-Session = scoped_session(sessionmaker(bind=engine))
-MIGRATION_LOCK_NAME = "chemistry_bot_schema_migrations"
-LEGACY_TABLES = [
-    Converting.__table__,
-    Pool.__table__,
-    Topic.__table__,
-    User.__table__,
-    Work.__table__,
-    WorkQuestion.__table__,
-    HandWork.__table__,
-]
-
-for _attempt in range(10):
-    try:
-        Base.metadata.create_all(engine, tables=LEGACY_TABLES)
-        break
-    except Exception as _e:
-        logging.warning("DB not ready (attempt %d/10): %s", _attempt + 1, _e)
-        if _attempt == 9:
-            raise
-        time.sleep(3 * (_attempt + 1))
-
-
-def _add_column_if_not_exists(conn, table: str, column_def: str, column_name: str):
-    """Try to add a column, ignoring 'Duplicate column' errors (MySQL 1060)."""
-    try:
-        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column_def}"))
-        conn.commit()
-        logging.info("Migration: added %s column to %s table", column_name, table)
-    except Exception as e:
-        if '1060' in str(e):
-            logging.debug("Migration skipped: %s.%s already exists", table, column_name)
-        else:
-            raise
-
-
-def _run_legacy_migrations():
-    with engine.connect() as conn:
-        _add_column_if_not_exists(
-            conn, 'works',
-            "share_token VARCHAR(36) NULL UNIQUE COMMENT 'UUID токен для публичной ссылки на результат'",
-            'share_token'
-        )
-        _add_column_if_not_exists(
-            conn, 'users',
-            'is_deleted INT NOT NULL DEFAULT 0',
-            'is_deleted'
-        )
-        _add_column_if_not_exists(
-            conn, 'hand_works',
-            'is_deleted INT NOT NULL DEFAULT 0',
-            'is_deleted'
-        )
-
-        # Fill share_token for old works that don't have one
-        rows = conn.execute(text(
-            "SELECT id FROM works WHERE share_token IS NULL"
-        )).fetchall()
-        for row in rows:
-            conn.execute(text(
-                "UPDATE works SET share_token = :token WHERE id = :wid"
-            ), {"token": str(uuid.uuid4()), "wid": row[0]})
-        if rows:
-            conn.commit()
-            logging.info("Migration: generated share_token for %d old works", len(rows))
-
-
-def _run_alembic_migrations():
-    try:
-        from alembic import command
-        from alembic.config import Config
-    except Exception as exc:
-        logging.warning("Alembic is unavailable, schema migrations skipped: %s", exc)
-        return
-
-    cfg = Config("alembic.ini")
-    command.upgrade(cfg, "head")
-
-
-def run_migrations():
-    with engine.connect() as conn:
-        acquired = conn.execute(
-            text("SELECT GET_LOCK(:lock_name, :timeout_seconds)"),
-            {"lock_name": MIGRATION_LOCK_NAME, "timeout_seconds": 120},
-        ).scalar()
-        if acquired != 1:
-            raise RuntimeError("Could not acquire DB migration lock")
-
-        try:
-            _run_legacy_migrations()
-            _run_alembic_migrations()
-        finally:
-            conn.execute(
-                text("SELECT RELEASE_LOCK(:lock_name)"),
-                {"lock_name": MIGRATION_LOCK_NAME},
-            )
-
-
-run_migrations()
+_DATABASE_LOCATION = f"{getenv('DB_USER')}:{getenv('DB_PASSWORD')}@{getenv('DB_HOST')}:{getenv('DB_PORT')}/{getenv('DB_NAME')}"
+DATABASE_URL = f"mysql+mysqlconnector://{_DATABASE_LOCATION}"
+ASYNC_DATABASE_URL = f"mysql+aiomysql://{_DATABASE_LOCATION}"
+
+APP_ROLE = get_app_role()
+POOL_SETTINGS = load_pool_settings(APP_ROLE)
+
+_lock = threading.Lock()
+_engine: Engine | None = None
+_async_engine: AsyncEngine | None = None
+_session_factory: sessionmaker | None = None
+_async_session_factory: async_sessionmaker | None = None
+
+
+def get_engine() -> Engine:
+    global _engine, _session_factory
+    if _engine is None:
+        with _lock:
+            if _engine is None:
+                _engine = create_engine(
+                    DATABASE_URL,
+                    echo=False,
+                    **engine_kwargs(POOL_SETTINGS)
+                )
+                _session_factory = sessionmaker(bind=_engine)
+    return _engine
+
+
+def get_async_engine() -> AsyncEngine:
+    """Used by `db.async_crud` on the bot / Mini App hot paths so DB round trips do not block the event loop."""
+    global _async_engine, _async_session_factory
+    if _async_engine is None:
+        with _lock:
+            if _async_engine is None:
+                _async_engine = create_async_engine(
+                    ASYNC_DATABASE_URL,
+                    echo=False,
+                    **engine_kwargs(POOL_SETTINGS, is_async=True)
+                )
+                _async_session_factory = async_sessionmaker(bind=_async_engine, expire_on_commit=False)
+    return _async_engine
+
+
+def _new_session():
+    get_engine()
+    return _session_factory()
+
+
+Session = scoped_session(_new_session)
+
+
+def AsyncSession():
+    get_async_engine()
+    return _async_session_factory()
+
+
+def __getattr__(name: str):
+    # Backwards compatibility for `from db.database import engine`.
+    if name == "engine":
+        return get_engine()
+    if name == "async_engine":
+        return get_async_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def get_pool_statistics() -> dict:
+    """Stats of the pools this process has created; an engine not used yet reports None."""
+    sync_engine, async_engine = _engine, _async_engine
+    return {
+        "role": APP_ROLE,
+        "sync": pool_statistics(sync_engine.pool, POOL_SETTINGS) if sync_engine is not None else None,
+        "async": pool_statistics(async_engine.sync_engine.pool, POOL_SETTINGS) if async_engine is not None else None,
+    }
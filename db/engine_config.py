@@ -0,0 +1,140 @@
+"""
+Engine and connection pool settings.
+
+Each process picks its pool sizing by `APP_ROLE` (`bot` or `api`): a setting is
+read from `<ROLE>_DB_POOL_SIZE` first, then from the shared `DB_POOL_SIZE`, then
+from the defaults below. The pools record how long checkouts wait for a free
+connection; `pool_statistics()` exposes those numbers to the admin API.
+"""
+
+import threading
+import time
+from dataclasses import asdict, dataclass
+from os import getenv
+
+import greenlet
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+_TRUE_VALUES = {"1", "true", "yes", "on"}
+
+
+@dataclass(frozen=True)
+class PoolSettings:
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_recycle: int = 1800
+    pool_timeout: float = 30.0
+    pool_pre_ping: bool = True
+
+
+def _role_env(role: str, name: str) -> str | None:
+    return getenv(f"{role.upper()}_DB_{name}") or getenv(f"DB_{name}")
+
+
+def get_app_role() -> str:
+    return (getenv("APP_ROLE") or "api").strip().lower()
+
+
+def load_pool_settings(role: str | None = None) -> PoolSettings:
+    role = role or get_app_role()
+    defaults = PoolSettings()
+
+    def read(name: str, cast, default):
+        raw = _role_env(role, name)
+        return default if raw in (None, "") else cast(raw)
+
+    return PoolSettings(
+        pool_size=read("POOL_SIZE", int, defaults.pool_size),
+        max_overflow=read("MAX_OVERFLOW", int, defaults.max_overflow),
+        pool_recycle=read("POOL_RECYCLE", int, defaults.pool_recycle),
+        pool_timeout=read("POOL_TIMEOUT", float, defaults.pool_timeout),
+        pool_pre_ping=read("POOL_PRE_PING", lambda v: v.strip().lower() in _TRUE_VALUES, defaults.pool_pre_ping),
+    )
+
+
+class PoolWaitStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, waited: float, timed_out: bool):
+        with self._lock:
+            self.checkouts += 1
+            self.timeouts += int(timed_out)
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": round(self.total_wait / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "max_wait_ms": round(self.max_wait * 1000, 3),
+            }
+
+
+class _WaitTimingMixin:
+    """Times `_do_get`, i.e. how long a checkout waited for a pooled or new connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = PoolWaitStats()
+        self._timed_checkouts: set = set()
+
+    def _do_get(self):
+        # QueuePool._do_get retries itself on overflow races; time only the outer call.
+        # Async checkouts all run on the event-loop thread, each in its own greenlet,
+        # so the guard is per greenlet (a thread's main greenlet for sync pools).
+        checkout = greenlet.getcurrent()
+        if checkout in self._timed_checkouts:
+            return super()._do_get()
+
+        self._timed_checkouts.add(checkout)
+        started = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            self._timed_checkouts.discard(checkout)
+            self.wait_stats.record(time.perf_counter() - started, timed_out)
+
+
+class InstrumentedQueuePool(_WaitTimingMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncAdaptedQueuePool(_WaitTimingMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_kwargs(settings: PoolSettings, is_async: bool = False) -> dict:
+    return {
+        "poolclass": InstrumentedAsyncAdaptedQueuePool if is_async else InstrumentedQueuePool,
+        "pool_size": settings.pool_size,
+        "max_overflow": settings.max_overflow,
+        "pool_recycle": settings.pool_recycle,
+        "pool_timeout": settings.pool_timeout,
+        "pool_pre_ping": settings.pool_pre_ping,
+    }
+
+
+def pool_statistics(pool, settings: PoolSettings) -> dict:
+    stats = {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+        "settings": asdict(settings),
+    }
+    wait_stats = getattr(pool, "wait_stats", None)
+    if wait_stats is not None:
+        stats.update(wait_stats.as_dict())
+    return stats
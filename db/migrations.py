@@ -0,0 +1,148 @@
+"""
+Schema migrations: legacy `create_all` / `ALTER TABLE` steps, then Alembic.
+
+Run once per deploy, before the bot and the API start:
+    python -m db.migrations
+"""
+
+import logging
+import time
+
+from sqlalchemy import text
+
+from db.database import get_engine
+from db.models import Base, Converting, HandWork, Pool, Topic, User, Work, WorkQuestion
+
+MIGRATION_LOCK_NAME = "chemistry_bot_schema_migrations"
+SHARE_TOKEN_BACKFILL_CHUNK = 5000
+# Random (v4-style) UUID evaluated per row; MySQL's UUID() is time-based and guessable,
+# which matters because share tokens are the only secret in a public result link.
+_RANDOM_UUID_SQL = (
+    "LOWER(CONCAT("
+    "HEX(RANDOM_BYTES(4)), '-', HEX(RANDOM_BYTES(2)), '-4', SUBSTR(HEX(RANDOM_BYTES(2)), 2), '-', "
+    "HEX(RANDOM_BYTES(2)), '-', HEX(RANDOM_BYTES(6))))"
+)
+LEGACY_TABLES = [
+    Converting.__table__,
+    Pool.__table__,
+    Topic.__table__,
+    User.__table__,
+    Work.__table__,
+    WorkQuestion.__table__,
+    HandWork.__table__,
+]
+
+
+def _create_legacy_tables(engine):
+    for attempt in range(10):
+        try:
+            Base.metadata.create_all(engine, tables=LEGACY_TABLES)
+            return
+        except Exception as e:
+            logging.warning("DB not ready (attempt %d/10): %s", attempt + 1, e)
+            if attempt == 9:
+                raise
+            time.sleep(3 * (attempt + 1))
+
+
+def _add_column_if_not_exists(conn, table: str, column_def: str, column_name: str):
+    """Try to add a column, ignoring 'Duplicate column' errors (MySQL 1060)."""
+    try:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column_def}"))
+        conn.commit()
+        logging.info("Migration: added %s column to %s table", column_name, table)
+    except Exception as e:
+        if '1060' in str(e):
+            logging.debug("Migration skipped: %s.%s already exists", table, column_name)
+        else:
+            raise
+
+
+def _run_legacy_migrations(engine):
+    with engine.connect() as conn:
+        _add_column_if_not_exists(
+            conn, 'works',
+            "share_token VARCHAR(36) NULL UNIQUE COMMENT 'UUID токен для публичной ссылки на результат'",
+            'share_token'
+        )
+        _add_column_if_not_exists(
+            conn, 'users',
+            'is_deleted INT NOT NULL DEFAULT 0',
+            'is_deleted'
+        )
+        _add_column_if_not_exists(
+            conn, 'hand_works',
+            'is_deleted INT NOT NULL DEFAULT 0',
+            'is_deleted'
+        )
+
+        _backfill_share_tokens(conn)
+
+
+def _backfill_share_tokens(conn, chunk_size: int = SHARE_TOKEN_BACKFILL_CHUNK) -> int:
+    """Fill share_token for old works that don't have one, `chunk_size` rows per UPDATE."""
+    if conn.execute(text("SELECT 1 FROM works WHERE share_token IS NULL LIMIT 1")).first() is None:
+        return 0
+
+    total = 0
+    while True:
+        updated = conn.execute(
+            text(
+                f"UPDATE works SET share_token = {_RANDOM_UUID_SQL} "
+                "WHERE share_token IS NULL ORDER BY id LIMIT :chunk_size"
+            ),
+            {"chunk_size": chunk_size},
+        ).rowcount
+        conn.commit()
+        total += updated
+        logging.info("Migration: generated share_token for %d old works so far", total)
+        if updated < chunk_size:
+            break
+
+    logging.info("Migration: generated share_token for %d old works", total)
+    return total
+
+
+def _run_alembic_migrations():
+    try:
+        from alembic import command
+        from alembic.config import Config
+    except Exception as exc:
+        logging.warning("Alembic is unavailable, schema migrations skipped: %s", exc)
+        return
+
+    cfg = Config("alembic.ini")
+    command.upgrade(cfg, "head")
+
+
+def run_migrations():
+    engine = get_engine()
+    _create_legacy_tables(engine)
+
+    with engine.connect() as conn:
+        acquired = conn.execute(
+            text("SELECT GET_LOCK(:lock_name, :timeout_seconds)"),
+            {"lock_name": MIGRATION_LOCK_NAME, "timeout_seconds": 120},
+        ).scalar()
+        if acquired != 1:
+            raise RuntimeError("Could not acquire DB migration lock")
+
+        try:
+            _run_legacy_migrations(engine)
+            _run_alembic_migrations()
+        finally:
+            conn.execute(
+                text("SELECT RELEASE_LOCK(:lock_name)"),
+                {"lock_name": MIGRATION_LOCK_NAME},
+            )
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    started = time.perf_counter()
+    run_migrations()
+    logging.info("Schema migrations finished in %.1fs", time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    main()
@@ -93,6 +93,8 @@ class Work(Base):
     start_datetime = Column(DateTime, nullable=False, comment='Начало выполнения задания', default=datetime.now)
     end_datetime = Column(DateTime, nullable=True, comment='Окончание выполнения задания')
     share_token = Column(VARCHAR(36), nullable=True, unique=True, comment='UUID токен для публичной ссылки на результат')
+    total_questions = Column(Integer, nullable=False, default=0, comment='Количество вопросов в задании')
+    answered_count = Column(Integer, nullable=False, default=0, comment='Количество отвеченных вопросов')
 
 
 # Таблица 'work_questions_list'
@@ -215,3 +217,51 @@ class StudentAccessGrant(Base):
         Index('ix_student_access_grants_user_purpose', 'user_id', 'purpose'),
         Index('ix_student_access_grants_expires_at', 'expires_at'),
     )
+
+
+class TelegramFileCache(Base):
+    __tablename__ = 'telegram_file_cache'
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    kind = Column(String(50), nullable=False)
+    entity_id = Column(BigInteger, nullable=False)
+    content_hash = Column(String(64), nullable=False)
+    file_id = Column(String(255), nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.now)
+
+    __table_args__ = (
+        Index('uq_telegram_file_cache_entity', 'kind', 'entity_id', 'content_hash', unique=True),
+    )
+
+
+class Broadcast(Base):
+    __tablename__ = 'broadcasts'
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    html_text = Column(Text, nullable=False)
+    status = Column(String(20), nullable=False, default='running')
+    admin_chat_id = Column(BigInteger, nullable=False)
+    progress_message_id = Column(BigInteger, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.now)
+    finished_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index('ix_broadcasts_status', 'status'),
+    )
+
+
+class BroadcastDelivery(Base):
+    __tablename__ = 'broadcast_deliveries'
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    broadcast_id = Column(BigInteger, ForeignKey('broadcasts.id', ondelete='CASCADE'), nullable=False)
+    telegram_id = Column(BigInteger, nullable=False)
+    status = Column(String(20), nullable=False, default='pending')
+    attempts = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+    sent_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index('uq_broadcast_deliveries_recipient', 'broadcast_id', 'telegram_id', unique=True),
+        Index('ix_broadcast_deliveries_broadcast_status', 'broadcast_id', 'status'),
+    )
@@ -0,0 +1,123 @@
+"""
+In-process, read-mostly snapshot of the question pool.
+
+The snapshot keeps one compact record per `pool` row plus a
+`tag -> sorted array of pool ids` inverted index, so work generation and the
+admin pool list do not have to scan `pool` and `pool_tags` on every request.
+
+Writers in `db.crud` call `pool_snapshot_cache.invalidate()` after they commit.
+Invalidation is local to the process, so snapshots also expire after
+`POOL_CACHE_TTL_SECONDS` to pick up edits made by the other services.
+
+`PoolSnapshotCache` builds any `snapshot_type(version, records)`; `db.topic_cache`
+uses it for the topic catalog.
+"""
+
+import threading
+import time
+from array import array
+from dataclasses import dataclass
+from os import getenv
+from typing import Any, Callable, Iterable
+
+
+@dataclass(frozen=True, slots=True)
+class PoolRecord:
+    id: int
+    type: str
+    level: int
+    text: str | None
+    question_image: int
+    answer: str | None
+    answer_image: int
+    full_mark: int
+    is_rotate: int
+    is_selfcheck: int
+    is_active: int
+    tags_list: tuple[str, ...]
+
+
+def _build_tag_index(records: Iterable[PoolRecord]) -> dict[str, array]:
+    ids_by_tag: dict[str, list[int]] = {}
+    for record in records:
+        for tag in record.tags_list:
+            ids_by_tag.setdefault(tag, []).append(record.id)
+    return {tag: array("q", sorted(ids)) for tag, ids in ids_by_tag.items()}
+
+
+class PoolSnapshot:
+    def __init__(self, version: int, records: Iterable[PoolRecord]):
+        self.version = version
+        self.built_at = time.monotonic()
+        self._all = sorted(records, key=lambda record: record.id)
+        self._active = [record for record in self._all if record.is_active]
+        self._by_id = {record.id: record for record in self._all}
+        self._tag_index = {
+            True: _build_tag_index(self._active),
+            False: _build_tag_index(self._all),
+        }
+
+    def __len__(self) -> int:
+        return len(self._all)
+
+    def get(self, question_id: int) -> PoolRecord | None:
+        return self._by_id.get(question_id)
+
+    def get_many(self, question_ids: Iterable[int]) -> list[PoolRecord]:
+        """Records in the requested order; unknown ids are skipped."""
+        return [self._by_id[q_id] for q_id in question_ids if q_id in self._by_id]
+
+    def questions(self, active: bool = True) -> list[PoolRecord]:
+        return list(self._active if active else self._all)
+
+    def tag_index(self, active: bool = True) -> dict[str, array]:
+        return self._tag_index[active]
+
+    def ids_by_tag(self, tag: str, active: bool = True) -> array:
+        return self._tag_index[active].get(tag, array("q"))
+
+
+class PoolSnapshotCache:
+    def __init__(self, ttl_seconds: float, snapshot_type: Callable[[int, Any], Any] = PoolSnapshot):
+        self.ttl_seconds = ttl_seconds
+        self.snapshot_type = snapshot_type
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._version = 0
+        self._snapshot = None
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def _is_fresh(self, snapshot) -> bool:
+        if snapshot is None or snapshot.version != self._version:
+            return False
+        return self.ttl_seconds <= 0 or time.monotonic() - snapshot.built_at < self.ttl_seconds
+
+    def invalidate(self):
+        with self._lock:
+            self._version += 1
+            self._snapshot = None
+
+    def get(self, loader: Callable[[], Iterable]) -> Any:
+        snapshot = self._snapshot
+        if self._is_fresh(snapshot):
+            return snapshot
+
+        with self._build_lock:
+            snapshot = self._snapshot
+            if self._is_fresh(snapshot):
+                return snapshot
+
+            version = self._version
+            snapshot = self.snapshot_type(version, loader())
+            with self._lock:
+                # A writer may have invalidated the cache while we were loading;
+                # the caller still gets this snapshot, but it is not kept.
+                if self._version == version:
+                    self._snapshot = snapshot
+            return snapshot
+
+
+pool_snapshot_cache = PoolSnapshotCache(ttl_seconds=float(getenv("POOL_CACHE_TTL_SECONDS", "60")))
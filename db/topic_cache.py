@@ -0,0 +1,86 @@
+"""
+In-process catalog of the active topics.
+
+The bot keyboards, the TMA topic list and the admin export need topic names,
+volumes and tags over and over, in the same order each time. The catalog keeps them
+grouped by volume and sorted once, with the number of active pool questions each
+topic can draw from, and lets callers memoize things rendered from it (keyboards).
+
+Topic writers in `db.crud` call `topic_catalog_cache.invalidate()` after they
+commit, and so do the pool writers that change which questions are active or how
+they are tagged. Like the pool snapshot, the catalog also expires after
+`POOL_CACHE_TTL_SECONDS`.
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from os import getenv
+from typing import Any, Callable, Hashable, Iterable
+
+from db.pool_cache import PoolSnapshotCache
+
+
+@dataclass(frozen=True, slots=True)
+class TopicRecord:
+    id: int
+    name: str
+    volume: str
+    tags_list: tuple[str, ...]
+    questions_count: int
+
+
+def _topic_sort_key(topic: TopicRecord) -> tuple:
+    """Topics are named "<number> <title>"; order by the number, unnumbered ones last."""
+    number = topic.name.split(" ")[0]
+    return (0, int(number), topic.name) if number.isdigit() else (1, 0, topic.name)
+
+
+class TopicCatalog:
+    def __init__(self, version: int, records: Iterable[TopicRecord]):
+        self.version = version
+        self.built_at = time.monotonic()
+        self._all = sorted(records, key=lambda record: record.id)
+        self._by_id = {record.id: record for record in self._all}
+        self._by_volume: dict[str, list[TopicRecord]] = {}
+        for record in self._all:
+            self._by_volume.setdefault(record.volume, []).append(record)
+        for topics in self._by_volume.values():
+            topics.sort(key=_topic_sort_key)
+        self._memo: dict[Hashable, Any] = {}
+        self._memo_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._all)
+
+    def volumes(self) -> list[str]:
+        """Volumes in the order their first topic was created."""
+        return list(self._by_volume)
+
+    def topics(self, volume: str | None = None) -> list[TopicRecord]:
+        """Topics of a volume sorted by number; without a volume, all of them by id."""
+        if volume is None:
+            return list(self._all)
+        return list(self._by_volume.get(volume, ()))
+
+    def get(self, topic_id: int) -> TopicRecord | None:
+        return self._by_id.get(topic_id)
+
+    def find(self, name: str, volume: str) -> TopicRecord | None:
+        return next((topic for topic in self._by_volume.get(volume, ()) if topic.name == name), None)
+
+    def memo(self, key: Hashable, build: Callable[[], Any]) -> Any:
+        """`build()` once per catalog; the result is dropped with the catalog."""
+        value = self._memo.get(key)
+        if value is None:
+            with self._memo_lock:
+                value = self._memo.get(key)
+                if value is None:
+                    value = self._memo[key] = build()
+        return value
+
+
+topic_catalog_cache = PoolSnapshotCache(
+    ttl_seconds=float(getenv("POOL_CACHE_TTL_SECONDS", "60")),
+    snapshot_type=TopicCatalog,
+)
@@ -30,6 +30,8 @@ export type WorkDetailQuestion = {
   full_mark: number;
   question_image: boolean;
   answer_image: boolean;
+  question_image_version: string | null;
+  answer_image_version: string | null;
 };
 
 export type WorkDetail = {
@@ -208,7 +210,7 @@ export function QuestionCard({ question: q, answerLabel = "Ответ учени
 
         {q.question_image && (
           <img
-            src={api.imageUrl.question(q.question_id)}
+            src={api.imageUrl.question(q.question_id, q.question_image_version)}
             alt="вопрос"
             className="w-full max-h-64 object-contain rounded-lg border"
             onError={(e) => (e.currentTarget.style.display = "none")}
@@ -226,7 +228,7 @@ export function QuestionCard({ question: q, answerLabel = "Ответ учени
           </div>
           {q.answer_image && (
             <img
-              src={api.imageUrl.answer(q.question_id)}
+              src={api.imageUrl.answer(q.question_id, q.answer_image_version)}
               alt="ответ"
               className="w-full max-h-48 object-contain rounded-lg border mt-2"
               onError={(e) => (e.currentTarget.style.display = "none")}
@@ -42,6 +42,37 @@ async function request<T>(
   return res.json();
 }
 
+export type ImportRowReport = {
+  row: number;
+  status: string;
+  errors: string[];
+  question_id?: number;
+};
+
+export type ImportJob = {
+  id: string;
+  kind: string;
+  status: "queued" | "running" | "done" | "failed";
+  stage: string;
+  processed: number;
+  total: number | null;
+  message: string;
+  result: unknown;
+  errors: ImportRowReport[];
+};
+
+const JOB_POLL_INTERVAL_MS = 1000;
+
+async function waitForJob<T>(jobId: string, onProgress?: (job: ImportJob) => void): Promise<T> {
+  for (;;) {
+    const job = await request<ImportJob>(`/admin/jobs/${jobId}`);
+    onProgress?.(job);
+    if (job.status === "done") return job.result as T;
+    if (job.status === "failed") throw new Error(job.message || "Import failed");
+    await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+  }
+}
+
 export const api = {
   // Auth
   login: (password: string) =>
@@ -222,6 +253,7 @@ export const api = {
     mode: string;
     hard_tags?: string[];
     questions_count?: number;
+    variants?: number;
   }) =>
     request<{
       id: number;
@@ -229,6 +261,7 @@ export const api = {
       identificator: string;
       link: string | null;
       web_link: string | null;
+      variants: Array<{ id: number; name: string; identificator: string; link: string | null; web_link: string | null }>;
     }>("/admin/hand-works", { method: "POST", body: JSON.stringify(payload) }),
 
   getHandWorks: () =>
@@ -272,6 +305,8 @@ export const api = {
       is_selfcheck: number;
       question_image: boolean;
       answer_image: boolean;
+      question_image_version: string | null;
+      answer_image_version: string | null;
       type: string;
     }>(`/admin/pool/${id}`),
 
@@ -343,18 +378,20 @@ export const api = {
       return r.blob();
     }),
 
-  importTopicsExcel: (file: File) => {
+  importTopicsExcel: (file: File, onProgress?: (job: ImportJob) => void) => {
     const form = new FormData();
     form.append("file", file);
     return fetch(`${BASE}/admin/topics/import`, {
       method: "POST",
       headers: authHeaders(),
       body: form,
-    }).then(async (r) => {
-      const data = await r.json();
-      if (!r.ok) throw new Error(data.detail || "Import failed");
-      return data as { ok: boolean; message: string };
-    });
+    })
+      .then(async (r) => {
+        const data = await r.json();
+        if (!r.ok) throw new Error(data.detail || "Import failed");
+        return waitForJob<{ message: string; imported_count: number }>(data.job_id, onProgress);
+      })
+      .then((result) => ({ ok: true, ...result }));
   },
 
   createTopic: (name: string, volume: string) =>
@@ -379,20 +416,28 @@ export const api = {
       return r.blob();
     }),
 
-  importPoolExcel: (file: File) => {
+  importPoolExcel: (file: File, onProgress?: (job: ImportJob) => void) => {
     const form = new FormData();
     form.append("file", file);
     return fetch(`${BASE}/admin/pool/import`, {
       method: "POST",
       headers: authHeaders(),
       body: form,
-    }).then(async (r) => {
-      const data = await r.json();
-      if (!r.ok) throw new Error(data.detail || "Import failed");
-      return data as { ok: boolean; imported_count: number; message: string };
-    });
+    })
+      .then(async (r) => {
+        const data = await r.json();
+        if (!r.ok) throw new Error(data.detail || "Import failed");
+        return waitForJob<{
+          imported_count: number;
+          message: string;
+          rows: ImportRowReport[];
+        }>(data.job_id, onProgress);
+      })
+      .then((result) => ({ ok: true, ...result }));
   },
 
+  getJob: (jobId: string) => request<ImportJob>(`/admin/jobs/${jobId}`),
+
   // Backup settings
   getBackupSettings: () =>
     request<{ time: string; chat_id: string; yadisk_token: string }>("/admin/backup-settings"),
@@ -470,12 +515,16 @@ export const api = {
         full_mark: number;
         question_image: boolean;
         answer_image: boolean;
+        question_image_version: string | null;
+        answer_image_version: string | null;
       }>;
     }>(`/student/work-stats?token=${token}`),
 
   imageUrl: {
-    question: (id: number) => `${BASE}/images/question/${id}`,
-    answer: (id: number) => `${BASE}/images/answer/${id}`,
+    question: (id: number, version?: string | null) =>
+      `${BASE}/images/question/${id}${version ? `?v=${version}` : ""}`,
+    answer: (id: number, version?: string | null) =>
+      `${BASE}/images/answer/${id}${version ? `?v=${version}` : ""}`,
     user: (telegram_id: number) => `${BASE}/images/user/${telegram_id}`,
   },
 };
@@ -33,6 +33,8 @@ export type QuestionFull = {
   is_selfcheck: number;
   question_image: boolean;
   answer_image: boolean;
+  question_image_version: string | null;
+  answer_image_version: string | null;
   type: string;
 };
 
@@ -50,6 +50,7 @@ export function PoolPage() {
   const [addDialogOpen, setAddDialogOpen] = useState(false);
   const [importFile, setImportFile] = useState<File | null>(null);
   const [importing, setImporting] = useState(false);
+  const [importProgress, setImportProgress] = useState("");
   const [downloadingTemplate, setDownloadingTemplate] = useState(false);
 
   const [mobileStep, setMobileStep] = useState<0 | 1>(0);
@@ -180,7 +181,11 @@ export function PoolPage() {
       {hasImage ? (
         <div className="relative rounded-lg overflow-hidden border">
           <img
-            src={type === "question" ? api.imageUrl.question(selected!.id) : api.imageUrl.answer(selected!.id)}
+            src={
+              type === "question"
+                ? api.imageUrl.question(selected!.id, selected!.question_image_version)
+                : api.imageUrl.answer(selected!.id, selected!.answer_image_version)
+            }
             alt={type}
             className="w-full max-h-48 object-contain"
           />
@@ -493,7 +498,10 @@ export function PoolPage() {
                   if (!importFile) return;
                   setImporting(true);
                   try {
-                    const result = await api.importPoolExcel(importFile);
+                    const result = await api.importPoolExcel(importFile, (job) => {
+                      if (job.stage === "validate") setImportProgress(`проверено строк: ${job.processed}`);
+                      else if (job.stage === "import") setImportProgress(`${job.processed} из ${job.total ?? "?"}`);
+                    });
                     toast.success(result.message);
                     setImportFile(null);
                     const updatedPool = await api.getPool();
@@ -503,11 +511,12 @@ export function PoolPage() {
                     toast.error(e instanceof Error ? e.message : "Ошибка импорта");
                   } finally {
                     setImporting(false);
+                    setImportProgress("");
                   }
                 }}
               >
                 <FileSpreadsheet className="h-4 w-4" />
-                {importing ? "Импорт..." : "Импортировать Excel"}
+                {importing ? `Импорт... ${importProgress}` : "Импортировать Excel"}
               </Button>
             </div>
           </div>
@@ -198,7 +198,7 @@ function WorkDetailPanel({ detail, loading }: { detail: WorkDetail | null; loadi
 
             {q.question_image && (
               <img
-                src={api.imageUrl.question(q.question_id)}
+                src={api.imageUrl.question(q.question_id, q.question_image_version)}
                 alt="вопрос"
                 className="w-full max-h-64 object-contain rounded-lg border"
                 onError={(e) => (e.currentTarget.style.display = "none")}
@@ -216,7 +216,7 @@ function WorkDetailPanel({ detail, loading }: { detail: WorkDetail | null; loadi
               </div>
               {q.answer_image && (
                 <img
-                  src={api.imageUrl.answer(q.question_id)}
+                  src={api.imageUrl.answer(q.question_id, q.answer_image_version)}
                   alt="ответ"
                   className="w-full max-h-48 object-contain rounded-lg border mt-2"
                   onError={(e) => (e.currentTarget.style.display = "none")}
@@ -254,7 +254,7 @@ function WorkDetailPanel({ detail, loading }: { detail: WorkDetail | null; loadi
 
                 {questionData.question_image && (
                   <img
-                    src={api.imageUrl.question(questionData.id)}
+                    src={api.imageUrl.question(questionData.id, questionData.question_image_version)}
                     alt="вопрос"
                     className="w-full max-h-48 object-contain rounded-lg border"
                     onError={(e) => (e.currentTarget.style.display = "none")}
@@ -272,7 +272,7 @@ function WorkDetailPanel({ detail, loading }: { detail: WorkDetail | null; loadi
 
                 {questionData.answer_image && (
                   <img
-                    src={api.imageUrl.answer(questionData.id)}
+                    src={api.imageUrl.answer(questionData.id, questionData.answer_image_version)}
                     alt="ответ"
                     className="w-full max-h-48 object-contain rounded-lg border"
                     onError={(e) => (e.currentTarget.style.display = "none")}
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+import db.async_crud as async_crud
+
+
+class AsyncSessionStub:
+    def __init__(self, sync_session):
+        self.sync_session = sync_session
+        self.commits = 0
+        self.rollbacks = 0
+        self.closed = False
+
+    async def run_sync(self, fn, *args):
+        return fn(self.sync_session, *args)
+
+    async def commit(self):
+        self.commits += 1
+
+    async def rollback(self):
+        self.rollbacks += 1
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def sessions(monkeypatch: pytest.MonkeyPatch) -> list[AsyncSessionStub]:
+    sessions: list[AsyncSessionStub] = []
+    monkeypatch.setattr(async_crud, "AsyncSession", lambda: sessions[0])
+    return sessions
+
+
+def test_open_next_question_runs_shared_helper_and_commits(sessions, monkeypatch: pytest.MonkeyPatch):
+    sync_session = object()
+    sessions.append(AsyncSessionStub(sync_session))
+    calls = []
+
+    def fake_open_next_question(session, work_id):
+        calls.append((session, work_id))
+        return "next"
+
+    monkeypatch.setattr(async_crud, "_open_next_question", fake_open_next_question)
+
+    result = asyncio.run(async_crud.open_next_question(77))
+
+    assert result == "next"
+    assert calls == [(sync_session, 77)]
+    assert sessions[0].commits == 1
+    assert sessions[0].closed
+
+
+def test_close_question_rolls_back_on_error(sessions, monkeypatch: pytest.MonkeyPatch):
+    sessions.append(AsyncSessionStub(object()))
+
+    def failing_close_question(session, *args):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(async_crud, "_close_question", failing_close_question)
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(async_crud.close_question(1, "42", 1, end_datetime=None))
+
+    assert sessions[0].commits == 0
+    assert sessions[0].rollbacks == 1
+    assert sessions[0].closed
+
+
+def test_end_work_runs_shared_helper_and_commits(sessions, monkeypatch: pytest.MonkeyPatch):
+    sync_session = object()
+    sessions.append(AsyncSessionStub(sync_session))
+    calls = []
+
+    def fake_end_work(session, work_id):
+        calls.append((session, work_id))
+        return "ended"
+
+    monkeypatch.setattr(async_crud, "_end_work", fake_end_work)
+
+    assert asyncio.run(async_crud.end_work(5)) == "ended"
+    assert calls == [(sync_session, 5)]
+    assert sessions[0].commits == 1
+    assert sessions[0].closed
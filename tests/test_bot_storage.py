@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+
+from aiogram.fsm.state import State, StatesGroup
+from aiogram.fsm.storage.base import StorageKey
+
+from tgbot.storage import SQLiteStorage
+
+
+class Answering(StatesGroup):
+    waiting_for_answer = State()
+
+
+KEY = StorageKey(bot_id=1, chat_id=42, user_id=42)
+
+
+def test_state_and_data_survive_a_restart(tmp_path):
+    path = str(tmp_path / "bot" / "fsm.sqlite3")
+
+    async def write():
+        storage = SQLiteStorage(path)
+        await storage.set_state(KEY, Answering.waiting_for_answer)
+        await storage.set_data(KEY, {"work_id": 7, "question_id": 70, "pool_question_id": 501, "position": 3})
+        await storage.update_data(KEY, {"position": 4})
+        await storage.close()
+
+    async def read():
+        storage = SQLiteStorage(path)
+        try:
+            return await storage.get_state(KEY), await storage.get_data(KEY)
+        finally:
+            await storage.close()
+
+    asyncio.run(write())
+    state, data = asyncio.run(read())
+
+    assert state == Answering.waiting_for_answer.state
+    assert data == {"work_id": 7, "question_id": 70, "pool_question_id": 501, "position": 4}
+
+
+def test_cleared_conversation_leaves_no_row(tmp_path):
+    path = str(tmp_path / "fsm.sqlite3")
+    other_key = StorageKey(bot_id=1, chat_id=43, user_id=43)
+
+    async def scenario():
+        storage = SQLiteStorage(path)
+        await storage.set_state(KEY, Answering.waiting_for_answer)
+        await storage.set_data(KEY, {"work_id": 7})
+        await storage.set_data(other_key, {"selected_volume": "Органика"})
+        await storage.set_state(KEY, None)
+        await storage.set_data(KEY, {})
+        result = await storage.get_state(KEY), await storage.get_data(KEY)
+        await storage.close()
+        return result
+
+    assert asyncio.run(scenario()) == (None, {})
+    with sqlite3.connect(path) as connection:
+        rows = connection.execute("SELECT data FROM fsm").fetchall()
+    assert rows == [('{"selected_volume":"Органика"}',)]
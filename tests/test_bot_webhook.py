@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import asyncio
+import json
+
+import pytest
+from aiogram.types import Update
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from tgbot.webhook import UpdateProcessor, create_webhook_router
+
+
+def _message_update(update_id: int, chat_id: int, text: str = "ответ") -> Update:
+    return Update.model_validate({
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 0,
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": chat_id, "is_bot": False, "first_name": "Student"},
+            "text": text,
+        },
+    })
+
+
+class FakeDispatcher:
+    def __init__(self, delays: dict[int, float] | None = None):
+        self.delays = delays or {}
+        self.started = []
+        self.finished = []
+        self.running = 0
+        self.max_running = 0
+
+    async def feed_update(self, bot, update: Update):
+        self.started.append(update.update_id)
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(self.delays.get(update.update_id, 0.01))
+        finally:
+            self.running -= 1
+        self.finished.append(update.update_id)
+
+
+def test_updates_of_one_chat_run_in_order_and_chats_run_concurrently():
+    dispatcher = FakeDispatcher(delays={1: 0.05})
+
+    async def scenario():
+        processor = UpdateProcessor(dispatcher, bot=None, max_concurrency=4)
+        for update in (_message_update(1, 10), _message_update(2, 20), _message_update(3, 10)):
+            assert processor.submit(update)
+        assert await processor.drain(timeout=5) == 0
+
+    asyncio.run(scenario())
+
+    # Chat 20 is not held up by the slow update of chat 10, which keeps its own order.
+    assert dispatcher.finished.index(2) < dispatcher.finished.index(1)
+    assert dispatcher.finished.index(1) < dispatcher.finished.index(3)
+
+
+def test_concurrency_and_queue_are_bounded():
+    dispatcher = FakeDispatcher()
+
+    async def scenario():
+        processor = UpdateProcessor(dispatcher, bot=None, max_concurrency=2, max_pending=5)
+        accepted = [processor.submit(_message_update(i, 100 + i)) for i in range(1, 8)]
+        await processor.drain(timeout=5)
+        return accepted, processor.pending
+
+    accepted, pending = asyncio.run(scenario())
+
+    assert accepted == [True] * 5 + [False] * 2
+    assert dispatcher.max_running == 2
+    assert sorted(dispatcher.finished) == [1, 2, 3, 4, 5]
+    assert pending == 0
+
+
+def test_drain_refuses_new_updates_and_cancels_after_timeout():
+    dispatcher = FakeDispatcher(delays={1: 10})
+
+    async def scenario():
+        processor = UpdateProcessor(dispatcher, bot=None)
+        processor.submit(_message_update(1, 10))
+        processor.submit(_message_update(2, 10))
+        await asyncio.sleep(0)
+        dropped = await processor.drain(timeout=0.05)
+        return dropped, processor.submit(_message_update(3, 30)), processor.pending
+
+    dropped, accepted_after_drain, pending = asyncio.run(scenario())
+
+    assert dropped == 2
+    assert accepted_after_drain is False
+    assert pending == 0
+    assert dispatcher.finished == []
+
+
+def _request(body: dict, secret: str | None = None) -> Request:
+    payload = json.dumps(body).encode()
+    headers = [(b"content-type", b"application/json")]
+    if secret is not None:
+        headers.append((b"x-telegram-bot-api-secret-token", secret.encode()))
+
+    async def receive():
+        return {"type": "http.request", "body": payload, "more_body": False}
+
+    return Request({"type": "http", "method": "POST", "path": "/hook", "headers": headers}, receive)
+
+
+def _endpoint(processor: UpdateProcessor, secret: str | None):
+    router = create_webhook_router(processor, "/hook", secret)
+    return router.routes[0].endpoint
+
+
+def test_webhook_checks_secret_and_queues_update():
+    dispatcher = FakeDispatcher()
+    body = _message_update(1, 10).model_dump(mode="json", exclude_none=True, by_alias=True)
+
+    async def scenario():
+        processor = UpdateProcessor(dispatcher, bot=None)
+        endpoint = _endpoint(processor, "s3cret")
+        with pytest.raises(HTTPException) as rejected:
+            await endpoint(_request(body, secret="wrong"))
+        response = await endpoint(_request(body, secret="s3cret"))
+        await processor.drain(timeout=5)
+        return rejected.value.status_code, response
+
+    status, response = asyncio.run(scenario())
+
+    assert status == 401
+    assert response == {"ok": True}
+    assert dispatcher.finished == [1]
+
+
+def test_webhook_answers_503_when_processor_is_full():
+    body = _message_update(1, 10).model_dump(mode="json", exclude_none=True, by_alias=True)
+
+    async def scenario():
+        processor = UpdateProcessor(FakeDispatcher(), bot=None, max_pending=0)
+        with pytest.raises(HTTPException) as busy:
+            await _endpoint(processor, None)(_request(body))
+        return busy.value.status_code
+
+    assert asyncio.run(scenario()) == 503
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError, TelegramNetworkError, TelegramRetryAfter
+from aiogram.methods import SendMessage
+
+import utils.broadcast as module
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float):
+        self.slept.append(seconds)
+        self.now += seconds
+        await asyncio.sleep(0)
+
+
+class FakeBot:
+    def __init__(self, failures: dict | None = None):
+        self.failures = {chat_id: list(errors) for chat_id, errors in (failures or {}).items()}
+        self.sent = []
+
+    async def send_message(self, chat_id: int, text: str):
+        errors = self.failures.get(chat_id)
+        if errors:
+            raise errors.pop(0)
+        self.sent.append(chat_id)
+        return SimpleNamespace(chat=SimpleNamespace(id=chat_id))
+
+
+def _method(chat_id: int) -> SendMessage:
+    return SendMessage(chat_id=chat_id, text="hi")
+
+
+@pytest.fixture
+def broadcast(monkeypatch: pytest.MonkeyPatch):
+    store = {"pending": [], "saved": [], "finished": []}
+
+    async def get_pending(broadcast_id):
+        return list(store["pending"])
+
+    async def save(deliveries):
+        store["saved"].extend(deliveries)
+
+    async def finish(broadcast_id, status="done"):
+        store["finished"].append((broadcast_id, status))
+
+    monkeypatch.setattr(module.async_crud, "get_pending_broadcast_deliveries", get_pending)
+    monkeypatch.setattr(module.async_crud, "save_broadcast_deliveries", save)
+    monkeypatch.setattr(module.async_crud, "finish_broadcast", finish)
+    return module, store
+
+
+def test_token_bucket_spends_burst_then_waits_for_refill(broadcast):
+    module, _ = broadcast
+    clock = FakeClock()
+    bucket = module.TokenBucket(rate=2, capacity=2, clock=clock, sleep=clock.sleep)
+
+    async def take(count: int):
+        for _ in range(count):
+            await bucket.acquire()
+
+    asyncio.run(take(5))
+
+    # Two saved-up tokens, then one every half second.
+    assert clock.now == pytest.approx(1.5)
+
+
+def test_token_bucket_pause_blocks_until_retry_after(broadcast):
+    module, _ = broadcast
+    clock = FakeClock()
+    bucket = module.TokenBucket(rate=10, capacity=10, clock=clock, sleep=clock.sleep)
+
+    async def scenario():
+        await bucket.acquire()
+        bucket.pause(3)
+        await bucket.acquire()
+
+    asyncio.run(scenario())
+
+    assert clock.now == pytest.approx(3.1)
+
+
+def test_run_broadcast_settles_every_recipient(broadcast):
+    module, store = broadcast
+    store["pending"] = [SimpleNamespace(id=index, telegram_id=100 + index) for index in range(1, 6)]
+    bot = FakeBot({
+        102: [TelegramRetryAfter(method=_method(102), message="Too Many Requests", retry_after=4)],
+        103: [TelegramForbiddenError(method=_method(103), message="bot was blocked by the user")],
+        104: [TelegramBadRequest(method=_method(104), message="chat not found")],
+    })
+    clock = FakeClock()
+    limiter = module.BroadcastLimiter(rate=30, clock=clock, sleep=clock.sleep)
+    progress = []
+
+    async def on_progress(processed, total):
+        progress.append((processed, total))
+
+    counts = asyncio.run(module.run_broadcast(
+        bot, 7, "hi", limiter=limiter, concurrency=3, on_progress=on_progress,
+    ))
+
+    assert sorted(bot.sent) == [101, 102, 105]
+    assert counts == {module.SENT: 3, module.BLOCKED: 1, module.FAILED: 1}
+    saved = {row["id"]: row for row in store["saved"]}
+    assert saved[2]["status"] == module.SENT and saved[2]["attempts"] == 2
+    assert saved[3]["status"] == module.BLOCKED
+    assert saved[4]["status"] == module.FAILED and saved[4]["error"] == "chat not found"
+    assert clock.now >= 4
+    assert store["finished"] == [(7, "done")]
+    assert progress[-1] == (5, 5)
+
+
+def test_run_broadcast_gives_up_after_max_attempts(broadcast):
+    module, store = broadcast
+    store["pending"] = [SimpleNamespace(id=1, telegram_id=101)]
+    bot = FakeBot({101: [
+        TelegramRetryAfter(method=_method(101), message="Too Many Requests", retry_after=1) for _ in range(3)
+    ]})
+    clock = FakeClock()
+    limiter = module.BroadcastLimiter(rate=30, clock=clock, sleep=clock.sleep)
+
+    counts = asyncio.run(module.run_broadcast(bot, 7, "hi", limiter=limiter, max_attempts=2))
+
+    assert counts == {module.FAILED: 1}
+    assert bot.sent == []
+    assert store["saved"][0]["attempts"] == 2
+
+
+def test_run_broadcast_keeps_results_when_interrupted(broadcast):
+    module, store = broadcast
+    store["pending"] = [SimpleNamespace(id=index, telegram_id=100 + index) for index in range(1, 4)]
+    sent = []
+
+    class StoppingBot(FakeBot):
+        async def send_message(self, chat_id: int, text: str):
+            if sent:
+                raise RuntimeError("bot is shutting down")
+            sent.append(chat_id)
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(module.run_broadcast(StoppingBot(), 7, "hi", concurrency=1))
+
+    # The delivered recipient is recorded; the rest stay pending for the resume.
+    assert [row["id"] for row in store["saved"]] == [1]
+    assert store["finished"] == []
+
+
+def test_network_retry_waits_on_the_limiter_clock(broadcast):
+    module, store = broadcast
+    store["pending"] = [SimpleNamespace(id=1, telegram_id=101)]
+    bot = FakeBot({101: [TelegramNetworkError(method=_method(101), message="connection reset")]})
+    clock = FakeClock()
+    limiter = module.BroadcastLimiter(rate=30, clock=clock, sleep=clock.sleep)
+
+    counts = asyncio.run(module.run_broadcast(bot, 7, "hi", limiter=limiter))
+
+    assert counts == {module.SENT: 1}
+    assert store["saved"][0]["attempts"] == 2
+    assert module._NETWORK_RETRY_DELAY_SECONDS in clock.slept
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import subprocess
+import sys
+
+
+def test_importing_database_does_not_connect():
+    # A fresh interpreter so no other test's fake `db.database` is involved.
+    code = (
+        "import db.crud, db.database as database;"
+        "assert database._engine is None and database._async_engine is None;"
+        "assert database.get_engine() is database.engine;"
+        "print('ok')"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        timeout=60,
+        env={"DB_HOST": "127.0.0.1", "DB_PORT": "1", "PATH": ""},
+    )
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "ok"
+
+
+def test_pool_statistics_do_not_create_engines():
+    code = (
+        "import db.database as database;"
+        "stats = database.get_pool_statistics();"
+        "assert stats['sync'] is None and stats['async'] is None, stats;"
+        "assert database._engine is None and database._async_engine is None;"
+        "database.get_engine();"
+        "stats = database.get_pool_statistics();"
+        "assert stats['sync']['checkouts'] == 0 and stats['async'] is None, stats;"
+        "print('ok')"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        timeout=60,
+        env={"DB_HOST": "127.0.0.1", "DB_PORT": "1", "PATH": ""},
+    )
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "ok"
@@ -31,6 +31,7 @@ class QueryStub:
         self.first_result = first_result
         self.all_result = all_result if all_result is not None else []
         self.count_result = count_result
+        self.deleted = False
 
     def filter_by(self, **kwargs):
         return self
@@ -44,6 +45,9 @@ class QueryStub:
     def order_by(self, *args, **kwargs):
         return self
 
+    def distinct(self, *args, **kwargs):
+        return self
+
     def with_for_update(self, *args, **kwargs):
         return self
 
@@ -56,14 +60,18 @@ class QueryStub:
     def count(self):
         return self.count_result
 
+    def delete(self, *args, **kwargs):
+        self.deleted = True
+
 
 class SessionStub:
     def __init__(self, *queries: QueryStub):
         self.queries = list(queries)
         self.added = []
+        self.executed = []
         self.commits = 0
 
-    def query(self, model):
+    def query(self, *entities):
         if not self.queries:
             raise AssertionError("Unexpected query() call")
         return self.queries.pop(0)
@@ -71,6 +79,17 @@ class SessionStub:
     def add(self, obj):
         self.added.append(obj)
 
+    def add_all(self, objs):
+        self.added.extend(objs)
+
+    def flush(self):
+        for index, obj in enumerate(self.added, start=1):
+            if getattr(obj, "id", None) is None:
+                obj.id = 1000 + index
+
+    def execute(self, statement, params=None):
+        self.executed.append((statement, params))
+
     def commit(self):
         self.commits += 1
 
@@ -228,6 +247,122 @@ def test_close_question_clears_current_marker(
     assert session.commits == 1
 
 
+def test_close_question_counts_each_answer_once(crud_module, monkeypatch: pytest.MonkeyPatch):
+    crud = crud_module
+    question = WorkQuestionStub(id=11, position=2, status="current", current_work_id=77)
+    session = SessionStub(QueryStub(first_result=question), QueryStub(first_result=question))
+    _patch_session(monkeypatch, crud, session)
+
+    crud.close_question(q_id=11, user_answer="42", user_mark=1, end_datetime=SimpleNamespace())
+    crud.close_question(q_id=11, user_answer="43", user_mark=0, end_datetime=SimpleNamespace())
+
+    assert _updated_tables(session) == ["works"]
+    assert question.user_answer == "43"
+
+
+def _joined_row(id: int, position: int, status: str, **pool_fields):
+    return SimpleNamespace(
+        id=id,
+        position=position,
+        question_id=100 + id,
+        status=status,
+        text=f"q{id}",
+        question_image=0,
+        is_selfcheck=0,
+        full_mark=1,
+        answer="42",
+        answer_image=0,
+        type="topic",
+        is_rotate=0,
+        **pool_fields,
+    )
+
+
+def _updated_tables(session: SessionStub) -> list[str]:
+    return [statement.table.name for statement, _ in session.executed]
+
+
+def test_answer_and_advance_closes_and_opens_in_one_update(
+    crud_module, monkeypatch: pytest.MonkeyPatch
+):
+    crud = crud_module
+    rows = [_joined_row(1, 1, "answered"), _joined_row(2, 2, "current"), _joined_row(3, 3, "waiting")]
+    session = SessionStub(QueryStub(all_result=rows))
+    _patch_session(monkeypatch, crud, session)
+    graded = []
+
+    result = crud.answer_and_advance(77, 2, lambda row: graded.append(row) or ("42", 1))
+
+    assert graded == [rows[1]]
+    assert result == {"question": rows[2], "total": 3, "answered": 2, "skipped": 0, "share_token": None}
+    assert _updated_tables(session) == ["work_questions_list", "works"]
+    params = session.executed[0][0].compile().params
+    assert "answered" in params.values() and "current" in params.values()
+    assert session.executed[1][0].compile().params["answered_count"] == 2
+
+
+def test_answer_and_advance_closes_before_opening_an_earlier_row(
+    crud_module, monkeypatch: pytest.MonkeyPatch
+):
+    crud = crud_module
+    # After a requeue the next waiting question can have a lower id than the closing one.
+    rows = [_joined_row(3, 1, "waiting"), _joined_row(4, 2, "current")]
+    session = SessionStub(QueryStub(all_result=rows))
+    _patch_session(monkeypatch, crud, session)
+
+    result = crud.answer_and_advance(77, 4, lambda row: ("42", 1))
+
+    assert result["question"] is rows[0]
+    assert _updated_tables(session) == ["work_questions_list", "work_questions_list", "works"]
+    closing, opening = (statement.compile().params for statement, _ in session.executed[:2])
+    assert closing["status"] == "answered"
+    assert opening["status"] == "current"
+
+
+def test_answer_and_advance_ends_work_after_last_question(
+    crud_module, monkeypatch: pytest.MonkeyPatch
+):
+    crud = crud_module
+    rows = [_joined_row(1, 1, "answered"), _joined_row(2, 2, "current")]
+    session = SessionStub(QueryStub(all_result=rows))
+    _patch_session(monkeypatch, crud, session)
+
+    result = crud.answer_and_advance(77, 2, lambda row: ("42", 1))
+
+    assert result["question"] is None
+    assert (result["total"], result["answered"], result["skipped"]) == (2, 2, 0)
+    assert _updated_tables(session) == ["work_questions_list", "works"]
+    work_params = session.executed[1][0].compile().params
+    assert work_params["answered_count"] == 2
+    assert work_params["share_token"] == result["share_token"]
+
+
+def test_answer_and_advance_skip_reports_skipped_questions(
+    crud_module, monkeypatch: pytest.MonkeyPatch
+):
+    crud = crud_module
+    rows = [_joined_row(1, 1, "skipped"), _joined_row(2, 2, "current")]
+    session = SessionStub(QueryStub(all_result=rows))
+    _patch_session(monkeypatch, crud, session)
+
+    result = crud.answer_and_advance(77, 2)
+
+    assert result == {"question": None, "total": 2, "answered": 0, "skipped": 2, "share_token": None}
+    assert _updated_tables(session) == ["work_questions_list"]
+    assert session.executed[0][0].compile().params["status"] == "skipped"
+
+
+def test_answer_and_advance_ignores_foreign_question(
+    crud_module, monkeypatch: pytest.MonkeyPatch
+):
+    crud = crud_module
+    session = SessionStub(QueryStub(all_result=[_joined_row(1, 1, "current")]))
+    _patch_session(monkeypatch, crud, session)
+
+    assert crud.answer_and_advance(77, 99, lambda row: ("42", 1)) is None
+    assert session.executed == []
+
+
 def test_get_questions_list_by_id_preserves_requested_order(
     crud_module, monkeypatch: pytest.MonkeyPatch
 ):
@@ -265,3 +400,145 @@ def test_get_hand_work_question_count_uses_normalized_table(
     result = crud.get_hand_work_question_count("normalized")
 
     assert result == 3
+
+
+def test_create_work_with_questions_bulk_inserts_and_opens_first(
+    crud_module, monkeypatch: pytest.MonkeyPatch
+):
+    crud = crud_module
+    session = SessionStub()
+    _patch_session(monkeypatch, crud, session)
+
+    work = crud.create_work_with_questions(
+        user_id=5,
+        work_type="ege",
+        topic_id=None,
+        questions_list=[SimpleNamespace(id=30), SimpleNamespace(id=10), SimpleNamespace(id=20)],
+    )
+
+    assert session.added == [work]
+    assert work.total_questions == 3
+    assert work.answered_count == 0
+    assert len(session.executed) == 1
+    statement, rows = session.executed[0]
+    assert statement.table.name == "work_questions_list"
+    assert [row["question_id"] for row in rows] == [30, 10, 20]
+    assert [row["position"] for row in rows] == [1, 2, 3]
+    assert [row["status"] for row in rows] == ["current", "waiting", "waiting"]
+    assert rows[0]["current_work_id"] == work.id
+    assert rows[0]["start_datetime"] is not None
+    assert rows[1]["current_work_id"] is None
+    assert session.commits == 1
+
+
+def test_insert_new_hand_work_bulk_inserts_questions(crud_module, monkeypatch: pytest.MonkeyPatch):
+    crud = crud_module
+    session = SessionStub()
+    _patch_session(monkeypatch, crud, session)
+
+    hand_work = crud.insert_new_hand_work(name="Variant", identificator="abc123", questions_ids_list=[7, 3])
+
+    statement, rows = session.executed[0]
+    assert statement.table.name == "hand_work_questions"
+    assert rows == [
+        {"hand_work_id": hand_work.id, "question_id": 7, "position": 1},
+        {"hand_work_id": hand_work.id, "question_id": 3, "position": 2},
+    ]
+    assert session.commits == 1
+
+
+def test_insert_new_hand_works_uses_one_transaction(crud_module, monkeypatch: pytest.MonkeyPatch):
+    crud = crud_module
+    session = SessionStub()
+    _patch_session(monkeypatch, crud, session)
+
+    hand_works = crud.insert_new_hand_works([
+        {"name": "Variant 1", "identificator": "aaa111", "questions_ids_list": [7, 3]},
+        {"name": "Variant 2", "identificator": "bbb222", "questions_ids_list": [5]},
+    ])
+
+    assert [hand_work.identificator for hand_work in hand_works] == ["aaa111", "bbb222"]
+    assert len(session.executed) == 1
+    _, rows = session.executed[0]
+    assert rows == [
+        {"hand_work_id": hand_works[0].id, "question_id": 7, "position": 1},
+        {"hand_work_id": hand_works[0].id, "question_id": 3, "position": 2},
+        {"hand_work_id": hand_works[1].id, "question_id": 5, "position": 1},
+    ]
+    assert session.commits == 1
+
+
+def test_sync_tag_links_writes_only_the_difference(crud_module):
+    crud = crud_module
+    existing_tags = QueryStub(all_result=[("a", 1), ("b", 2)])
+    created_tags = QueryStub(all_result=[("c", 3)])
+    current_links = QueryStub(all_result=[(10, 1), (10, 4)])
+    stale_links = QueryStub()
+    session = SessionStub(existing_tags, created_tags, current_links, stale_links)
+
+    crud._sync_tag_links(session, crud.PoolTag, crud.PoolTag.pool_id, {10: ["A", "b", "c", "a"]})
+
+    (tag_insert, tag_rows), (link_insert, link_rows) = session.executed
+    assert tag_insert.table.name == "tags"
+    assert tag_rows == [{"slug": "c", "label": "c"}]
+    assert stale_links.deleted
+    assert link_insert.table.name == "pool_tags"
+    assert link_rows == [{"pool_id": 10, "tag_id": 2}, {"pool_id": 10, "tag_id": 3}]
+
+
+def test_sync_tag_links_skips_current_links_for_fresh_owners(crud_module):
+    crud = crud_module
+    session = SessionStub(QueryStub(all_result=[("a", 1)]))
+
+    crud._sync_tag_links(
+        session, crud.PoolTag, crud.PoolTag.pool_id, {1: ["a"], 2: ["a"], 3: []}, fresh=True
+    )
+
+    assert session.queries == []
+    (_, link_rows), = session.executed
+    assert link_rows == [{"pool_id": 1, "tag_id": 1}, {"pool_id": 2, "tag_id": 1}]
+
+
+def test_create_broadcast_queues_a_delivery_per_telegram_user(crud_module):
+    crud = crud_module
+    session = SessionStub(QueryStub(all_result=[(501,), (502,)]))
+
+    broadcast = crud._create_broadcast(session, "<b>hi</b>", admin_chat_id=1, progress_message_id=9)
+
+    assert session.added == [broadcast]
+    assert broadcast.status == "running"
+    statement, rows = session.executed[0]
+    assert statement.table.name == "broadcast_deliveries"
+    assert [(row["broadcast_id"], row["telegram_id"], row["status"]) for row in rows] == [
+        (broadcast.id, 501, "pending"),
+        (broadcast.id, 502, "pending"),
+    ]
+
+
+def test_topic_catalog_counts_questions_and_rebuilds_after_topic_edit(
+    crud_module, monkeypatch: pytest.MonkeyPatch
+):
+    crud = crud_module
+    topics = [
+        SimpleNamespace(id=1, name="10 Алкены", volume="Органика"),
+        SimpleNamespace(id=2, name="2 Алканы", volume="Органика"),
+    ]
+    session = SessionStub(QueryStub(all_result=topics))
+    _patch_session(monkeypatch, crud, session)
+    monkeypatch.setattr(crud, "_load_topic_tags_map", lambda session, ids: {1: ["a", "b"], 2: ["c"]})
+    monkeypatch.setattr(
+        crud, "get_pool_snapshot", lambda: SimpleNamespace(tag_index=lambda active: {"a": [1, 2], "b": [2, 3]})
+    )
+    crud.topic_catalog_cache.invalidate()
+
+    catalog = crud.get_topic_catalog()
+
+    assert [topic.name for topic in catalog.topics("Органика")] == ["2 Алканы", "10 Алкены"]
+    assert catalog.get(1).questions_count == 3
+    assert catalog.get(2).questions_count == 0
+    assert crud.get_topic_catalog() is catalog
+
+    session.queries = [QueryStub(first_result=SimpleNamespace(id=2, is_active=1)), QueryStub(all_result=topics[:1])]
+    crud.deactivate_topic(2)
+
+    assert [topic.id for topic in crud.get_topic_catalog().topics()] == [1]
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+
+import pytest
+from sqlalchemy import create_engine, exc, text
+from sqlalchemy.util import greenlet_spawn
+
+from db.engine_config import (
+    InstrumentedAsyncAdaptedQueuePool,
+    PoolSettings,
+    engine_kwargs,
+    load_pool_settings,
+    pool_statistics,
+)
+
+_POOL_ENV = [
+    f"{prefix}DB_{name}"
+    for prefix in ("", "BOT_", "API_")
+    for name in ("POOL_SIZE", "MAX_OVERFLOW", "POOL_RECYCLE", "POOL_TIMEOUT", "POOL_PRE_PING")
+]
+
+
+@pytest.fixture(autouse=True)
+def clean_pool_env(monkeypatch: pytest.MonkeyPatch):
+    for name in _POOL_ENV + ["APP_ROLE"]:
+        monkeypatch.delenv(name, raising=False)
+
+
+def test_pool_settings_prefer_role_specific_values(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("DB_POOL_SIZE", "8")
+    monkeypatch.setenv("API_DB_POOL_SIZE", "20")
+    monkeypatch.setenv("BOT_DB_POOL_PRE_PING", "0")
+
+    api = load_pool_settings("api")
+    bot = load_pool_settings("bot")
+
+    assert api.pool_size == 20
+    assert bot.pool_size == 8
+    assert api.pool_pre_ping is True
+    assert bot.pool_pre_ping is False
+    assert bot.max_overflow == PoolSettings().max_overflow
+
+
+def test_pool_settings_follow_app_role(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("APP_ROLE", "bot")
+    monkeypatch.setenv("BOT_DB_POOL_TIMEOUT", "2.5")
+
+    assert load_pool_settings().pool_timeout == 2.5
+
+
+def test_pool_statistics_count_checkouts_and_timeouts():
+    settings = PoolSettings(pool_size=1, max_overflow=0, pool_timeout=0.05, pool_pre_ping=False)
+    engine = create_engine("sqlite://", **engine_kwargs(settings))
+
+    with engine.connect() as conn:
+        conn.execute(text("select 1"))
+        busy = pool_statistics(engine.pool, settings)
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+
+    stats = pool_statistics(engine.pool, settings)
+
+    assert busy["checked_out"] == 1
+    assert stats["checked_out"] == 0
+    assert stats["checkouts"] == 2
+    assert stats["timeouts"] == 1
+    assert stats["max_wait_ms"] >= 50
+    assert stats["settings"]["pool_size"] == 1
+
+
+def test_async_pool_records_every_concurrent_waiter():
+    pool = InstrumentedAsyncAdaptedQueuePool(
+        lambda: sqlite3.connect(":memory:", check_same_thread=False),
+        pool_size=1,
+        max_overflow=0,
+        timeout=0.05,
+    )
+
+    async def scenario():
+        held = await greenlet_spawn(pool.connect)
+        results = await asyncio.gather(
+            greenlet_spawn(pool.connect),
+            greenlet_spawn(pool.connect),
+            return_exceptions=True,
+        )
+        await greenlet_spawn(held.close)
+        return results
+
+    results = asyncio.run(scenario())
+
+    assert all(isinstance(result, exc.TimeoutError) for result in results)
+    stats = pool.wait_stats.as_dict()
+    assert stats["checkouts"] == 3
+    assert stats["timeouts"] == 2
+    assert stats["max_wait_ms"] >= 50
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import os
+from io import BytesIO
+
+import openpyxl
+import pytest
+from openpyxl.drawing.image import Image as XlImage
+from PIL import Image
+
+import utils.excel as excel_module
+
+HEADER = ["Тип", "Уровень", "Текст", "Изображение", "Ответ", "Изображение ответа", "Балл", "Ротация",
+          "Самопроверка", "Теги"]
+
+
+def _png(color: str) -> BytesIO:
+    buffer = BytesIO()
+    Image.new("RGB", (4, 4), color).save(buffer, format="PNG")
+    buffer.seek(0)
+    return buffer
+
+
+def _workbook(path, rows, images=()):
+    wb = openpyxl.Workbook()
+    sheet = wb.active
+    sheet.title = "MAIN"
+    sheet.append(HEADER)
+    for row in rows:
+        sheet.append(row)
+    for cell, color in images:
+        sheet.add_image(XlImage(_png(color)), cell)
+    wb.save(path)
+    return str(path)
+
+
+def _fake_insert(inserted: list):
+    def insert(batch):
+        for question in batch:
+            question.id = 100 + len(inserted)
+            inserted.append(question)
+        return batch
+
+    return insert
+
+
+def test_import_pool_streams_rows_in_batches_with_images(monkeypatch: pytest.MonkeyPatch, tmp_path):
+    rows = [["КИМ ЕГЭ", 1, f"q{i}", None, 12, None, 2, "Да", "Нет", "ege_1, Ёж"] for i in range(5)]
+    rows.insert(2, [None] * 10)
+    path = _workbook(tmp_path / "pool.xlsx", rows, images=[("D2", "red"), ("F7", "blue")])
+    inserted, batches = [], []
+    insert = _fake_insert(inserted)
+    monkeypatch.setattr(excel_module, "insert_pool_data", lambda batch: batches.append(len(batch)) or insert(batch))
+
+    progress = []
+
+    result = excel_module.import_pool(
+        path, batch_size=2, images_root=str(tmp_path / "images"),
+        progress=lambda *args: progress.append(args),
+    )
+
+    assert result["is_ok"] and result["errors"] == []
+    assert result["imported_count"] == 5
+    assert batches == [2, 2, 1]
+    assert progress == [
+        ("validate", 2, None), ("validate", 4, None), ("validate", 5, 5),
+        ("import", 2, 5), ("import", 4, 5), ("import", 5, 5),
+    ]
+    assert [row["row"] for row in result["rows"]] == [2, 3, 5, 6, 7]
+    assert {row["status"] for row in result["rows"]} == {"imported"}
+    assert inserted[0].type == "ege" and inserted[0].answer == "12"
+    assert inserted[0].tags_list == ["ege_1", "еж"]
+    assert inserted[0].question_image == 1 and inserted[0].answer_image == 0
+    assert inserted[4].answer_image == 1
+    assert os.path.exists(tmp_path / "images" / "questions" / f"{inserted[0].id}.png")
+    assert os.path.exists(tmp_path / "images" / "answers" / f"{inserted[4].id}.png")
+
+
+def test_import_pool_reports_invalid_rows_without_inserting(monkeypatch: pytest.MonkeyPatch, tmp_path):
+    rows = [
+        ["Тема", 1, "ok", None, 1, None, 1, "Нет", "Нет", "a"],
+        ["Тема", None, "bad", None, "x", None, 1, "Нет", "Нет", None],
+    ]
+    path = _workbook(tmp_path / "pool.xlsx", rows)
+    monkeypatch.setattr(excel_module, "insert_pool_data", lambda batch: pytest.fail("must not insert"))
+
+    result = excel_module.import_pool(path, images_root=str(tmp_path / "images"))
+
+    assert result["errors"] == [3]
+    assert result["imported_count"] == 0
+    assert len(result["rows"][1]["errors"]) == 3
+    assert result["rows"][0]["status"] == "valid"
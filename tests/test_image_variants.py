@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import os
+
+from PIL import Image
+
+from utils.image_variants import (
+    IMAGE_VARIANTS,
+    generate_image_variants,
+    remove_image_variants,
+    variant_path,
+)
+
+
+def _original(images_root, kind="questions", image_id=7, size=(3000, 1500), mode="RGBA"):
+    folder = images_root / kind
+    folder.mkdir(parents=True, exist_ok=True)
+    path = folder / f"{image_id}.png"
+    Image.effect_noise(size, 40).convert(mode).save(path)
+    return path
+
+
+def test_variants_are_downscaled_and_smaller(tmp_path):
+    original = _original(tmp_path)
+
+    generate_image_variants(str(tmp_path), "questions", 7)
+
+    for name, spec in IMAGE_VARIANTS.items():
+        path = variant_path(str(tmp_path), "questions", 7, name)
+        assert path.endswith(f"variants/7_{name}.{spec.extension}")
+        with Image.open(path) as image:
+            assert image.width <= spec.max_width and image.height <= spec.max_height
+            if spec.format == "JPEG":
+                assert image.mode == "RGB"
+        assert os.path.getsize(path) < os.path.getsize(original)
+
+
+def test_small_png_keeps_original_bytes_for_web(tmp_path):
+    original = _original(tmp_path, size=(40, 20), mode="RGB")
+
+    path = variant_path(str(tmp_path), "questions", 7, "web")
+
+    assert path != str(original)
+    assert os.path.getsize(path) <= os.path.getsize(original)
+
+
+def test_variant_is_rebuilt_when_original_changes(tmp_path):
+    original = _original(tmp_path)
+    path = variant_path(str(tmp_path), "questions", 7, "telegram")
+    stale = os.stat(path).st_mtime_ns
+
+    Image.new("RGB", (100, 50), "blue").save(original)
+    os.utime(original, ns=(stale + 10**9, stale + 10**9))
+
+    rebuilt = variant_path(str(tmp_path), "questions", 7, "telegram")
+    with Image.open(rebuilt) as image:
+        assert image.size == (100, 50)
+
+
+def test_missing_original_and_removal(tmp_path):
+    assert variant_path(str(tmp_path), "answers", 1, "pdf") is None
+
+    original = _original(tmp_path, kind="answers", image_id=1, size=(200, 100))
+    assert variant_path(str(tmp_path), "answers", 1, None) == str(original)
+    generate_image_variants(str(tmp_path), "answers", 1)
+    remove_image_variants(str(tmp_path), "answers", 1)
+
+    assert os.listdir(tmp_path / "answers" / "variants") == []
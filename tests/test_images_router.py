@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from email.utils import formatdate
+
+import pytest
+from fastapi import Request
+from fastapi.responses import FileResponse
+from PIL import Image
+
+import api.routers.images.router as images_router
+
+
+def _request(**headers) -> Request:
+    raw = [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw, "query_string": b""})
+
+
+@pytest.fixture
+def images_root(tmp_path, monkeypatch: pytest.MonkeyPatch):
+    (tmp_path / "questions").mkdir()
+    Image.new("RGB", (40, 20), "red").save(tmp_path / "questions" / "5.png")
+    monkeypatch.setattr(images_router, "_IMAGES_ROOT", str(tmp_path))
+    return tmp_path
+
+
+def test_versioned_url_is_immutable_and_unversioned_revalidates(images_root):
+    version = images_router.image_version(str(images_root), "questions", 5)
+
+    versioned = images_router.get_question_image(5, _request(), v=version)
+    plain = images_router.get_question_image(5, _request())
+    stale = images_router.get_question_image(5, _request(), v="0" * 16)
+
+    assert isinstance(versioned, FileResponse)
+    assert "immutable" in versioned.headers["cache-control"]
+    assert plain.headers["cache-control"] == "no-cache"
+    assert stale.headers["cache-control"] == "no-cache"
+    assert versioned.headers["etag"] == f'"{version}-original"'
+    assert "last-modified" in plain.headers
+
+
+def test_matching_etag_or_date_returns_304(images_root):
+    etag = images_router.get_question_image(5, _request()).headers["etag"]
+
+    by_etag = images_router.get_question_image(5, _request(if_none_match=f'W/{etag}, "other"'))
+    by_date = images_router.get_question_image(5, _request(if_modified_since=formatdate(usegmt=True)))
+    other_etag = images_router.get_question_image(
+        5, _request(if_none_match='"other"', if_modified_since=formatdate(usegmt=True))
+    )
+
+    assert by_etag.status_code == 304 and by_etag.headers["etag"] == etag
+    assert by_date.status_code == 304
+    assert other_etag.status_code == 200
+
+
+def test_replaced_image_changes_version_and_etag(images_root):
+    before = images_router.get_question_image(5, _request()).headers["etag"]
+    Image.new("RGB", (41, 20), "blue").save(images_root / "questions" / "5.png")
+
+    response = images_router.get_question_image(5, _request(if_none_match=before))
+
+    assert response.status_code == 200
+    assert response.headers["etag"] != before
+
+
+def test_variant_has_its_own_etag(images_root):
+    original = images_router.get_question_image(5, _request())
+    pdf = images_router.get_question_image(5, _request(), variant="pdf")
+
+    assert pdf.media_type == "image/jpeg"
+    assert pdf.headers["etag"] != original.headers["etag"]
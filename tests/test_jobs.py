@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from utils.jobs import DONE, FAILED, JobFailed, JobRegistry
+
+
+@pytest.fixture
+def registry():
+    registry = JobRegistry(max_workers=1, retention_seconds=60)
+    yield registry
+    registry.shutdown()
+
+
+def _wait(registry: JobRegistry, job_id: str) -> dict:
+    registry.shutdown(wait=True)
+    return registry.get(job_id).to_dict()
+
+
+def test_job_reports_progress_and_result(registry):
+    release = threading.Event()
+    seen = threading.Event()
+
+    def work(job, total):
+        job.progress("import", 1, total)
+        seen.set()
+        release.wait(5)
+        job.progress("import", total, total)
+        return {"message": "готово", "imported_count": total}
+
+    job = registry.submit("pool_import", work, 3)
+    assert seen.wait(5)
+    running = registry.get(job.id).to_dict()
+    assert running["status"] == "running"
+    assert (running["stage"], running["processed"], running["total"]) == ("import", 1, 3)
+
+    release.set()
+    finished = _wait(registry, job.id)
+    assert finished["status"] == DONE
+    assert finished["message"] == "готово"
+    assert finished["result"] == {"message": "готово", "imported_count": 3}
+    assert finished["processed"] == 3
+
+
+def test_job_failure_keeps_row_errors(registry):
+    def work(job):
+        raise JobFailed("Ошибки в строках: 3", [{"row": 3, "errors": ["нет тегов"]}])
+
+    job = registry.submit("pool_import", work)
+    finished = _wait(registry, job.id)
+
+    assert finished["status"] == FAILED
+    assert finished["message"] == "Ошибки в строках: 3"
+    assert finished["errors"] == [{"row": 3, "errors": ["нет тегов"]}]
+
+
+def test_unexpected_exception_fails_job(registry):
+    job = registry.submit("topics_import", lambda job: 1 / 0)
+
+    assert _wait(registry, job.id)["status"] == FAILED
+
+
+def test_finished_jobs_are_pruned_after_retention(monkeypatch: pytest.MonkeyPatch):
+    import utils.jobs as jobs
+
+    now = [1000.0]
+    monkeypatch.setattr(jobs.time, "time", lambda: now[0])
+    registry = JobRegistry(max_workers=1, retention_seconds=60)
+
+    old = registry.submit("pool_import", lambda job: None)
+    registry.shutdown(wait=True)
+    now[0] += 61
+    new = registry.submit("pool_import", lambda job: None)
+    registry.shutdown(wait=True)
+
+    assert registry.get(old.id) is None
+    assert registry.get(new.id) is not None
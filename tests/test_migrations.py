@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+from db.migrations import _backfill_share_tokens
+
+
+class ConnectionStub:
+    def __init__(self, *, has_missing: bool, chunks: list[int]):
+        self.has_missing = has_missing
+        self.chunks = list(chunks)
+        self.statements: list[str] = []
+        self.commits = 0
+
+    def execute(self, statement, params=None):
+        sql = str(statement)
+        self.statements.append(sql)
+        if sql.startswith("SELECT 1"):
+            return SimpleNamespace(first=lambda: (1,) if self.has_missing else None)
+        return SimpleNamespace(rowcount=self.chunks.pop(0))
+
+    def commit(self):
+        self.commits += 1
+
+
+def test_backfill_is_skipped_when_nothing_is_missing():
+    conn = ConnectionStub(has_missing=False, chunks=[])
+
+    assert _backfill_share_tokens(conn) == 0
+    assert len(conn.statements) == 1
+    assert conn.commits == 0
+
+
+def test_backfill_updates_in_chunks_until_a_short_chunk():
+    conn = ConnectionStub(has_missing=True, chunks=[100, 100, 37])
+
+    assert _backfill_share_tokens(conn, chunk_size=100) == 237
+    updates = [sql for sql in conn.statements if sql.startswith("UPDATE")]
+    assert len(updates) == 3
+    assert "RANDOM_BYTES" in updates[0]
+    assert conn.commits == 3
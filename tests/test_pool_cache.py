@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import pytest
+
+from db.pool_cache import PoolRecord, PoolSnapshot, PoolSnapshotCache
+
+
+def _record(record_id: int, tags: tuple[str, ...], is_active: int = 1) -> PoolRecord:
+    return PoolRecord(
+        id=record_id,
+        type="ege",
+        level=1,
+        text=f"question {record_id}",
+        question_image=0,
+        answer="1",
+        answer_image=0,
+        full_mark=1,
+        is_rotate=0,
+        is_selfcheck=0,
+        is_active=is_active,
+        tags_list=tags,
+    )
+
+
+@pytest.fixture
+def records() -> list[PoolRecord]:
+    return [
+        _record(30, ("ege_1", "ege_2")),
+        _record(10, ("ege_1",)),
+        _record(20, ("ege_2",), is_active=0),
+        _record(40, ()),
+    ]
+
+
+def test_snapshot_builds_sorted_tag_index(records):
+    snapshot = PoolSnapshot(version=0, records=records)
+
+    assert list(snapshot.ids_by_tag("ege_1")) == [10, 30]
+    assert list(snapshot.ids_by_tag("ege_2")) == [30]
+    assert list(snapshot.ids_by_tag("ege_2", active=False)) == [20, 30]
+    assert list(snapshot.ids_by_tag("missing")) == []
+
+
+def test_snapshot_filters_inactive_questions(records):
+    snapshot = PoolSnapshot(version=0, records=records)
+
+    assert [q.id for q in snapshot.questions(active=True)] == [10, 30, 40]
+    assert [q.id for q in snapshot.questions(active=False)] == [10, 20, 30, 40]
+
+
+def test_snapshot_get_many_preserves_requested_order(records):
+    snapshot = PoolSnapshot(version=0, records=records)
+
+    assert [q.id for q in snapshot.get_many([30, 99, 10])] == [30, 10]
+    assert snapshot.get(20).is_active == 0
+
+
+def test_cache_reuses_snapshot_until_invalidated(records):
+    cache = PoolSnapshotCache(ttl_seconds=0)
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return records
+
+    first = cache.get(loader)
+    assert cache.get(loader) is first
+    assert len(loads) == 1
+
+    cache.invalidate()
+    second = cache.get(loader)
+
+    assert second is not first
+    assert second.version == first.version + 1
+    assert len(loads) == 2
+
+
+def test_cache_expires_after_ttl(records, monkeypatch: pytest.MonkeyPatch):
+    import db.pool_cache as pool_cache
+
+    now = [1000.0]
+    monkeypatch.setattr(pool_cache.time, "monotonic", lambda: now[0])
+    cache = PoolSnapshotCache(ttl_seconds=60)
+
+    first = cache.get(lambda: records)
+    now[0] += 59
+    assert cache.get(lambda: records) is first
+    now[0] += 2
+    assert cache.get(lambda: records) is not first
+
+
+def test_cache_drops_snapshot_loaded_during_invalidation(records):
+    cache = PoolSnapshotCache(ttl_seconds=0)
+
+    def racing_loader():
+        cache.invalidate()
+        return records
+
+    stale = cache.get(racing_loader)
+    fresh = cache.get(lambda: records)
+
+    assert fresh is not stale
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import random
+from types import SimpleNamespace
+
+import pytest
+
+import utils.tags_helper as tags_helper
+
+
+def _pool():
+    return [
+        SimpleNamespace(id=1, tags_list=["a", "b"]),
+        SimpleNamespace(id=2, tags_list=["a"]),
+        SimpleNamespace(id=3, tags_list=["a", "b"]),
+        SimpleNamespace(id=4, tags_list=["b"]),
+    ]
+
+
+def test_random_questions_never_repeat_a_question():
+    for seed in range(50):
+        result = tags_helper.get_random_questions(
+            pool=_pool(), request_dict={"a": 1, "b": 2}, rng=random.Random(seed)
+        )
+
+        assert result["is_ok"]
+        assert len(result["detail"]) == 3
+        assert len(set(result["detail"])) == 3
+
+
+def test_random_questions_report_missing_tag():
+    result = tags_helper.get_random_questions(pool=_pool(), request_dict={"c": 1})
+
+    assert result == {
+        "is_ok": False,
+        "detail": "more_than_exists",
+        "tag": "c",
+        "requested": 1,
+        "exists": 0,
+    }
+
+
+def test_random_questions_report_exhausted_tag():
+    result = tags_helper.get_random_questions(
+        pool=None, request_dict={"a": 3, "b": 2}, tag_index={"a": [1, 2, 3], "b": [1, 3, 4]}
+    )
+
+    assert result["is_ok"] is False
+    assert result["detail"] == "question_already_inserted"
+    assert result["tag"] == "b"
+
+
+def test_random_questions_batch_shares_one_index():
+    result = tags_helper.get_random_questions_batch(
+        pool=_pool(), request_dict={"a": 1, "b": 1}, variants=5, rng=random.Random(1)
+    )
+
+    assert result["is_ok"]
+    assert len(result["detail"]) == 5
+    for variant in result["detail"]:
+        assert len(variant) == 2
+        assert len(set(variant)) == 2
+
+
+def test_hard_filter_batch_draws_from_questions_with_every_tag():
+    tag_index = tags_helper.build_tag_index(_pool())
+
+    result = tags_helper.get_hard_filter_questions_batch(
+        tag_index, ["a", "b"], questions_count=2, variants=3, rng=random.Random(1)
+    )
+
+    assert result["is_ok"]
+    assert [sorted(variant) for variant in result["detail"]] == [[1, 3]] * 3
+    shortage = tags_helper.get_hard_filter_questions_batch(tag_index, ["a", "b"], questions_count=3, variants=1)
+    assert shortage == {"is_ok": False, "detail": "more_than_exists"}
+
+
+def test_topic_sampler_is_reproducible_with_seed():
+    tag_index = {"x": list(range(1, 40)), "y": list(range(30, 80))}
+
+    first = tags_helper.sample_topic_questions(tag_index, ["x", "y"], 20, random.Random(7))
+    second = tags_helper.sample_topic_questions(tag_index, ["x", "y"], 20, random.Random(7))
+
+    assert first == second
+    assert len(first) == 20
+    assert len(set(first)) == 20
+
+
+def test_topic_sampler_alternates_tags():
+    tag_index = {"x": [1, 2, 3], "y": [4, 5, 6]}
+
+    result = tags_helper.sample_topic_questions(tag_index, ["x", "y"], 4, random.Random(0))
+
+    assert [q_id in tag_index["x"] for q_id in result] == [True, False, True, False]
+
+
+def test_topic_sampler_uses_every_question_when_tags_overlap():
+    tag_index = {"x": [1, 2, 3], "y": [1, 2, 3, 4]}
+
+    for seed in range(20):
+        result = tags_helper.sample_topic_questions(tag_index, ["x", "y"], 4, random.Random(seed))
+        assert sorted(result) == [1, 2, 3, 4]
+
+
+def test_topic_work_reports_shortage(monkeypatch: pytest.MonkeyPatch):
+    from db.pool_cache import PoolSnapshot
+
+    snapshot = PoolSnapshot(version=0, records=[])
+    monkeypatch.setattr(tags_helper, "get_pool_snapshot", lambda: snapshot)
+    monkeypatch.setattr(tags_helper, "get_topic_tags", lambda topic_id: ["x"])
+
+    result = tags_helper.get_questions_list_for_topic_work(topic_id=1, seed=1)
+
+    assert result == {"is_ok": False, "detail": "more_than_exists (0 < 20)"}
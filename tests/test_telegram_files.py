@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.methods import SendPhoto
+from aiogram.types import FSInputFile
+
+import utils.telegram_files as module
+
+
+@pytest.fixture
+def telegram_files(monkeypatch: pytest.MonkeyPatch):
+    store: dict[tuple, str] = {}
+
+    async def get_file_id(kind, entity_id, content_hash):
+        return store.get((kind, entity_id, content_hash))
+
+    async def save_file_id(kind, entity_id, content_hash, file_id):
+        store[(kind, entity_id, content_hash)] = file_id
+
+    async def delete_file_id(kind, entity_id, content_hash):
+        store.pop((kind, entity_id, content_hash), None)
+
+    monkeypatch.setattr(module.async_crud, "get_telegram_file_id", get_file_id)
+    monkeypatch.setattr(module.async_crud, "save_telegram_file_id", save_file_id)
+    monkeypatch.setattr(module.async_crud, "delete_telegram_file_id", delete_file_id)
+    return module, store
+
+
+def _photo_sender(calls: list, reject_ids: set = frozenset()):
+    async def send_photo(photo, **kwargs):
+        calls.append(photo)
+        if isinstance(photo, str) and photo in reject_ids:
+            raise TelegramBadRequest(method=SendPhoto(chat_id=1, photo=photo), message="wrong file identifier")
+        return SimpleNamespace(photo=[SimpleNamespace(file_id="small"), SimpleNamespace(file_id=f"id{len(calls)}")])
+
+    return send_photo
+
+
+def test_second_send_reuses_file_id(telegram_files, tmp_path):
+    module, store = telegram_files
+    path = tmp_path / "7.jpg"
+    path.write_bytes(b"image")
+    calls = []
+    send = _photo_sender(calls)
+
+    for _ in range(3):
+        asyncio.run(module.send_cached_file(
+            send, kind=module.QUESTION_IMAGE, entity_id=7, path=str(path), media_field="photo", chat_id=1,
+        ))
+
+    assert isinstance(calls[0], FSInputFile)
+    assert calls[1:] == ["id1", "id1"]
+    assert list(store.values()) == ["id1"]
+
+
+def test_changed_content_and_rejected_id_upload_again(telegram_files, tmp_path):
+    module, store = telegram_files
+    path = tmp_path / "7.jpg"
+    path.write_bytes(b"image")
+    calls = []
+
+    asyncio.run(module.send_cached_file(
+        _photo_sender(calls), kind=module.QUESTION_IMAGE, entity_id=7, path=str(path), media_field="photo",
+    ))
+    path.write_bytes(b"replaced image")
+    asyncio.run(module.send_cached_file(
+        _photo_sender(calls), kind=module.QUESTION_IMAGE, entity_id=7, path=str(path), media_field="photo",
+    ))
+    assert [type(call) for call in calls] == [FSInputFile, FSInputFile]
+    assert len(store) == 2
+
+    asyncio.run(module.send_cached_file(
+        _photo_sender(calls, reject_ids={"id2"}), kind=module.QUESTION_IMAGE, entity_id=7, path=str(path),
+        media_field="photo",
+    ))
+    assert calls[2] == "id2" and isinstance(calls[3], FSInputFile)
+    assert "id4" in store.values() and "id2" not in store.values()
+
+
+def test_file_content_hash_is_memoised_until_file_changes(telegram_files, tmp_path, monkeypatch):
+    module, _ = telegram_files
+    path = tmp_path / "doc.pdf"
+    path.write_bytes(b"one")
+    first = module.file_content_hash(str(path))
+
+    opened = []
+    real_open = open
+    monkeypatch.setattr("builtins.open", lambda *args, **kwargs: opened.append(args) or real_open(*args, **kwargs))
+    assert module.file_content_hash(str(path)) == first
+    assert opened == []
+
+    path.write_bytes(b"two!")
+    assert module.file_content_hash(str(path)) != first
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from db.pool_cache import PoolSnapshotCache
+from db.topic_cache import TopicCatalog, TopicRecord
+
+
+def _topic(topic_id: int, name: str, volume: str, questions_count: int = 0) -> TopicRecord:
+    return TopicRecord(id=topic_id, name=name, volume=volume, tags_list=(), questions_count=questions_count)
+
+
+def test_catalog_groups_volumes_and_sorts_topics_by_number():
+    catalog = TopicCatalog(version=0, records=[
+        _topic(4, "10 Алкены", "Органика"),
+        _topic(2, "Повторение", "Неорганика"),
+        _topic(1, "2 Оксиды", "Неорганика"),
+        _topic(3, "1 Алканы", "Органика"),
+    ])
+
+    assert catalog.volumes() == ["Неорганика", "Органика"]
+    assert [topic.id for topic in catalog.topics("Органика")] == [3, 4]
+    # Unnumbered topics go after the numbered ones instead of breaking the sort.
+    assert [topic.id for topic in catalog.topics("Неорганика")] == [1, 2]
+    assert [topic.id for topic in catalog.topics()] == [1, 2, 3, 4]
+    assert catalog.topics("Физика") == []
+
+
+def test_catalog_finds_topic_by_name_within_volume():
+    catalog = TopicCatalog(version=0, records=[_topic(1, "1 Алканы", "Органика", questions_count=25)])
+
+    assert catalog.find("1 Алканы", "Органика").questions_count == 25
+    assert catalog.find("1 Алканы", "Неорганика") is None
+    assert catalog.get(2) is None
+
+
+def test_memo_builds_once_per_catalog():
+    cache = PoolSnapshotCache(ttl_seconds=0, snapshot_type=TopicCatalog)
+    builds = []
+
+    def keyboard(catalog: TopicCatalog):
+        return catalog.memo("volumes_kb", lambda: builds.append(1) or tuple(catalog.volumes()))
+
+    first = cache.get(lambda: [_topic(1, "1 Алканы", "Органика")])
+    assert keyboard(first) is keyboard(first)
+
+    cache.invalidate()
+    second = cache.get(lambda: [_topic(1, "1 Алканы", "Органика"), _topic(2, "1 Соли", "Неорганика")])
+
+    assert isinstance(second, TopicCatalog)
+    assert keyboard(second) == ("Органика", "Неорганика")
+    assert len(builds) == 2
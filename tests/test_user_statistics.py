@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+import utils.user_statistics as stats
+
+
+def _work(work_id: int, work_type: str, **kwargs):
+    defaults = {
+        "id": work_id,
+        "user_id": 1,
+        "work_type": work_type,
+        "share_token": f"token-{work_id}",
+        "start_datetime": datetime(2026, 1, 1, 10, 0),
+        "end_datetime": datetime(2026, 1, 1, 11, 0),
+        "topic_name": None,
+        "hand_work_name": None,
+    }
+    defaults.update(kwargs)
+    return SimpleNamespace(**defaults)
+
+
+def _question(work_id: int, position: int, user_mark: int, full_mark: int | None):
+    return SimpleNamespace(
+        id=work_id * 100 + position,
+        work_id=work_id,
+        question_id=position,
+        position=position,
+        status="answered",
+        user_mark=user_mark,
+        full_mark=full_mark,
+    )
+
+
+def test_classify_question_matches_legacy_buckets():
+    classify = stats._classify_question
+
+    assert classify(2, 2) == "fully"
+    assert classify(0, 0) == "fully"
+    assert classify(1, 2) == "semi"
+    assert classify(0, 2) == "zero"
+    assert classify(1, None) == "zero"
+
+
+def test_user_statistics_groups_questions_and_uses_single_marks_query(monkeypatch: pytest.MonkeyPatch):
+    user = SimpleNamespace(id=1, telegram_id=101)
+    works = [
+        _work(10, "topic", topic_name="1 Строение атома"),
+        _work(11, "ege"),
+        _work(12, "hand_work"),
+    ]
+    marks_calls = []
+
+    def fake_marks(work_ids):
+        marks_calls.append(list(work_ids))
+        return [
+            _question(10, 1, 2, 2),
+            _question(10, 2, 1, 2),
+            _question(10, 3, 0, None),
+            _question(11, 1, 1, 1),
+            _question(11, 2, 2, 2),
+            _question(12, 1, 0, 1),
+        ]
+
+    monkeypatch.setattr(stats, "get_user_by_id", lambda user_id: user)
+    monkeypatch.setattr(stats, "get_finished_works_overview", lambda user_id: works)
+    monkeypatch.setattr(stats, "get_works_question_marks", fake_marks)
+    monkeypatch.setattr(stats, "get_output_marks_map", lambda: {3: 21})
+
+    result = stats.get_user_statistics_by_user_id(1)
+
+    assert marks_calls == [[10, 11, 12]]
+    assert [item["general"]["work_id"] for item in result] == [10, 11, 12]
+
+    topic_stats, ege_stats, hand_stats = result
+    assert topic_stats["general"]["name"] == "1 Строение атома"
+    assert topic_stats["general"]["questions_amount"] == 3
+    assert topic_stats["results"] == {"max_mark": 4, "recieved_mark": 3, "final_mark": 3}
+    assert [len(topic_stats["questions"][key]) for key in ("fully", "semi", "zero")] == [1, 1, 1]
+
+    assert ege_stats["general"]["name"] == "КИМ ЕГЭ"
+    assert ege_stats["results"] == {"max_mark": 100, "recieved_mark": 3, "final_mark": 21}
+
+    assert hand_stats["general"]["name"] == "Удалённая тренировка"
+    assert len(hand_stats["questions"]["zero"]) == 1
+
+
+def test_user_statistics_skips_converting_lookup_without_ege_works(monkeypatch: pytest.MonkeyPatch):
+    def fail():
+        raise AssertionError("converting table must not be loaded")
+
+    monkeypatch.setattr(stats, "get_user", lambda telegram_id: SimpleNamespace(id=1))
+    monkeypatch.setattr(stats, "get_finished_works_overview", lambda user_id: [_work(10, "topic")])
+    monkeypatch.setattr(stats, "get_works_question_marks", lambda work_ids: [])
+    monkeypatch.setattr(stats, "get_output_marks_map", fail)
+
+    result = stats.get_user_statistics(101)
+
+    assert result[0]["general"]["name"] == "Удалённая тема"
+    assert result[0]["results"]["max_mark"] == 0
+
+
+def test_user_statistics_returns_empty_for_unknown_user(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(stats, "get_user", lambda telegram_id: None)
+
+    assert stats.get_user_statistics(404) == []
+
+
+def test_work_statistics_reads_only_requested_work(monkeypatch: pytest.MonkeyPatch):
+    user = SimpleNamespace(id=1)
+    marks_calls = []
+
+    def fake_marks(work_ids):
+        marks_calls.append(list(work_ids))
+        return [_question(42, 1, 1, 1), _question(42, 2, 0, 2)]
+
+    monkeypatch.setattr(stats, "get_finished_work_overview", lambda work_id: _work(work_id, "ege"))
+    monkeypatch.setattr(stats, "get_works_question_marks", fake_marks)
+    monkeypatch.setattr(stats, "get_output_mark", lambda mark: 7 if mark == 1 else 0)
+    monkeypatch.setattr(stats, "get_finished_works_overview", lambda user_id: pytest.fail("history loaded"))
+
+    result = stats.get_work_statistics(42, user=user)
+
+    assert marks_calls == [[42]]
+    assert result["general"]["user"] is user
+    assert result["results"] == {"max_mark": 100, "recieved_mark": 1, "final_mark": 7}
+
+
+def test_work_statistics_returns_none_for_unfinished_work(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(stats, "get_finished_work_overview", lambda work_id: None)
+
+    assert stats.get_work_statistics(42) is None
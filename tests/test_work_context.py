@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import asyncio
+from collections import Counter
+from types import SimpleNamespace
+
+import pytest
+
+import tgbot.work_context as module
+
+
+@pytest.fixture
+def work_context(monkeypatch: pytest.MonkeyPatch):
+    calls = Counter()
+    works = {7: SimpleNamespace(id=7, work_type="topic"), 9: SimpleNamespace(id=9, work_type="ege")}
+
+    async def get_user(telegram_id):
+        calls["get_user"] += 1
+        return SimpleNamespace(id=1, telegram_id=telegram_id)
+
+    async def get_user_works(telegram_id):
+        calls["get_user_works"] += 1
+        return [works[9], works[7]]
+
+    async def get_work_by_id(work_id):
+        calls["get_work_by_id"] += 1
+        return works.get(work_id)
+
+    async def get_work_questions(work_id):
+        calls["get_work_questions"] += 1
+        return [SimpleNamespace(id=work_id * 10 + position, position=position) for position in (1, 2)]
+
+    monkeypatch.setattr(module.async_crud, "get_user", get_user)
+    monkeypatch.setattr(module.async_crud, "get_user_works", get_user_works)
+    monkeypatch.setattr(module.async_crud, "get_work_by_id", get_work_by_id)
+    monkeypatch.setattr(module.async_crud, "get_work_questions", get_work_questions)
+    return module, calls
+
+
+def test_context_loads_each_record_once(work_context):
+    module, calls = work_context
+    ctx = module.WorkContext(42, work_id=7)
+
+    async def scenario():
+        for _ in range(3):
+            await ctx.get_user()
+            await ctx.get_work()
+            await ctx.get_questions()
+
+    asyncio.run(scenario())
+
+    assert ctx.work.work_type == "topic"
+    assert [question.id for question in ctx.questions] == [71, 72]
+    assert calls == {"get_user": 1, "get_work_by_id": 1, "get_work_questions": 1}
+
+
+def test_context_without_work_id_uses_latest_work(work_context):
+    module, calls = work_context
+    ctx = module.WorkContext(42)
+
+    questions = asyncio.run(ctx.get_questions())
+
+    assert ctx.work_id == 9
+    assert [question.id for question in questions] == [91, 92]
+    assert calls == {"get_user_works": 1, "get_work_questions": 1}
+
+
+def test_context_reuses_records_the_handler_already_has(work_context):
+    module, calls = work_context
+    user = SimpleNamespace(id=1, telegram_id=42)
+    work = SimpleNamespace(id=7, work_type="hand_work")
+    ctx = module.WorkContext(42, work_id=7, user=user, work=work)
+
+    async def scenario():
+        return await ctx.get_user(), await ctx.get_work()
+
+    assert asyncio.run(scenario()) == (user, work)
+    assert calls == {}
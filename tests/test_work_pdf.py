@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from types import SimpleNamespace
+
+import pytest
+from PIL import Image
+
+import utils.work_pdf as work_pdf
+
+
+def _question(question_id: int, text: str | None = "текст", question_image: int = 0):
+    return SimpleNamespace(id=question_id, text=text, question_image=question_image, is_selfcheck=0)
+
+
+def _build(root, questions, work_id=1, title="Работа"):
+    return work_pdf.build_work_pdf(
+        root_folder=str(root),
+        work_id=work_id,
+        work_title=title,
+        work_type_label="Работа от преподавателя",
+        questions=questions,
+    )
+
+
+@pytest.fixture
+def render_calls(monkeypatch: pytest.MonkeyPatch):
+    calls = []
+    render = work_pdf._render_work_pdf
+
+    def counting_render(output_path, *args):
+        calls.append(output_path)
+        render(output_path, *args)
+
+    monkeypatch.setattr(work_pdf, "_render_work_pdf", counting_render)
+    return calls
+
+
+def test_same_content_is_rendered_once_for_different_works(tmp_path, render_calls):
+    questions = [_question(1), _question(2)]
+
+    first_path, first_name = _build(tmp_path, questions, work_id=10)
+    second_path, second_name = _build(tmp_path, questions, work_id=11)
+
+    assert len(render_calls) == 1
+    assert first_path == second_path
+    assert (first_name, second_name) == ("Работа_10.pdf", "Работа_11.pdf")
+    with open(first_path, "rb") as f:
+        assert f.read(4) == b"%PDF"
+
+
+def test_question_order_text_and_image_changes_miss_the_cache(tmp_path, render_calls):
+    images = tmp_path / "data" / "images" / "questions"
+    images.mkdir(parents=True)
+    image_path = images / "2.png"
+    Image.new("RGB", (20, 10), "red").save(image_path)
+
+    base = _build(tmp_path, [_question(1), _question(2, question_image=1)])[0]
+    reordered = _build(tmp_path, [_question(2, question_image=1), _question(1)])[0]
+    edited = _build(tmp_path, [_question(1, text="другой"), _question(2, question_image=1)])[0]
+    stat = os.stat(image_path)
+    os.utime(image_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    new_image = _build(tmp_path, [_question(1), _question(2, question_image=1)])[0]
+
+    assert len({base, reordered, edited, new_image}) == 4
+    assert len(render_calls) == 4
+
+
+def test_eviction_drops_least_recently_used_files(tmp_path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(work_pdf, "_PDF_CACHE_MIN_AGE_SECONDS", 0)
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    for index, name in enumerate(["old", "middle", "new"]):
+        path = cache_dir / f"{name}.pdf"
+        path.write_bytes(b"x" * 100)
+        os.utime(path, (1000 + index, 1000 + index))
+
+    work_pdf._evict_pdf_cache(str(cache_dir), max_bytes=200)
+
+    assert sorted(os.listdir(cache_dir)) == ["middle.pdf", "new.pdf"]
+
+
+def test_eviction_keeps_recently_used_files(tmp_path):
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    (cache_dir / "fresh.pdf").write_bytes(b"x" * 100)
+
+    work_pdf._evict_pdf_cache(str(cache_dir), max_bytes=0)
+
+    assert os.listdir(cache_dir) == ["fresh.pdf"]
+
+
+class _PendingExecutor:
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, fn, *args):
+        self.submitted.append(args)
+        return Future()
+
+
+@pytest.fixture
+def pending_executor(monkeypatch: pytest.MonkeyPatch):
+    executor = _PendingExecutor()
+    monkeypatch.setattr(work_pdf, "_get_render_executor", lambda: executor)
+    monkeypatch.setattr(work_pdf, "_renders_in_flight", {})
+    return executor
+
+
+def _build_async(root, questions, work_id=1, timeout=None):
+    return work_pdf.build_work_pdf_async(
+        root_folder=str(root),
+        work_id=work_id,
+        work_title="Работа",
+        work_type_label="Работа от преподавателя",
+        questions=questions,
+        timeout=timeout,
+    )
+
+
+def test_async_build_renders_in_process_pool_and_reuses_cache(tmp_path):
+    questions = [_question(1), _question(2)]
+    try:
+        path, name = asyncio.run(_build_async(tmp_path, questions, work_id=5, timeout=60))
+    finally:
+        work_pdf.shutdown_pdf_renderer()
+
+    assert name == "Работа_5.pdf"
+    with open(path, "rb") as f:
+        assert f.read(4) == b"%PDF"
+    assert asyncio.run(_build_async(tmp_path, questions, work_id=6, timeout=0))[0] == path
+
+
+def test_async_build_recovers_after_a_render_worker_dies(tmp_path):
+    try:
+        asyncio.run(_build_async(tmp_path, [_question(1)], work_id=1, timeout=60))
+        executor = work_pdf._render_executor
+        for process in list(executor._processes.values()):
+            process.kill()
+        deadline = time.monotonic() + 30
+        while not executor._broken and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert executor._broken
+
+        path, _ = asyncio.run(_build_async(tmp_path, [_question(2)], work_id=2, timeout=60))
+        assert work_pdf._render_executor is not executor
+    finally:
+        work_pdf.shutdown_pdf_renderer()
+
+    with open(path, "rb") as f:
+        assert f.read(4) == b"%PDF"
+
+
+def test_async_build_drops_the_pool_when_a_render_breaks_it(tmp_path, monkeypatch: pytest.MonkeyPatch):
+    class BreakingExecutor(_PendingExecutor):
+        shut_down = False
+
+        def submit(self, fn, *args):
+            future = super().submit(fn, *args)
+            future.set_exception(BrokenProcessPool("worker died"))
+            return future
+
+        def shutdown(self, wait=True, cancel_futures=False):
+            self.shut_down = True
+
+    executor = BreakingExecutor()
+    monkeypatch.setattr(work_pdf, "_render_executor", executor)
+    monkeypatch.setattr(work_pdf, "_renders_in_flight", {})
+
+    with pytest.raises(BrokenProcessPool):
+        asyncio.run(_build_async(tmp_path, [_question(1)], timeout=5))
+
+    assert executor.shut_down
+    assert work_pdf._render_executor is None
+
+
+def test_async_build_shares_one_render_between_concurrent_requests(tmp_path, pending_executor):
+    async def scenario():
+        return await asyncio.gather(
+            *(_build_async(tmp_path, [_question(1)], work_id=i, timeout=0.05) for i in range(3)),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(scenario())
+
+    assert all(isinstance(result, work_pdf.PdfRenderTimeout) for result in results)
+    assert len(pending_executor.submitted) == 1
+
+
+def test_async_build_refuses_when_queue_is_full(tmp_path, pending_executor, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(work_pdf, "_render_slots", threading.BoundedSemaphore(1))
+    with pytest.raises(work_pdf.PdfRenderTimeout):
+        asyncio.run(_build_async(tmp_path, [_question(1)], timeout=0.01))
+
+    with pytest.raises(work_pdf.PdfRenderBusy):
+        asyncio.run(_build_async(tmp_path, [_question(2)], timeout=0.01))
+    assert len(pending_executor.submitted) == 1
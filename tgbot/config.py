@@ -6,11 +6,14 @@ from aiogram.client.default import DefaultBotProperties
 
 from handlers import (start, help, feedback, menu, statistics, new_work, check)
 from tgbot.handlers import admin
+from tgbot.storage import SQLiteStorage
 
 load_dotenv()
 
 bot = Bot(token=getenv('BOT_API_KEY'), default=DefaultBotProperties(parse_mode='html'))
-dp = Dispatcher()
+dp = Dispatcher(storage=SQLiteStorage(
+    getenv('BOT_FSM_STORAGE_PATH') or f"{getenv('ROOT_FOLDER')}/data/bot/fsm.sqlite3"
+))
 
 dp.include_routers(
     feedback.router,
@@ -1,3 +1,5 @@
+import asyncio
+import logging
 import os.path
 import subprocess
 from datetime import datetime
@@ -8,7 +10,9 @@ from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.types import FSInputFile, Message, ReplyKeyboardRemove
 
-from db.crud import get_all_topics, insert_topics_data, insert_pool_data, get_all_users
+from db import async_crud
+from db.crud import get_topic_catalog, insert_topics_data
+from db.models import Broadcast
 from tgbot.handlers.trash import bot
 from tgbot.keyboards.admin import get_admin_menu_main_kb, AdminMenuMainCallbackFactory, get_admin_system_status_kb, \
     AdminMenuBackCallbackFactory, AdminRebootServiceCallbackFactory, get_admin_db_kb, get_admin_cancel_upload_kb, \
@@ -17,14 +21,78 @@ from tgbot.lexicon.buttons import lexicon
 from tgbot.lexicon.messages import lexicon as msg_lexicon
 from tgbot.states.updating_db import UpdateTopics, InsertPool
 from tgbot.states.writing_sender_text import InputMessage
+from utils.broadcast import BLOCKED, FAILED, PENDING, SENT, run_broadcast
 from utils.clearing import clear_folder, clear_trash_by_db
 from utils.excel import export_topics_list, import_topics_list, import_pool
-from utils.move_file import move_image
 from utils.services_checker import get_system_status
 
 router = Router()
 
 
+_broadcast_tasks: set[asyncio.Task] = set()
+
+
+def _sender_progress_text(percent: int) -> str:
+    return (f"<b>{lexicon['admin']['sender']}</b>"
+            f"\n\nИдёт рассылка пользователям: {percent}%")
+
+
+async def _show_broadcast_status(broadcast: Broadcast, text: str):
+    try:
+        await bot.edit_message_text(
+            chat_id=broadcast.admin_chat_id,
+            message_id=broadcast.progress_message_id,
+            text=text
+        )
+    except exceptions.TelegramBadRequest:
+        # The progress message is gone or already shows this text.
+        pass
+
+
+async def _run_admin_broadcast(broadcast: Broadcast):
+    # Progress and the report cover the whole broadcast, including recipients
+    # handled before a restart, not only the ones this run sends to.
+    status_counts = await async_crud.get_broadcast_status_counts(broadcast.id)
+    total = sum(status_counts.values())
+    settled_before = total - status_counts.get(PENDING, 0)
+    shown_percent = 0
+
+    async def on_progress(processed: int, pending_total: int):
+        nonlocal shown_percent
+        percent = (settled_before + processed) * 100 // total // 10 * 10
+        if shown_percent < percent < 100:
+            shown_percent = percent
+            await _show_broadcast_status(broadcast, _sender_progress_text(percent))
+
+    try:
+        await run_broadcast(bot, broadcast.id, broadcast.html_text, on_progress=on_progress)
+    except Exception:
+        logging.exception("Broadcast %s stopped", broadcast.id)
+        return
+
+    status_counts = await async_crud.get_broadcast_status_counts(broadcast.id)
+    await _show_broadcast_status(
+        broadcast,
+        f"<b>{lexicon['admin']['sender']}</b>"
+        f"\n\nРассылка успешно завершена!"
+        f"\n\nДоставлено: {status_counts.get(SENT, 0)}"
+        f"\nЗаблокировали бота: {status_counts.get(BLOCKED, 0)}"
+        f"\nОшибки: {status_counts.get(FAILED, 0)}"
+    )
+
+
+def start_broadcast(broadcast: Broadcast):
+    task = asyncio.create_task(_run_admin_broadcast(broadcast))
+    _broadcast_tasks.add(task)
+    task.add_done_callback(_broadcast_tasks.discard)
+
+
+async def resume_broadcasts():
+    """Continue broadcasts that a restart interrupted; only pending recipients are sent to."""
+    for broadcast in await async_crud.get_running_broadcasts():
+        start_broadcast(broadcast)
+
+
 @router.message(Command("admin"))
 async def cmd_admin(message: types.Message):
     if message.chat.id in [int(getenv('ADMIN_ID')), int(getenv('DEVELOPER_ID'))]:
@@ -73,8 +141,7 @@ async def admin_menu_main_process(callback: types.CallbackQuery, callback_data:
     elif volume == "update_topics_list":
         await callback.message.delete()
 
-        topics_list = get_all_topics(active=True)
-        export_topics_list(topics_list)
+        export_topics_list(get_topic_catalog().topics())
 
         await callback.message.answer_document(
             document=FSInputFile(f"{getenv('ROOT_FOLDER')}/data/temp/chembot_topics_list.xlsx"),
@@ -126,41 +193,16 @@ async def admin_menu_main_process(callback: types.CallbackQuery, callback_data:
 
         msg = await bot.send_message(
             chat_id=callback.from_user.id,
-            text=f"<b>{lexicon['admin']['sender']}</b>"
-                 f"\n\nИдёт рассылка пользователям: 0%"
+            text=_sender_progress_text(0)
         )
 
         data = await state.get_data()
-        html_text = data.get('html_text')
-
-        users_list = get_all_users()
-
-        sended_counter = 0
-
-        for user in users_list:
-            try:
-                await bot.send_message(
-                    chat_id=user.telegram_id,
-                    text=html_text,
-                )
-            except exceptions.TelegramBadRequest:
-                pass
-
-            sended_counter += 1
-            cur_percent = int(sended_counter / len(users_list) * 100)
-
-            if cur_percent % 10 == 0 and cur_percent != 100:
-                await msg.edit_text(
-                    text=f"<b>{lexicon['admin']['sender']}</b>"
-                         f"\n\nИдёт рассылка пользователям: {cur_percent}%"
-                )
-
-            elif cur_percent == 100:
-                await msg.edit_text(
-                    text=f"<b>{lexicon['admin']['sender']}</b>"
-                         f"\n\nРассылка успешно завершена!"
-                )
-
+        broadcast = await async_crud.create_broadcast(
+            html_text=data.get('html_text'),
+            admin_chat_id=callback.from_user.id,
+            progress_message_id=msg.message_id,
+        )
+        start_broadcast(broadcast)
 
     elif volume == "decline_sender":
         await callback.message.edit_reply_markup(
@@ -295,35 +337,14 @@ async def catch_pool_list_table(message: Message, state: FSMContext):
         file = await bot.get_file(file_id)
         await bot.download_file(file.file_path, filepath)
 
-        import_data = import_pool(filepath)
+        import_data = await asyncio.to_thread(import_pool, filepath)
         await msg.delete()
 
         if import_data['is_ok']:
             if len(import_data['errors']) == 0:
-                pool = insert_pool_data(import_data['data'])
-
-                for el in pool:
-                    if bool(el.question_image):
-                        if os.path.exists(f"{getenv('ROOT_FOLDER')}/data/temp/q_{el.import_id}.png"):
-                            move_image(
-                                source_path=f"{getenv('ROOT_FOLDER')}/data/temp/q_{el.import_id}.png",
-                                destination_path=f"{getenv('ROOT_FOLDER')}/data/images/questions/{el.id}.png"
-                            )
-                        else:
-                            pass
-
-                    if bool(el.answer_image):
-                        if os.path.exists(f"{getenv('ROOT_FOLDER')}/data/temp/a_{el.import_id}.png"):
-                            move_image(
-                                source_path=f"{getenv('ROOT_FOLDER')}/data/temp/a_{el.import_id}.png",
-                                destination_path=f"{getenv('ROOT_FOLDER')}/data/images/answers/{el.id}.png"
-                            )
-                        else:
-                            pass
-
                 await message.answer(
                     text=f"<b>{lexicon['admin']['insert_pool']}</b>"
-                         f"\n\nВопросы успешно импортированы ({len(import_data['data'])}/{len(import_data['data'])})"
+                         f"\n\nВопросы успешно импортированы ({import_data['imported_count']}/{len(import_data['rows'])})"
                 )
             else:
                 ids = " ".join(str(a) for a in import_data['errors'])
@@ -6,7 +6,7 @@ from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.types import Message, ReplyKeyboardRemove
 
-from db.crud import get_user
+from db.async_crud import get_user
 from tgbot.handlers.start import cmd_start
 from tgbot.handlers.trash import bot
 from tgbot.keyboards.feedback import get_answer_to_user_kb, AnswerToUserCallbackFactory, get_cancel_answer_kb
@@ -23,7 +23,7 @@ data_to_send = {}
 
 @router.message(Command("feedback"))
 async def cmd_feedback(message: Message, state: FSMContext):
-    user = get_user(message.from_user.id)
+    user = await get_user(message.from_user.id)
     if user is not None:
         await message.answer(
             text=lexicon['feedback']['ask_to'],
@@ -5,7 +5,7 @@ from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.types import Message
 
-from db.crud import (get_user)
+from db.async_crud import get_user
 from tgbot.handlers.trash import save_user_photo
 from tgbot.keyboards.menu import get_menu_kb
 from tgbot.lexicon.messages import lexicon
@@ -17,7 +17,7 @@ router = Router()
 async def cmd_menu(message: Message, state: FSMContext):
     await state.clear()
 
-    user = get_user(message.from_user.id)
+    user = await get_user(message.from_user.id)
 
     if not os.path.exists(f"{os.getenv('ROOT_FOLDER')}/flet_apps/assets/users_photos/{message.from_user.id}.jpg"):
         await save_user_photo(message)
@@ -1,16 +1,17 @@
+import asyncio
 import os.path
 from datetime import datetime
 from os import getenv
 from aiogram import Router, F, types
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
-from aiogram.types import Message, FSInputFile, ReplyKeyboardRemove
+from aiogram.types import Message, ReplyKeyboardRemove
 
-from db.crud import (get_user, get_user_works, get_work_questions, get_all_topics, create_new_work,
-                     insert_work_questions, remove_last_user_work,
-                     get_question_from_pool, close_question, open_next_question, end_work, get_topic_by_name_and_volume,
-                     update_question_status, get_skipped_questions, get_hand_work, get_hand_work_questions, get_questions_list_by_id,
-                     remove_work, get_all_pool, get_topic_by_volume)
+from db.async_crud import (get_user, get_user_works, close_question, open_next_question, create_work_with_questions,
+                           answer_and_advance, end_work, update_question_status, get_skipped_questions)
+from db.crud import (remove_last_user_work, get_question_from_pool, get_hand_work, get_hand_work_questions,
+                     get_pool_snapshot, get_topic_catalog)
+from db.topic_cache import TopicCatalog
 from tgbot.handlers.trash import bot
 from tgbot.keyboards.new_work import get_user_work_way_kb, SelectWorkWayCallbackFactory, get_new_work_types_kb, \
     SelectNewWorkTypeCallbackFactory, get_topics_kb, get_start_work_kb, StartNewWorkCallbackFactory, get_view_result_kb, \
@@ -20,22 +21,38 @@ from tgbot.lexicon.messages import lexicon as msg_lexicon
 from tgbot.lexicon.buttons import lexicon as btns_lexicon, lexicon
 from tgbot.states.picking_topic import UserTopicChoice, UserTopicVolumeChoice
 from tgbot.states.wait_for_answer_to_question import UserAnswerToQuestion
+from tgbot.work_context import WorkContext
 from utils.answer_checker import check_answer
+from utils.image_variants import variant_path
+from utils.telegram_files import ANSWER_IMAGE, QUESTION_IMAGE, send_cached_file
 from utils.tags_helper import get_ege_tags_list, get_random_questions, get_questions_list_for_topic_work
 
 router = Router()
 
 
+async def _get_topic_catalog() -> TopicCatalog:
+    """An expired catalog is rebuilt from MySQL, so load it in a thread, off the event loop."""
+    return await asyncio.to_thread(get_topic_catalog)
+
+
+def _volumes_kb(catalog: TopicCatalog):
+    return catalog.memo("volumes_kb", lambda: get_topics_volumes_kb(catalog.volumes()))
+
+
+def _volume_topics_kb(catalog: TopicCatalog, volume: str):
+    return catalog.memo(("topics_kb", volume), lambda: get_topics_kb(catalog.topics(volume)))
+
+
 @router.message(Command("new_work"))
 @router.message(F.text == btns_lexicon['main_menu']['new_work'])
 async def cmd_new_work(message: Message, state: FSMContext):
-    user = get_user(message.from_user.id)
+    user = await get_user(message.from_user.id)
     if user is None:
         await message.answer(
             text=msg_lexicon['service']['need_reg']
         )
     else:
-        works_list = get_user_works(message.from_user.id)
+        works_list = await get_user_works(message.from_user.id)
         if works_list and works_list[0].end_datetime is None:
 
             await message.answer(
@@ -57,7 +74,7 @@ async def process_user_work_way(callback: types.CallbackQuery, callback_data: Se
     hand_work_id = callback_data.hand_work_id
 
     if action == 'start_new_work':
-        remove_last_user_work(get_user(callback.from_user.id))
+        remove_last_user_work(await get_user(callback.from_user.id))
 
         if hand_work_id is None:
             await callback.message.edit_text(
@@ -79,7 +96,7 @@ async def process_user_work_way(callback: types.CallbackQuery, callback_data: Se
 
     elif action == 'continue_last_work':
         await callback.message.delete()
-        await go_next_question(get_user(callback.from_user.id).telegram_id, state, add_skipped_questions=True)
+        await go_next_question(WorkContext(callback.from_user.id), state, add_skipped_questions=True)
 
 
 @router.callback_query(SelectNewWorkTypeCallbackFactory.filter())
@@ -97,15 +114,13 @@ async def process_user_work_type(callback: types.CallbackQuery, callback_data: S
         )
 
     elif action == "topic":
-        topics_all = get_all_topics(active=True)
-        volumes = list(dict.fromkeys(t.volume for t in topics_all))
         await callback.message.edit_text(
             text=f"<b>{lexicon['new_work']['topic']}</b>"
                  f"\n\nВыбери нужный тебе раздел"
         )
 
         await callback.message.edit_reply_markup(
-            reply_markup=get_topics_volumes_kb(volumes)
+            reply_markup=_volumes_kb(await _get_topic_catalog())
         )
 
 
@@ -124,14 +139,9 @@ async def process_starting_work(callback: types.CallbackQuery, callback_data: Se
         )
 
     else:
-        # topics_list = get_all_topics(active=True)
-        topics_list = get_topic_by_volume(volume=volume)
-        try:
-            topics_list = sorted(topics_list, key=lambda x: int(x.name.split(" ")[0]))
-        except (ValueError, IndexError):
-            pass
-
-        if not topics_list:
+        catalog = await _get_topic_catalog()
+
+        if not catalog.topics(volume):
             await callback.answer(
                 text=f"ℹ️ В разделе «{volume}» пока нет доступных тем. Попробуй выбрать другой раздел",
                 show_alert=True
@@ -144,7 +154,7 @@ async def process_starting_work(callback: types.CallbackQuery, callback_data: Se
                 text=f"<b>{lexicon['new_work']['topic']}</b>"
                      f"\n\nВыбран раздел <b>{volume}</b>"
                      f"\n\nТеперь выбери нужную тебе тему",
-                reply_markup=get_topics_kb(topics_list)
+                reply_markup=_volume_topics_kb(catalog, volume)
             )
 
             await state.set_state(UserTopicChoice.waiting_for_answer)
@@ -162,18 +172,16 @@ async def process_user_topic_choice(message: Message, state: FSMContext):
             reply_markup=ReplyKeyboardRemove()
         )
 
-        topics_all = get_all_topics(active=True)
-        volumes = list(dict.fromkeys(t.volume for t in topics_all))
         await message.answer(
             text=f"<b>{lexicon['new_work']['topic']}</b>"
                  f"\n\nВыбери нужный тебе раздел",
-            reply_markup=get_topics_volumes_kb(volumes)
+            reply_markup=_volumes_kb(await _get_topic_catalog())
         )
 
     else:
         input_topic_name = message.text.strip()
         selected_volume = data['selected_volume']
-        topic_data = get_topic_by_name_and_volume(topic_name=input_topic_name, volume=selected_volume)
+        topic_data = (await _get_topic_catalog()).find(input_topic_name, selected_volume)
         if topic_data is not None:
             await state.clear()
             msg = await message.answer(
@@ -206,7 +214,7 @@ async def process_starting_work(callback: types.CallbackQuery, callback_data: St
     topic_id = callback_data.topic_id
     hand_work_id = callback_data.hand_work_id
 
-    works_list = get_user_works(callback.from_user.id)
+    works_list = await get_user_works(callback.from_user.id)
     if works_list and works_list[0].end_datetime is None:
         return
 
@@ -219,7 +227,7 @@ async def process_starting_work(callback: types.CallbackQuery, callback_data: St
             reply_markup=ReplyKeyboardRemove()
         )
 
-        user = get_user(callback.from_user.id)
+        user = await get_user(callback.from_user.id)
 
         if work_type == "topic" and not topic_id:
             await msg.delete()
@@ -235,25 +243,21 @@ async def process_starting_work(callback: types.CallbackQuery, callback_data: St
                 )
                 return
 
-        work = create_new_work(user_id=user.id, work_type=work_type, topic_id=topic_id, hand_work_id=hand_work_id)
-
         if work_type == "ege":
-            pool = get_all_pool(active=True)
+            snapshot = await asyncio.to_thread(get_pool_snapshot)
             tags_list = get_ege_tags_list(each_question_limit=1)
 
         if work_type == "ege":
             questions_ids_list = get_random_questions(
-                pool=pool,
+                pool=None,
                 request_dict=tags_list,
+                tag_index=snapshot.tag_index(active=True),
             )
 
             if questions_ids_list['is_ok']:
-                questions_list = get_questions_list_by_id(
-                    ids_list=questions_ids_list['detail']
-                )
+                questions_list = snapshot.get_many(questions_ids_list['detail'])
 
             else:
-                remove_work(work.id)
                 await msg.delete()
 
                 await callback.message.answer(
@@ -264,12 +268,11 @@ async def process_starting_work(callback: types.CallbackQuery, callback_data: St
                 return
 
         elif work_type == "topic":
-            data = get_questions_list_for_topic_work(topic_id=topic_id)
+            data = await asyncio.to_thread(get_questions_list_for_topic_work, topic_id=topic_id)
             if data['is_ok']:
                 questions_list = data['detail']
 
             else:
-                remove_work(work.id)
                 await msg.delete()
 
                 await callback.message.answer(
@@ -283,15 +286,20 @@ async def process_starting_work(callback: types.CallbackQuery, callback_data: St
         elif work_type == "hand_work":
             questions_list = get_hand_work_questions(hand_work_id)
 
-        insert_work_questions(work, questions_list)
+        work = await create_work_with_questions(
+            user_id=user.id,
+            work_type=work_type,
+            topic_id=topic_id,
+            hand_work_id=hand_work_id,
+            questions_list=questions_list,
+        )
 
         await msg.delete()
 
         await try_to_open_next_question(
-            work_id=work.id,
-            user_tid=user.telegram_id,
-            state=state,
+            WorkContext(user.telegram_id, work_id=work.id, user=user, work=work),
             message=callback.message,
+            state=state,
         )
 
     if action == "cancel":
@@ -312,56 +320,118 @@ async def process_starting_work(callback: types.CallbackQuery, callback_data: St
             )
 
 
-async def go_next_question(user_tid: int, state: FSMContext, add_skipped_questions: bool = False):
-    user = get_user(user_tid)
-    work = get_user_works(user.telegram_id)[0]
-    questions_list = get_work_questions(work_id=work.id)
+def _load_pool_question(question_id: int):
+    return get_pool_snapshot().get(question_id) or get_question_from_pool(question_id)
+
+
+async def _get_pool_question(question_id: int):
+    """Pool record from the shared snapshot; the FSM state keeps only the id.
 
+    A stale snapshot is rebuilt from MySQL, so the lookup runs in a thread rather
+    than stalling every chat on the event loop.
+    """
+    return await asyncio.to_thread(_load_pool_question, question_id)
+
+
+async def _send_question(ctx: WorkContext, state: FSMContext, work_question_id: int, position: int, q_info):
     self_check_note = msg_lexicon['new_work']['self_check_note']
+    question_text_block = f"\n\n{self_check_note}\n\n{q_info.text}" if bool(
+        q_info.is_selfcheck) else f"\n\n{q_info.text}"
+
+    if bool(q_info.question_image):
+        src = variant_path(os.path.join(getenv('ROOT_FOLDER'), "data/images"), "questions", q_info.id,
+                           "telegram")
+        if src is None:
+            src = os.path.join(getenv('ROOT_FOLDER'), f"data/images/questions/error.png")
+
+        await send_cached_file(
+            bot.send_photo,
+            kind=QUESTION_IMAGE,
+            entity_id=q_info.id,
+            path=src,
+            media_field="photo",
+            chat_id=ctx.telegram_id,
+            caption=f"№{position} <code>(id{q_info.id})</code>"
+                    f"{question_text_block}",
+            show_caption_above_media=True,
+            reply_markup=get_skip_question_kb(
+                self_check_btn_visible=bool(q_info.is_selfcheck)
+            )
+        )
+    else:
+        await bot.send_message(
+            chat_id=ctx.telegram_id,
+            text=f"№{position} <code>(id{q_info.id})</code>"
+                 f"{question_text_block}",
+            reply_markup=get_skip_question_kb(
+                self_check_btn_visible=bool(q_info.is_selfcheck)
+            )
+        )
+    await state.set_state(UserAnswerToQuestion.waiting_for_answer)
+    await state.set_data(
+        {'work_id': ctx.work_id, 'question_id': work_question_id, 'pool_question_id': q_info.id, 'position': position})
 
+
+async def go_next_question(ctx: WorkContext, state: FSMContext, add_skipped_questions: bool = False):
     questions_statuses = ["current", "waiting"]
 
     if add_skipped_questions:
         questions_statuses.append("skipped")
 
-    for q in questions_list:
+    for q in await ctx.get_questions():
         if q.status in questions_statuses:
-            q_info = get_question_from_pool(q.question_id)
-
-            question_text_block = f"\n\n{self_check_note}\n\n{q_info.text}" if bool(
-                q_info.is_selfcheck) else f"\n\n{q_info.text}"
-
-            if bool(q_info.question_image):
-                if os.path.exists(os.path.join(getenv('ROOT_FOLDER'), f"data/images/questions/{q_info.id}.png")):
-                    src = os.path.join(getenv('ROOT_FOLDER'), f"data/images/questions/{q_info.id}.png")
-                else:
-                    src = os.path.join(getenv('ROOT_FOLDER'), f"data/images/questions/error.png")
-
-                await bot.send_photo(
-                    chat_id=user.telegram_id,
-                    photo=FSInputFile(src),
-                    caption=f"№{q.position} <code>(id{q_info.id})</code>"
-                            f"{question_text_block}",
-                    show_caption_above_media=True,
-                    reply_markup=get_skip_question_kb(
-                        self_check_btn_visible=bool(q_info.is_selfcheck)
-                    )
-                )
-            else:
-                await bot.send_message(
-                    chat_id=user.telegram_id,
-                    text=f"№{q.position} <code>(id{q_info.id})</code>"
-                         f"{question_text_block}",
-                    reply_markup=get_skip_question_kb(
-                        self_check_btn_visible=bool(q_info.is_selfcheck)
-                    )
-                )
-            await state.set_state(UserAnswerToQuestion.waiting_for_answer)
-            await state.set_data(
-                {'work_id': work.id, 'question_id': q.id, 'question_data': q_info, 'position': q.position})
+            await _send_question(ctx, state, q.id, q.position, await _get_pool_question(q.question_id))
             break
 
 
+async def _finish_work(ctx: WorkContext, state: FSMContext, share_token: str):
+    work = await ctx.get_work()
+    messages = [
+        bot.send_message(
+            chat_id=ctx.telegram_id,
+            text=msg_lexicon['new_work']['view_results'],
+            reply_markup=get_view_result_kb(share_token)
+        )
+    ]
+    if work.work_type == "hand_work":
+        user = await ctx.get_user()
+        hand_work_data = get_hand_work(work.hand_work_id)
+        messages.append(
+            bot.send_message(
+                chat_id=getenv('ADMIN_ID'),
+                text=msg_lexicon['new_work']['hand_work_ended'].format(user.name, hand_work_data.name),
+                reply_markup=get_view_result_kb(share_token)
+            )
+        )
+    # Different chats, so neither message has to wait for the other.
+    await asyncio.gather(*messages)
+    await state.clear()
+
+
+async def _ask_to_redo_skipped(ctx: WorkContext, state: FSMContext, message: Message, skipped_count: int):
+    await message.answer(
+        text=msg_lexicon['new_work']['redo_skipped_questions_request'].format(skipped_count),
+        reply_markup=get_redo_skipped_questions_kb(ctx.work_id)
+    )
+    await state.clear()
+
+
+async def _advance(ctx: WorkContext, state: FSMContext, message: Message, work_question_id: int, grade=None):
+    """Answer (or, without `grade`, skip) a question and show whatever comes next."""
+    result = await answer_and_advance(ctx.work_id, work_question_id, grade)
+
+    if result is None:
+        # The question is no longer part of the work, e.g. the work was replaced.
+        await state.clear()
+    elif result["question"] is not None:
+        row = result["question"]
+        await _send_question(ctx, state, row.id, row.position, await _get_pool_question(row.question_id))
+    elif result["skipped"]:
+        await _ask_to_redo_skipped(ctx, state, message, result["skipped"])
+    else:
+        await _finish_work(ctx, state, result["share_token"])
+
+
 @router.message(UserAnswerToQuestion.waiting_for_answer)
 async def save_and_check_user_answer(message: Message, state: FSMContext):
     data = await state.get_data()
@@ -371,23 +441,24 @@ async def save_and_check_user_answer(message: Message, state: FSMContext):
             text=msg_lexicon['new_work']['question_skipped'].format(data['position']),
             reply_markup=ReplyKeyboardRemove()
         )
-        update_question_status(
-            q_id=data['question_id'],
-            status="skipped"
-        )
+        await _advance(WorkContext(message.from_user.id, work_id=data['work_id']), state, message, data['question_id'])
 
     elif message.text.strip() == btns_lexicon['new_work']['self_check']:
-        question_data = data['question_data']
+        question_data = await _get_pool_question(data['pool_question_id'])
 
         if bool(question_data.answer_image):
 
-            if os.path.exists(os.path.join(getenv('ROOT_FOLDER'), f"data/images/answers/{question_data.id}.png")):
-                src = os.path.join(getenv('ROOT_FOLDER'), f"data/images/answers/{question_data.id}.png")
-            else:
+            src = variant_path(os.path.join(getenv('ROOT_FOLDER'), "data/images"), "answers", question_data.id,
+                               "telegram")
+            if src is None:
                 src = os.path.join(getenv('ROOT_FOLDER'), f"data/images/questions/error.png")
 
-            await message.answer_photo(
-                photo=FSInputFile(src),
+            await send_cached_file(
+                message.answer_photo,
+                kind=ANSWER_IMAGE,
+                entity_id=question_data.id,
+                path=src,
+                media_field="photo",
                 show_caption_above_media=True,
                 caption=msg_lexicon['new_work']['answer_to_question_head'].format(data['position'], question_data.id) +
                         f"\n\n{question_data.answer}",
@@ -412,26 +483,22 @@ async def save_and_check_user_answer(message: Message, state: FSMContext):
         return
 
     else:
-        if bool(data['question_data'].is_selfcheck):
+        question_data = await _get_pool_question(data['pool_question_id'])
+        if bool(question_data.is_selfcheck):
             await message.answer(
                 text=msg_lexicon['new_work']['self_check_request']
             )
             return
 
-        close_question(
-            q_id=data['question_id'],
-            user_answer=message.text.strip(),
-            user_mark=check_answer(data['question_data'], message.text.strip()),
-            end_datetime=datetime.now()
+        user_answer = message.text.strip()
+        await _advance(
+            WorkContext(message.from_user.id, work_id=data['work_id']),
+            state,
+            message,
+            data['question_id'],
+            grade=lambda question: (user_answer, check_answer(question, user_answer)),
         )
 
-    await try_to_open_next_question(
-        work_id=data['work_id'],
-        message=message,
-        user_tid=message.from_user.id,
-        state=state
-    )
-
 
 @router.callback_query(SelfCheckCallbackFactory.filter())
 async def process_self_check(callback: types.CallbackQuery, callback_data: SelfCheckCallbackFactory,
@@ -441,54 +508,29 @@ async def process_self_check(callback: types.CallbackQuery, callback_data: SelfC
     )
 
     mark = callback_data.mark
-    work_question_id = callback_data.work_question_id
-    work_id = callback_data.work_id
 
-    close_question(
-        q_id=work_question_id,
-        user_answer="самостоятельная проверка",
-        user_mark=mark,
-        end_datetime=datetime.now()
-    )
-
-    await try_to_open_next_question(
-        work_id=work_id,
-        message=callback.message,
-        user_tid=callback.from_user.id,
-        state=state
+    await _advance(
+        WorkContext(callback.from_user.id, work_id=callback_data.work_id),
+        state,
+        callback.message,
+        callback_data.work_question_id,
+        grade=lambda question: ("самостоятельная проверка", mark),
     )
 
 
-async def try_to_open_next_question(work_id: int, message: Message, user_tid: int, state: FSMContext):
-    result = open_next_question(work_id)
+async def try_to_open_next_question(ctx: WorkContext, message: Message, state: FSMContext):
+    question = await open_next_question(ctx.work_id)
 
-    if result is None:
-        skipped_questions_list = get_skipped_questions(work_id)
+    if question is None:
+        skipped_questions_list = await get_skipped_questions(ctx.work_id)
         if skipped_questions_list:
-            await message.answer(
-                text=msg_lexicon['new_work']['redo_skipped_questions_request'].format(len(skipped_questions_list)),
-                reply_markup=get_redo_skipped_questions_kb(work_id)
-            )
-            await state.clear()
+            await _ask_to_redo_skipped(ctx, state, message, len(skipped_questions_list))
 
         else:
-            work_data = end_work(work_id)
-            await bot.send_message(
-                chat_id=user_tid,
-                text=msg_lexicon['new_work']['view_results'],
-                reply_markup=get_view_result_kb(work_data.share_token)
-            )
-            if work_data.work_type == "hand_work":
-                user = get_user(user_tid)
-                hand_work_data = get_hand_work(work_data.hand_work_id)
-                await bot.send_message(
-                    chat_id=getenv('ADMIN_ID'),
-                    text=msg_lexicon['new_work']['hand_work_ended'].format(user.name, hand_work_data.name),
-                    reply_markup=get_view_result_kb(work_data.share_token)
-                )
-            await state.clear()
+            ctx.work = await end_work(ctx.work_id)
+            await _finish_work(ctx, state, ctx.work.share_token)
     else:
-        await go_next_question(user_tid, state)
+        await _send_question(ctx, state, question.id, question.position, await _get_pool_question(question.question_id))
 
 
 @router.callback_query(ReDoSkippedQuestionCallbackFactory.filter())
@@ -497,13 +539,13 @@ async def process_skipping_question(callback: types.CallbackQuery, callback_data
     await callback.answer()
     action = callback_data.action
     work_id = callback_data.work_id
-    skipped_questions_list = get_skipped_questions(work_id)
+    skipped_questions_list = await get_skipped_questions(work_id)
 
     await callback.message.delete()
 
     if action == "skip":
         for question in skipped_questions_list:
-            close_question(
+            await close_question(
                 q_id=question.id,
                 user_answer="вопрос пропущен",
                 user_mark=0,
@@ -511,19 +553,18 @@ async def process_skipping_question(callback: types.CallbackQuery, callback_data
                 end_datetime=datetime.now()
             )
         await try_to_open_next_question(
-            work_id=work_id,
+            WorkContext(callback.from_user.id, work_id=work_id),
             message=callback.message,
-            user_tid=callback.from_user.id,
             state=state
         )
         await state.clear()
     else:
         for question in skipped_questions_list:
-            update_question_status(
+            await update_question_status(
                 q_id=question.id,
                 status="waiting"
             )
         await go_next_question(
-            user_tid=callback.from_user.id,
+            WorkContext(callback.from_user.id, work_id=work_id),
             state=state
         )
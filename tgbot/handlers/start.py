@@ -7,7 +7,8 @@ from aiogram.fsm.context import FSMContext
 from aiogram.types import Message, ReplyKeyboardRemove
 
 from api.routers.student_auth.service import hash_one_time_token
-from db.crud import create_user, get_hand_work, get_user, get_user_by_telegram_link_token_hash, link_telegram_to_user
+from db.async_crud import get_user
+from db.crud import create_user, get_hand_work, get_user_by_telegram_link_token_hash, link_telegram_to_user
 from tgbot.handlers.trash import save_user_photo
 from tgbot.keyboards.mini_app import get_open_mini_app_kb
 from tgbot.lexicon.messages import lexicon
@@ -84,7 +85,7 @@ async def deep_linking(message: Message, command: CommandObject, state: FSMConte
 @router.message(Command("start"))
 async def cmd_start(message: Message, state: FSMContext):
     await state.clear()
-    user = get_user(message.from_user.id)
+    user = await get_user(message.from_user.id)
 
     if user is None:
         await state.set_state(InputUserName.waiting_for_msg)
@@ -5,7 +5,7 @@ from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.types import Message
 
-from db.crud import get_user_works
+from db.async_crud import get_user_works
 from tgbot.lexicon.messages import lexicon
 from tgbot.lexicon.buttons import lexicon as btns_lexicon
 from utils.user_statistics import get_user_statistics
@@ -20,7 +20,7 @@ async def cmd_stats(message: Message, state: FSMContext):
         text=lexicon['statistics']['search_for_data']
     )
 
-    works_list = get_user_works(message.from_user.id)
+    works_list = await get_user_works(message.from_user.id)
     works_list = [el for el in works_list if el.end_datetime is not None][:10]
 
     await msg.delete()
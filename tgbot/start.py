@@ -1,12 +1,14 @@
 import asyncio
 import logging
 from os import getenv
+from urllib.parse import urlparse
 
 from aiogram.types import ReplyKeyboardRemove
 
 from config import bot, dp
 from threading import Thread
 
+from tgbot.handlers.admin import resume_broadcasts
 from tgbot.lexicon.messages import lexicon
 from utils.clearing import clear_folder
 
@@ -24,12 +26,33 @@ async def on_startup():
         text=lexicon['service']['after_reboot'],
         reply_markup=ReplyKeyboardRemove()
     )
+    await resume_broadcasts()
 
 async def main():
-    await bot.delete_webhook(drop_pending_updates=True)
+    # Keep updates sent while the bot was down; they are handled after the restart.
+    await bot.delete_webhook(drop_pending_updates=False)
     await on_startup()
     await dp.start_polling(bot)
 
 
+def run_webhook(webhook_url: str):
+    import uvicorn
+
+    from tgbot.webhook import create_webhook_app
+
+    app = create_webhook_app(
+        dp,
+        bot,
+        url=webhook_url,
+        path=urlparse(webhook_url).path or "/",
+        secret_token=getenv('BOT_WEBHOOK_SECRET') or None,
+        on_startup=on_startup,
+    )
+    uvicorn.run(app, host="0.0.0.0", port=int(getenv('BOT_WEBHOOK_PORT', '8081')))
+
+
 if __name__ == "__main__":
-    asyncio.run(main())
+    if getenv('BOT_WEBHOOK_URL'):
+        run_webhook(getenv('BOT_WEBHOOK_URL'))
+    else:
+        asyncio.run(main())
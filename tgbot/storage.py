@@ -0,0 +1,79 @@
+"""
+SQLite-backed FSM storage for the bot dispatcher.
+
+The default `MemoryStorage` forgets every conversation on restart, so a student in
+the middle of a work would have their next answer ignored. This storage keeps one
+row per FSM key in a local SQLite file under `data/` and stores the data as JSON:
+handlers keep only ids there (work, work question, pool question) and load
+the rest on demand.
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, Optional
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, KeyBuilder, StateType, StorageKey
+
+
+class SQLiteStorage(BaseStorage):
+    def __init__(self, path: str, key_builder: Optional[KeyBuilder] = None):
+        self.path = path
+        self.key_builder = key_builder or DefaultKeyBuilder(with_destiny=True)
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS fsm ("
+                "key TEXT PRIMARY KEY, state TEXT, data TEXT NOT NULL DEFAULT '{}')"
+            )
+            self._connection = connection
+        return self._connection
+
+    def _read(self, key: str, column: str) -> Optional[str]:
+        with self._lock:
+            row = self._connect().execute(f"SELECT {column} FROM fsm WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _write(self, key: str, column: str, value: Optional[str]):
+        with self._lock:
+            connection = self._connect()
+            connection.execute(
+                f"INSERT INTO fsm (key, {column}) VALUES (?, ?) "
+                f"ON CONFLICT(key) DO UPDATE SET {column} = excluded.{column}",
+                (key, value),
+            )
+            # A cleared conversation leaves no row behind.
+            connection.execute("DELETE FROM fsm WHERE key = ? AND state IS NULL AND data = '{}'", (key,))
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        value = state.state if isinstance(state, State) else state
+        await asyncio.to_thread(self._write, self.key_builder.build(key), "state", value)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        return await asyncio.to_thread(self._read, self.key_builder.build(key), "state")
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        # JSON rather than pickle: only plain values fit, which keeps rows small.
+        payload = json.dumps(data, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+        await asyncio.to_thread(self._write, self.key_builder.build(key), "data", payload)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        payload = await asyncio.to_thread(self._read, self.key_builder.build(key), "data")
+        return json.loads(payload) if payload else {}
+
+    async def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
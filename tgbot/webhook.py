@@ -0,0 +1,174 @@
+"""
+Webhook mode for the bot.
+
+Telegram POSTs each update to the webhook; `UpdateProcessor` acknowledges it at once
+and feeds it to the dispatcher in the background. Updates of one chat run strictly
+one after another (a student's answer is never handled before the question that
+preceded it), updates of different chats run concurrently up to
+`BOT_UPDATE_CONCURRENCY`. Beyond `BOT_UPDATE_QUEUE` queued updates the webhook
+answers 503 and Telegram redelivers later. On shutdown the processor stops taking
+updates and lets the queued ones finish for up to `BOT_SHUTDOWN_DRAIN_SECONDS`.
+
+`create_webhook_router` can be included in any FastAPI app; `create_webhook_app` wraps
+it into a standalone ASGI app that registers the webhook on startup.
+"""
+
+import asyncio
+import hmac
+import logging
+from collections import deque
+from contextlib import asynccontextmanager
+from os import getenv
+from typing import Awaitable, Callable, Hashable, Optional
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+from fastapi import APIRouter, FastAPI, HTTPException, Request
+
+logger = logging.getLogger(__name__)
+
+BOT_UPDATE_CONCURRENCY = int(getenv("BOT_UPDATE_CONCURRENCY", "16"))
+BOT_UPDATE_QUEUE = int(getenv("BOT_UPDATE_QUEUE", "1000"))
+BOT_SHUTDOWN_DRAIN_SECONDS = float(getenv("BOT_SHUTDOWN_DRAIN_SECONDS", "20"))
+_SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+def _ordering_key(update: Update) -> Hashable:
+    """Updates with the same key are handled in arrival order: the chat, else the user."""
+    try:
+        event = update.event
+    except LookupError:
+        # aiogram's UpdateTypeLookupError: an update type it does not know yet.
+        return "update", update.update_id
+    chat = getattr(event, "chat", None) or getattr(getattr(event, "message", None), "chat", None)
+    if chat is not None:
+        return "chat", chat.id
+    user = getattr(event, "from_user", None) or getattr(event, "user", None)
+    if user is not None:
+        return "user", user.id
+    return "update", update.update_id
+
+
+class UpdateProcessor:
+    def __init__(
+        self,
+        dispatcher: Dispatcher,
+        bot: Bot,
+        max_concurrency: int = BOT_UPDATE_CONCURRENCY,
+        max_pending: int = BOT_UPDATE_QUEUE,
+    ):
+        self.dispatcher = dispatcher
+        self.bot = bot
+        self.max_pending = max_pending
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._chats: dict[Hashable, deque[Update]] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self._pending = 0
+        self._closing = False
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def submit(self, update: Update) -> bool:
+        """Queue an update; False when the processor is full or shutting down."""
+        if self._closing or self._pending >= self.max_pending:
+            return False
+        self._pending += 1
+        key = _ordering_key(update)
+        queue = self._chats.get(key)
+        if queue is not None:
+            queue.append(update)
+            return True
+
+        self._chats[key] = deque([update])
+        task = asyncio.create_task(self._run_chat(key))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return True
+
+    async def _run_chat(self, key: Hashable):
+        queue = self._chats[key]
+        try:
+            while queue:
+                async with self._semaphore:
+                    await self._process(queue[0])
+                queue.popleft()
+                self._pending -= 1
+        finally:
+            # Only reached with updates left when the drain timed out and cancelled us.
+            self._pending -= len(queue)
+            del self._chats[key]
+
+    async def _process(self, update: Update):
+        try:
+            await self.dispatcher.feed_update(self.bot, update)
+        except Exception:
+            logger.exception("Update %s failed", update.update_id)
+
+    async def drain(self, timeout: float = BOT_SHUTDOWN_DRAIN_SECONDS) -> int:
+        """Stop taking updates and wait for the queued ones; returns how many were dropped."""
+        self._closing = True
+        tasks = set(self._tasks)
+        if not tasks:
+            return 0
+        _, still_running = await asyncio.wait(tasks, timeout=timeout)
+        dropped = self._pending
+        for task in still_running:
+            task.cancel()
+        await asyncio.gather(*still_running, return_exceptions=True)
+        if dropped:
+            logger.warning("Dropped %s updates that did not finish within %ss", dropped, timeout)
+        return dropped
+
+
+def create_webhook_router(processor: UpdateProcessor, path: str, secret_token: Optional[str] = None) -> APIRouter:
+    router = APIRouter(tags=["telegram"])
+
+    @router.post(path, include_in_schema=False)
+    async def telegram_webhook(request: Request):
+        if secret_token and not hmac.compare_digest(request.headers.get(_SECRET_HEADER, ""), secret_token):
+            raise HTTPException(status_code=401, detail="Invalid secret token")
+
+        update = Update.model_validate(await request.json(), context={"bot": processor.bot})
+        if not processor.submit(update):
+            # Any non-2xx makes Telegram deliver the update again later.
+            raise HTTPException(status_code=503, detail="Bot is busy")
+        return {"ok": True}
+
+    return router
+
+
+def create_webhook_app(
+    dispatcher: Dispatcher,
+    bot: Bot,
+    *,
+    url: str,
+    path: str,
+    secret_token: Optional[str] = None,
+    on_startup: Optional[Callable[[], Awaitable]] = None,
+    processor: Optional[UpdateProcessor] = None,
+) -> FastAPI:
+    processor = processor or UpdateProcessor(dispatcher, bot)
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        # Updates that arrived while the bot was down stay queued at Telegram.
+        await bot.set_webhook(
+            url,
+            secret_token=secret_token,
+            allowed_updates=dispatcher.resolve_used_update_types(),
+            drop_pending_updates=False,
+        )
+        await dispatcher.emit_startup(bot=bot)
+        if on_startup is not None:
+            await on_startup()
+        yield
+        await processor.drain()
+        await dispatcher.emit_shutdown(bot=bot)
+        await dispatcher.storage.close()
+        await bot.session.close()
+
+    app = FastAPI(title="ChemBot webhook", lifespan=lifespan, docs_url=None, redoc_url=None, openapi_url=None)
+    app.include_router(create_webhook_router(processor, path, secret_token))
+    return app
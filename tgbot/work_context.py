@@ -0,0 +1,47 @@
+"""
+Per-update view of a student's current work.
+
+A handler builds one `WorkContext` for the update it is processing and passes it to
+every helper it calls, so the user, the work and its question list are read from
+the database at most once per update, and not at all when the handler already has them.
+"""
+
+from dataclasses import dataclass
+from typing import List, Optional
+
+from db import async_crud
+from db.models import User, Work, WorkQuestion
+
+
+@dataclass
+class WorkContext:
+    telegram_id: int
+    work_id: Optional[int] = None
+    user: Optional[User] = None
+    work: Optional[Work] = None
+    questions: Optional[List[WorkQuestion]] = None
+
+    async def get_user(self) -> Optional[User]:
+        if self.user is None:
+            self.user = await async_crud.get_user(self.telegram_id)
+        return self.user
+
+    async def get_work(self) -> Optional[Work]:
+        """The work of `work_id`, or the user's latest work when no id is known yet."""
+        if self.work is None:
+            if self.work_id is None:
+                works = await async_crud.get_user_works(self.telegram_id)
+                self.work = works[0] if works else None
+            else:
+                self.work = await async_crud.get_work_by_id(self.work_id)
+            if self.work is not None:
+                self.work_id = self.work.id
+        return self.work
+
+    async def get_questions(self) -> List[WorkQuestion]:
+        """Questions of the work in position order."""
+        if self.questions is None:
+            if self.work_id is None and await self.get_work() is None:
+                return []
+            self.questions = await async_crud.get_work_questions(self.work_id)
+        return self.questions
@@ -40,6 +40,7 @@ export interface Topic {
   id: number
   name: string
   volume: string
+  questions_count: number
 }
 
 export interface HandWorkInfo {
@@ -94,6 +95,8 @@ export interface CurrentQuestion {
   full_mark: number
   answer: string | null
   answer_image: boolean
+  question_image_version: string | null
+  answer_image_version: string | null
 }
 
 export type AdvanceResult =
@@ -124,6 +127,8 @@ export interface WorkResult {
     full_mark: number
     question_image: boolean
     answer_image: boolean
+    question_image_version: string | null
+    answer_image_version: string | null
   }>
 }
 
@@ -269,8 +274,10 @@ export const api = {
   getWorkResults: (workId: number) => request<WorkResult>(`/works/${workId}/results`),
 
   imageUrl: {
-    question: (id: number) => `/api/images/question/${id}`,
-    answer: (id: number) => `/api/images/answer/${id}`,
+    question: (id: number, version?: string | null) =>
+      `/api/images/question/${id}?variant=web${version ? `&v=${version}` : ''}`,
+    answer: (id: number, version?: string | null) =>
+      `/api/images/answer/${id}?variant=web${version ? `&v=${version}` : ''}`,
     user: (id: number) => `/api/images/user/${id}`,
   },
   documentUrl: (id: number) => `/api/theory-documents/${id}/file`,
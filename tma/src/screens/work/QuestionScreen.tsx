@@ -182,7 +182,7 @@ export function QuestionScreen({ nav, workId }: Props) {
         <Card style={{ padding: 14, marginBottom: 12 }}>
           {question.question_image && (
             <ZoomableImage
-              src={api.imageUrl.question(question.question_id)}
+              src={api.imageUrl.question(question.question_id, question.question_image_version)}
               alt="Вопрос"
               placeholderHeight={220}
               marginBottom={12}
@@ -202,7 +202,7 @@ export function QuestionScreen({ nav, workId }: Props) {
             </Caption>
             {question.answer_image && (
               <ZoomableImage
-                src={api.imageUrl.answer(question.question_id)}
+                src={api.imageUrl.answer(question.question_id, question.answer_image_version)}
                 alt="Ответ"
                 placeholderHeight={220}
                 marginBottom={12}
@@ -166,7 +166,7 @@ export function WorkResultsScreen({ nav: _nav, workId }: Props) {
 
                 {question.question_image && (
                   <ZoomableImage
-                    src={api.imageUrl.question(question.question_id)}
+                    src={api.imageUrl.question(question.question_id, question.question_image_version)}
                     alt={`Вопрос ${question.index}`}
                     placeholderHeight={180}
                     marginBottom={10}
@@ -202,7 +202,7 @@ export function WorkResultsScreen({ nav: _nav, workId }: Props) {
 
                 {question.answer_image && (
                   <ZoomableImage
-                    src={api.imageUrl.answer(question.question_id)}
+                    src={api.imageUrl.answer(question.question_id, question.answer_image_version)}
                     alt={`Ответ ${question.index}`}
                     placeholderHeight={180}
                     marginTop={10}
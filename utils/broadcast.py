@@ -0,0 +1,214 @@
+"""
+Rate-limited delivery of admin broadcasts.
+
+Telegram lets a bot send about 30 messages per second in total and about one per
+second into a single chat; above that it answers 429 with `retry_after`. A global and
+a per-chat token bucket keep the sender under both limits, a few workers keep several
+requests in flight, and a 429 pauses the global bucket so every worker waits it out.
+
+Recipients are the rows of `broadcast_deliveries`. Results are written back in small
+batches, so after a restart `run_broadcast` picks up the rows still pending; a row
+whose result was not written yet may be sent twice, never skipped.
+"""
+
+import asyncio
+import logging
+import time
+from collections import Counter
+from datetime import datetime
+from os import getenv
+from typing import Awaitable, Callable
+
+from aiogram.exceptions import (
+    TelegramAPIError,
+    TelegramForbiddenError,
+    TelegramNetworkError,
+    TelegramRetryAfter,
+    TelegramServerError,
+)
+
+from db import async_crud
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+SENT = "sent"
+BLOCKED = "blocked"
+FAILED = "failed"
+
+BROADCAST_RATE_PER_SECOND = float(getenv("BROADCAST_RATE_PER_SECOND", "25"))
+BROADCAST_CONCURRENCY = int(getenv("BROADCAST_CONCURRENCY", "8"))
+BROADCAST_MAX_ATTEMPTS = int(getenv("BROADCAST_MAX_ATTEMPTS", "5"))
+_PER_CHAT_RATE_PER_SECOND = 1.0
+_RESULT_BATCH_SIZE = 25
+_NETWORK_RETRY_DELAY_SECONDS = 1.0
+
+
+class TokenBucket:
+    """`rate` tokens per second, at most `capacity` saved up; `acquire` waits for one."""
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable] = asyncio.sleep,
+    ):
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = capacity
+        self._updated_at = clock()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def pause(self, seconds: float):
+        """Hand out nothing for `seconds` and start empty afterwards."""
+        now = self._clock()
+        self._paused_until = max(self._paused_until, now + seconds)
+        self._tokens = 0.0
+        self._updated_at = self._paused_until
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                paused_until = self._paused_until
+                if self._clock() < paused_until:
+                    await self._sleep(paused_until - self._clock())
+                self._refill(max(self._clock(), paused_until))
+                if self._tokens < 1:
+                    await self._sleep((1 - self._tokens) / self.rate)
+                    if self._paused_until != paused_until:
+                        # A 429 arrived while waiting; wait that out first.
+                        continue
+                    self._refill(max(self._clock(), self._updated_at))
+                # After the wait the balance may be a rounding error short of one token.
+                self._tokens -= 1
+                return
+
+
+class BroadcastLimiter:
+    """The global bucket plus one bucket per chat that currently has a send in progress."""
+
+    def __init__(
+        self,
+        rate: float = BROADCAST_RATE_PER_SECOND,
+        per_chat_rate: float = _PER_CHAT_RATE_PER_SECOND,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable] = asyncio.sleep,
+    ):
+        self._clock = clock
+        self._sleep = sleep
+        self._per_chat_rate = per_chat_rate
+        self.global_bucket = TokenBucket(rate, max(1.0, rate), clock, sleep)
+        self._chat_buckets: dict[int, TokenBucket] = {}
+
+    async def acquire(self, chat_id: int):
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._chat_buckets[chat_id] = TokenBucket(self._per_chat_rate, 1.0, self._clock, self._sleep)
+        await bucket.acquire()
+        await self.global_bucket.acquire()
+
+    def pause(self, seconds: float):
+        self.global_bucket.pause(seconds)
+
+    async def sleep(self, seconds: float):
+        """The limiter's clock, so retry backoff follows the same (possibly fake) time."""
+        await self._sleep(seconds)
+
+    def release(self, chat_id: int):
+        """Forget a chat once its delivery is settled; each recipient gets one message."""
+        self._chat_buckets.pop(chat_id, None)
+
+
+async def _deliver(bot, limiter: BroadcastLimiter, telegram_id: int, html_text: str, max_attempts: int) -> dict:
+    error = None
+    attempts = 0
+    try:
+        while attempts < max_attempts:
+            attempts += 1
+            await limiter.acquire(telegram_id)
+            try:
+                await bot.send_message(chat_id=telegram_id, text=html_text)
+                return {"status": SENT, "attempts": attempts, "error": None, "sent_at": datetime.now()}
+            except TelegramRetryAfter as e:
+                # Flood control is per bot, so every worker waits, not just this one.
+                limiter.pause(e.retry_after)
+                error = e.message
+            except TelegramForbiddenError as e:
+                return {"status": BLOCKED, "attempts": attempts, "error": e.message, "sent_at": None}
+            except (TelegramNetworkError, TelegramServerError) as e:
+                error = e.message
+                await limiter.sleep(_NETWORK_RETRY_DELAY_SECONDS * attempts)
+            except TelegramAPIError as e:
+                return {"status": FAILED, "attempts": attempts, "error": e.message, "sent_at": None}
+        return {"status": FAILED, "attempts": attempts, "error": error, "sent_at": None}
+    finally:
+        limiter.release(telegram_id)
+
+
+async def run_broadcast(
+    bot,
+    broadcast_id: int,
+    html_text: str,
+    *,
+    limiter: BroadcastLimiter | None = None,
+    concurrency: int = BROADCAST_CONCURRENCY,
+    max_attempts: int = BROADCAST_MAX_ATTEMPTS,
+    on_progress: Callable[[int, int], Awaitable] | None = None,
+) -> Counter:
+    """Send the pending deliveries of a broadcast and mark it done.
+
+    `on_progress(processed, pending_total)` is awaited after each saved batch. Returns the
+    number of deliveries per status for this run.
+    """
+    limiter = limiter or BroadcastLimiter()
+    pending = await async_crud.get_pending_broadcast_deliveries(broadcast_id)
+    queue: asyncio.Queue = asyncio.Queue()
+    for delivery in pending:
+        queue.put_nowait(delivery)
+
+    counts: Counter = Counter()
+    results: list[dict] = []
+    flush_lock = asyncio.Lock()
+
+    async def flush():
+        async with flush_lock:
+            batch = results[:]
+            del results[:]
+            if batch:
+                await async_crud.save_broadcast_deliveries(batch)
+                if on_progress is not None:
+                    await on_progress(sum(counts.values()), len(pending))
+
+    async def worker():
+        while True:
+            try:
+                delivery = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            result = await _deliver(bot, limiter, delivery.telegram_id, html_text, max_attempts)
+            counts[result["status"]] += 1
+            results.append({"id": delivery.id, **result})
+            if len(results) >= _RESULT_BATCH_SIZE:
+                await flush()
+
+    workers = [asyncio.create_task(worker()) for _ in range(max(1, concurrency))]
+    try:
+        await asyncio.gather(*workers)
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        # Keep what was delivered before an error or a shutdown stopped the run.
+        await asyncio.shield(flush())
+
+    await async_crud.finish_broadcast(broadcast_id)
+    logger.info("Broadcast %s finished: %s", broadcast_id, dict(counts))
+    return counts
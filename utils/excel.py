@@ -1,78 +1,168 @@
+import os
 from datetime import datetime
+from io import BytesIO
 from os import getenv
-from typing import List
+from typing import Callable, List
 
 from dotenv import load_dotenv
-from openpyxl_image_loader import SheetImageLoader
+from PIL import Image
 
 import openpyxl
 
+from db.crud import insert_pool_data
 from db.models import Topic, Pool
+from utils.image_variants import generate_image_variants
+from utils.xlsx_images import SheetImages
 
 load_dotenv()
 
 
-def import_pool(filepath: str):
-    wb = openpyxl.load_workbook(filepath)
-    sheet_name = "MAIN"
-    sheet = wb[sheet_name]
+POOL_SHEET_NAME = "MAIN"
+POOL_IMPORT_BATCH_SIZE = 200
+_POOL_COLUMNS = 10
 
-    image_loader = SheetImageLoader(sheet)
 
-    data = []
+def _parse_pool_row(values: tuple) -> tuple[dict | None, list[str]]:
+    """Columns A-J of one pool sheet row -> Pool fields, or the list of problems."""
+    (work_type, level, text, _, answer, _, full_mark, is_rotate, is_selfcheck, tags) = values
+
     errors = []
+    if level is None:
+        errors.append("не указан уровень (B)")
+    if full_mark is None:
+        errors.append("не указан максимальный балл (G)")
+    if tags is None:
+        errors.append("не указаны теги (J)")
+    if answer:
+        try:
+            answer = str(int(answer))
+        except (TypeError, ValueError):
+            errors.append("ответ должен быть числом (E)")
+    if errors:
+        return None, errors
+
+    return {
+        "type": "ege" if work_type == "КИМ ЕГЭ" else "topic",
+        "level": level,
+        "text": str(text) if text else None,
+        "answer": answer if answer else None,
+        "full_mark": full_mark,
+        "is_rotate": 1 if is_rotate == "Да" else 0,
+        "is_selfcheck": 1 if is_selfcheck == "Да" else 0,
+        "tags_list": [tag.lower().replace("ё", "е").strip(',') for tag in str(tags).split(", ")],
+    }, []
+
+
+def _iter_pool_rows(sheet):
+    for row_num, values in enumerate(
+            sheet.iter_rows(min_row=2, max_col=_POOL_COLUMNS, values_only=True), start=2
+    ):
+        values = tuple(values) + (None,) * (_POOL_COLUMNS - len(values))
+        if values[0] is not None:
+            yield row_num, values
+
+
+def _to_png(data: bytes) -> bytes:
+    with Image.open(BytesIO(data)) as image:
+        buffer = BytesIO()
+        image.save(buffer, format="PNG")
+        return buffer.getvalue()
+
+
+def _flush_pool_batch(batch: list, images_root: str, report: dict):
+    pool = insert_pool_data([question for _, question, _, _ in batch])
+    for (row_num, _, q_png, a_png), question in zip(batch, pool):
+        if q_png:
+            with open(os.path.join(images_root, "questions", f"{question.id}.png"), "wb") as f:
+                f.write(q_png)
+            generate_image_variants(images_root, "questions", question.id)
+        if a_png:
+            with open(os.path.join(images_root, "answers", f"{question.id}.png"), "wb") as f:
+                f.write(a_png)
+            generate_image_variants(images_root, "answers", question.id)
+        report[row_num].update(status="imported", question_id=question.id)
+
+
+def import_pool(filepath: str, batch_size: int = POOL_IMPORT_BATCH_SIZE, images_root: str | None = None,
+                progress: Callable[[str, int, int | None], None] | None = None):
+    """Stream the pool sheet: validate every row, then insert in batches of `batch_size`.
+
+    Nothing is inserted if any row is invalid. Rows are read lazily with no row cap and
+    each image is decoded only when its batch is written, so memory stays bounded.
+    `progress(stage, processed, total)` is called per batch with stage "validate" or "import".
+    """
+    progress = progress or (lambda stage, processed, total: None)
+    images_root = images_root or os.path.join(getenv('ROOT_FOLDER'), "data", "images")
+    try:
+        wb = openpyxl.load_workbook(filepath, read_only=True, data_only=True)
+    except Exception as e:
+        return {'is_ok': False, 'comment': f"Ошибка при чтении данных таблицы: {str(e)}", 'errors': [], 'rows': []}
+
+    report = {}
+    imported_count = 0
     try:
-        for row_num in range(2, 1002):
-            if sheet.cell(row=row_num, column=1).value is not None:
-                import_id = f"{len(data) + 1}_{datetime.now().strftime('%Y%m%d%H%M%S')}"
-                if all(
-                        [
-                            sheet.cell(row=row_num, column=2).value is not None,
-                            # sheet.cell(row=row_num, column=3).value is not None,
-                            # sheet.cell(row=row_num, column=5).value is not None,
-                            sheet.cell(row=row_num, column=7).value is not None,
-                            # sheet.cell(row=row_num, column=8).value is not None,
-                            # sheet.cell(row=row_num, column=9).value is not None,
-                            sheet.cell(row=row_num, column=10).value is not None,
-                        ]
-                ):
-                    question_info = Pool(
-                        import_id=import_id,
-                        type="ege" if sheet.cell(row=row_num, column=1).value == "КИМ ЕГЭ" else "topic",
-                        level=sheet.cell(row=row_num, column=2).value,
-                        text=str(sheet.cell(row=row_num, column=3).value) if sheet.cell(row=row_num,
-                                                                                        column=3).value else None,
-                        answer=str(int(sheet.cell(row=row_num, column=5).value)) if sheet.cell(row=row_num,
-                                                                                          column=5).value else None,
-                        full_mark=sheet.cell(row=row_num, column=7).value,
-                        is_rotate=1 if sheet.cell(row=row_num, column=8).value == "Да" else 0,
-                        is_selfcheck=1 if sheet.cell(row=row_num, column=9).value == "Да" else 0,
-                        tags_list=[tag.lower().replace("ё", "е").strip(',') for tag in
-                                   sheet.cell(row=row_num, column=10).value.split(", ")],
-                        created_at=datetime.now()
-                    )
-                    try:
-                        q_image = image_loader.get(f"D{row_num}")
-                        q_image.save(f"{getenv('ROOT_FOLDER')}/data/temp/q_{import_id}.png")
-                        question_info.question_image = 1
-                        # question_info['question_image'] = 1
-                    except ValueError:
-                        question_info.question_image = 0
-
-                    try:
-                        a_image = image_loader.get(f"F{row_num}")
-                        a_image.save(f"{getenv('ROOT_FOLDER')}/data/temp/a_{import_id}.png")
-                        question_info.answer_image = 1
-                    except ValueError:
-                        question_info.answer_image = 0
-
-                    data.append(question_info)
-                else:
-                    # sheet.cell(row=row_num, column=11).value = "ERROR"
-                    errors.append(row_num)
-        return {'is_ok': True, 'data': data, 'comment': "Импорт вопросов завершён", 'errors': errors}
+        if POOL_SHEET_NAME not in wb.sheetnames:
+            return {'is_ok': False, 'comment': f"В файле отсутствует лист \"{POOL_SHEET_NAME}\"", 'errors': [],
+                    'rows': []}
+        sheet = wb[POOL_SHEET_NAME]
+
+        for row_num, values in _iter_pool_rows(sheet):
+            _, row_errors = _parse_pool_row(values)
+            report[row_num] = {'row': row_num, 'status': "error" if row_errors else "valid", 'errors': row_errors}
+            if len(report) % batch_size == 0:
+                progress("validate", len(report), None)
+        progress("validate", len(report), len(report))
+
+        errors = [row_num for row_num, row in report.items() if row['errors']]
+        if errors:
+            return {'is_ok': True, 'comment': "Найдены ошибки в заполнении строк", 'errors': errors,
+                    'imported_count': 0, 'rows': list(report.values())}
+
+        for folder in ("questions", "answers"):
+            os.makedirs(os.path.join(images_root, folder), exist_ok=True)
+
+        import_stamp = datetime.now().strftime('%Y%m%d%H%M%S')
+        with SheetImages(filepath, POOL_SHEET_NAME) as images:
+            batch = []
+            for row_num, values in _iter_pool_rows(sheet):
+                fields, _ = _parse_pool_row(values)
+                pngs = []
+                for cell in (f"D{row_num}", f"F{row_num}"):
+                    png = None
+                    if cell in images:
+                        try:
+                            png = _to_png(images.read(cell))
+                        except Exception:
+                            report[row_num]['errors'].append(f"не удалось прочитать изображение {cell}")
+                    pngs.append(png)
+
+                question = Pool(
+                    import_id=f"{imported_count + len(batch) + 1}_{import_stamp}",
+                    question_image=1 if pngs[0] else 0,
+                    answer_image=1 if pngs[1] else 0,
+                    created_at=datetime.now(),
+                    **fields,
+                )
+                batch.append((row_num, question, pngs[0], pngs[1]))
+                if len(batch) >= batch_size:
+                    _flush_pool_batch(batch, images_root, report)
+                    imported_count += len(batch)
+                    batch = []
+                    progress("import", imported_count, len(report))
+
+            if batch:
+                _flush_pool_batch(batch, images_root, report)
+                imported_count += len(batch)
+                progress("import", imported_count, len(report))
+
+        return {'is_ok': True, 'comment': "Импорт вопросов завершён", 'errors': [],
+                'imported_count': imported_count, 'rows': list(report.values())}
     except Exception as e:
-        return {'is_ok': False, 'comment': f"Ошибка при чтении данных таблицы: {str(e)}", 'errors': errors}
+        # Batches already written stay imported; the report says which rows they were.
+        return {'is_ok': False, 'comment': f"Ошибка при чтении данных таблицы: {str(e)}", 'errors': [],
+                'imported_count': imported_count, 'rows': list(report.values())}
+    finally:
+        wb.close()
 
 
 def export_topics_list(db_data: List[Topic]):
@@ -0,0 +1,24 @@
+import hashlib
+import os
+import threading
+
+_hash_lock = threading.Lock()
+_hashes: dict[str, tuple[int, int, str]] = {}
+
+
+def file_content_hash(path: str) -> str:
+    """sha256 of the file, memoised per path until its mtime or size changes."""
+    stat = os.stat(path)
+    with _hash_lock:
+        cached = _hashes.get(path)
+    if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached[2]
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    content_hash = digest.hexdigest()
+    with _hash_lock:
+        _hashes[path] = (stat.st_mtime_ns, stat.st_size, content_hash)
+    return content_hash
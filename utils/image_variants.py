@@ -0,0 +1,138 @@
+"""
+Size-limited derivatives of pool images.
+
+Originals stay in `data/images/{questions,answers}/{id}.png`; derivatives live in a
+`variants/` subfolder next to them as `{id}_{variant}.{ext}`. PDF and Telegram get a
+downscaled JPEG flattened on white, the web clients a downscaled optimised PNG.
+
+Uploads and the Excel import build the derivatives eagerly; `variant_path` rebuilds
+one that is missing or older than its original, so images from before this module
+and restored backups are covered without a backfill.
+
+`image_version` is the content hash clients put in image URLs; a replaced image gets
+a new URL, so the versioned URLs can be cached as immutable.
+"""
+
+import os
+import shutil
+import threading
+from dataclasses import dataclass
+
+from PIL import Image
+
+from utils.file_hash import file_content_hash
+
+
+@dataclass(frozen=True)
+class ImageVariant:
+    max_width: int
+    max_height: int
+    format: str
+
+    @property
+    def extension(self) -> str:
+        return "jpg" if self.format == "JPEG" else "png"
+
+
+IMAGE_VARIANTS = {
+    # PDF draws at most 92 x 42 mm, which is about 1090 x 500 px at 300 dpi.
+    "pdf": ImageVariant(1200, 600, "JPEG"),
+    # Telegram recompresses photos to 1280 px on the long side anyway.
+    "telegram": ImageVariant(1280, 1280, "JPEG"),
+    "web": ImageVariant(1024, 1024, "PNG"),
+}
+_JPEG_QUALITY = 88
+
+
+def original_image_path(images_root: str, kind: str, image_id: int) -> str:
+    return os.path.join(images_root, kind, f"{image_id}.png")
+
+
+def _variant_file(images_root: str, kind: str, image_id: int, variant: str) -> str:
+    spec = IMAGE_VARIANTS[variant]
+    return os.path.join(images_root, kind, "variants", f"{image_id}_{variant}.{spec.extension}")
+
+
+def _render_variant(source: str, destination: str, spec: ImageVariant) -> None:
+    with Image.open(source) as image:
+        image.load()
+        image.thumbnail((spec.max_width, spec.max_height), Image.LANCZOS)
+        if spec.format == "JPEG":
+            if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+                image = image.convert("RGBA")
+                background = Image.new("RGB", image.size, "white")
+                background.paste(image, mask=image.getchannel("A"))
+                image = background
+            else:
+                image = image.convert("RGB")
+            options = {"quality": _JPEG_QUALITY, "optimize": True}
+        else:
+            options = {"optimize": True}
+
+        tmp_path = f"{destination}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            image.save(tmp_path, format=spec.format, **options)
+            # Recompressing an already small PNG can make it bigger; keep the original bytes then.
+            if spec.format == "PNG" and os.path.getsize(tmp_path) >= os.path.getsize(source):
+                shutil.copyfile(source, tmp_path)
+            os.replace(tmp_path, destination)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+def _is_fresh(variant_file: str, source: str) -> bool:
+    try:
+        return os.stat(variant_file).st_mtime_ns >= os.stat(source).st_mtime_ns
+    except FileNotFoundError:
+        return False
+
+
+def variant_path(images_root: str, kind: str, image_id: int, variant: str | None) -> str | None:
+    """Path of the requested derivative, or of the original when `variant` is None.
+
+    Returns None when there is no original; falls back to the original if it cannot be decoded.
+    """
+    source = original_image_path(images_root, kind, image_id)
+    if not os.path.exists(source):
+        return None
+    if variant is None:
+        return source
+
+    destination = _variant_file(images_root, kind, image_id, variant)
+    if _is_fresh(destination, source):
+        return destination
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    try:
+        _render_variant(source, destination, IMAGE_VARIANTS[variant])
+    except OSError:
+        return source
+    return destination
+
+
+def image_version(images_root: str, kind: str, image_id: int) -> str | None:
+    """Short content hash of the original, used as the `?v=` of immutable image URLs."""
+    try:
+        return file_content_hash(original_image_path(images_root, kind, image_id))[:16]
+    except FileNotFoundError:
+        return None
+
+
+def pool_image_versions(images_root: str, question_id: int, question_image, answer_image) -> dict:
+    return {
+        "question_image_version": image_version(images_root, "questions", question_id) if question_image else None,
+        "answer_image_version": image_version(images_root, "answers", question_id) if answer_image else None,
+    }
+
+
+def generate_image_variants(images_root: str, kind: str, image_id: int) -> None:
+    for variant in IMAGE_VARIANTS:
+        variant_path(images_root, kind, image_id, variant)
+
+
+def remove_image_variants(images_root: str, kind: str, image_id: int) -> None:
+    for variant in IMAGE_VARIANTS:
+        try:
+            os.remove(_variant_file(images_root, kind, image_id, variant))
+        except FileNotFoundError:
+            pass
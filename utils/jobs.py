@@ -0,0 +1,135 @@
+"""
+In-process background jobs for long admin operations (pool and topic imports).
+
+`submit()` returns immediately with a job id; a small thread pool runs the job and
+the admin SPA polls `GET /api/admin/jobs/{id}` for its progress. The API runs as a
+single uvicorn process, so job state lives in memory: it does not survive a restart
+and finished jobs are dropped after `IMPORT_JOB_RETENTION_SECONDS`.
+"""
+
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from os import getenv
+from typing import Any, Callable
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class JobFailed(Exception):
+    """Raised by a job function to finish with a readable message and per-row errors."""
+
+    def __init__(self, message: str, errors: list | None = None):
+        super().__init__(message)
+        self.message = message
+        self.errors = errors or []
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    status: str = QUEUED
+    stage: str = ""
+    processed: int = 0
+    total: int | None = None
+    message: str = ""
+    result: Any = None
+    errors: list = field(default_factory=list)
+    created_at: float = field(default_factory=time.time)
+    finished_at: float | None = None
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def progress(self, stage: str, processed: int, total: int | None = None):
+        with self._lock:
+            self.stage = stage
+            self.processed = processed
+            self.total = total
+
+    def _finish(self, status: str, message: str = "", result: Any = None, errors: list | None = None):
+        with self._lock:
+            self.status = status
+            self.message = message
+            self.result = result
+            self.errors = errors or []
+            self.finished_at = time.time()
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "id": self.id,
+                "kind": self.kind,
+                "status": self.status,
+                "stage": self.stage,
+                "processed": self.processed,
+                "total": self.total,
+                "message": self.message,
+                "result": self.result,
+                "errors": list(self.errors),
+                "created_at": self.created_at,
+                "finished_at": self.finished_at,
+            }
+
+
+class JobRegistry:
+    def __init__(self, max_workers: int, retention_seconds: float):
+        self.max_workers = max_workers
+        self.retention_seconds = retention_seconds
+        self._lock = threading.Lock()
+        self._jobs: dict[str, Job] = {}
+        self._executor: ThreadPoolExecutor | None = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="job")
+        return self._executor
+
+    def _prune(self):
+        deadline = time.time() - self.retention_seconds
+        for job_id, job in list(self._jobs.items()):
+            if job.finished_at is not None and job.finished_at < deadline:
+                del self._jobs[job_id]
+
+    def submit(self, kind: str, fn: Callable[..., Any], *args, **kwargs) -> Job:
+        """Queue `fn(job, *args, **kwargs)`; its return value becomes the job result."""
+        job = Job(id=uuid.uuid4().hex, kind=kind)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+            self._get_executor().submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    @staticmethod
+    def _run(job: Job, fn: Callable[..., Any], args: tuple, kwargs: dict):
+        with job._lock:
+            job.status = RUNNING
+        try:
+            result = fn(job, *args, **kwargs)
+        except JobFailed as e:
+            job._finish(FAILED, e.message, errors=e.errors)
+        except Exception as e:
+            job._finish(FAILED, f"Непредвиденная ошибка: {e}")
+        else:
+            message = result.get("message", "") if isinstance(result, dict) else ""
+            job._finish(DONE, message, result=result)
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+import_jobs = JobRegistry(
+    max_workers=int(getenv("IMPORT_JOB_WORKERS", "1")),
+    retention_seconds=float(getenv("IMPORT_JOB_RETENTION_SECONDS", "3600")),
+)
@@ -1,8 +1,8 @@
-from typing import List
+from typing import Iterable, List, Mapping, Optional, Sequence
 
 import random
 
-from db.crud import get_pool_by_tags, get_topic_tags
+from db.crud import get_pool_snapshot, get_topic_tags
 from db.models import Pool
 
 
@@ -18,8 +18,6 @@ def get_random_questions_for_hard_tags_filter(pool: List[Pool], tags_list: List[
         if all([tag in p.tags_list for tag in tags_list]):
             questions_with_requested_tags.append(p)
 
-    print(len(questions_with_requested_tags))
-
     if len(questions_with_requested_tags) >= questions_count:
         for _ in range(questions_count):
             q = random.choice(questions_with_requested_tags)
@@ -38,38 +36,42 @@ def get_random_questions_for_hard_tags_filter(pool: List[Pool], tags_list: List[
         }
 
 
-def get_random_questions(pool: List[Pool], request_dict: dict) -> dict:
-    result = []
+def build_tag_index(pool: Iterable) -> dict[str, list[int]]:
+    tag_index: dict[str, list[int]] = {}
+    for question in pool:
+        for tag in question.tags_list:
+            tag_index.setdefault(tag, []).append(question.id)
+    return tag_index
 
-    for el in request_dict.keys():
 
-        if len([q.id for q in pool if el in q.tags_list]) < request_dict[el]:
+def _sample_questions_by_tags(tag_index: Mapping[str, Sequence[int]], request_dict: dict, rng: random.Random) -> dict:
+    result: list[int] = []
+    excluded: set[int] = set()
+
+    for tag, requested in request_dict.items():
+        tag_ids = tag_index.get(tag, ())
+        if len(tag_ids) < requested:
             return {
                 'is_ok': False,
                 'detail': "more_than_exists",
-                'tag': el,
-                'requested': request_dict[el],
-                'exists': len([q.id for q in pool if el in q.tags_list])
+                'tag': tag,
+                'requested': requested,
+                'exists': len(tag_ids),
             }
 
-        current_tag_result = []
-        current_tag_pool = [q for q in pool if el in q.tags_list and q not in result]
-        if len(current_tag_pool) < request_dict[el]:
+        candidates = [q_id for q_id in tag_ids if q_id not in excluded]
+        if len(candidates) < requested:
             return {
                 'is_ok': False,
                 'detail': "question_already_inserted",
-                'tag': el,
-                'requested': request_dict[el],
-                'exists': len([q.id for q in pool if el in q.tags_list])
+                'tag': tag,
+                'requested': requested,
+                'exists': len(tag_ids),
             }
-        else:
-            for __ in range(request_dict[el]):
-                q = random.choice(current_tag_pool)
-                current_tag_result.append(q.id)
-                current_tag_pool.remove(q)
 
-        for q in current_tag_result:
-            result.append(q)
+        picked = rng.sample(candidates, requested)
+        result.extend(picked)
+        excluded.update(picked)
 
     return {
         'is_ok': True,
@@ -77,47 +79,147 @@ def get_random_questions(pool: List[Pool], request_dict: dict) -> dict:
     }
 
 
-def get_questions_list_for_topic_work(topic_id: int, questions_limit: int = 20) -> dict:
-    result_questions_list = []
+def get_random_questions(
+    pool: Optional[Iterable],
+    request_dict: dict,
+    tag_index: Optional[Mapping[str, Sequence[int]]] = None,
+    rng: Optional[random.Random] = None,
+) -> dict:
+    """Draw `request_dict[tag]` distinct question ids per tag, never repeating a question.
+
+    Pass a prebuilt `tag_index` (e.g. `PoolSnapshot.tag_index()`) to skip indexing `pool`.
+    """
+    if tag_index is None:
+        tag_index = build_tag_index(pool or [])
+    return _sample_questions_by_tags(tag_index, request_dict, rng or random)
+
+
+def get_random_questions_batch(
+    pool: Optional[Iterable],
+    request_dict: dict,
+    variants: int,
+    tag_index: Optional[Mapping[str, Sequence[int]]] = None,
+    rng: Optional[random.Random] = None,
+) -> dict:
+    """Generate several independent variants over one shared tag index."""
+    if tag_index is None:
+        tag_index = build_tag_index(pool or [])
+    rng = rng or random
 
-    topic_tags_list = get_topic_tags(topic_id)
-    pool_by_topic_tags = get_pool_by_tags(topic_tags_list)
-    # print("LEN", len(pool_by_topic_tags))
-    # print("TOPIC TAGS", topic_tags_list)
+    result = []
+    for _ in range(variants):
+        variant = _sample_questions_by_tags(tag_index, request_dict, rng)
+        if not variant['is_ok']:
+            return variant
+        result.append(variant['detail'])
 
-    if len(pool_by_topic_tags) < questions_limit:
+    return {
+        'is_ok': True,
+        'detail': result
+    }
+
+
+def get_hard_filter_questions_batch(
+    tag_index: Mapping[str, Sequence[int]],
+    tags_list: Sequence[str],
+    questions_count: int,
+    variants: int,
+    rng: Optional[random.Random] = None,
+) -> dict:
+    """Variants of questions that carry every tag in `tags_list`; candidates are found once."""
+    rng = rng or random
+    ids_by_tag = [tag_index.get(tag, ()) for tag in dict.fromkeys(tags_list)]
+    candidates = sorted(set(ids_by_tag[0]).intersection(*ids_by_tag[1:])) if ids_by_tag else []
+    if len(candidates) < questions_count:
         return {
             'is_ok': False,
-            'detail': f"more_than_exists ({len(pool_by_topic_tags)} < {questions_limit})",
+            'detail': 'more_than_exists'
         }
 
-    elif len(pool_by_topic_tags) == questions_limit:
-        return {
-            'is_ok': True,
-            'detail': pool_by_topic_tags
-        }
+    return {
+        'is_ok': True,
+        'detail': [rng.sample(candidates, questions_count) for _ in range(variants)]
+    }
 
-    else:
-        limiter = 100
-        while len(result_questions_list) != questions_limit:
-            for tag in topic_tags_list:
-                filtered_pool = [q for q in pool_by_topic_tags if tag in q.tags_list]
-                if filtered_pool:
-                    q = random.choice(filtered_pool)
-                    result_questions_list.append(q)
-                    pool_by_topic_tags.remove(q)
-
-                if len(result_questions_list) == questions_limit:
+
+class _ShuffledIdQueue:
+    """Lazy Fisher-Yates over a read-only id sequence: each pop costs O(1), nothing is copied."""
+
+    __slots__ = ("_ids", "_swapped", "_remaining", "_rng")
+
+    def __init__(self, ids: Sequence[int], rng: random.Random):
+        self._ids = ids
+        self._swapped: dict[int, int] = {}
+        self._remaining = len(ids)
+        self._rng = rng
+
+    def __bool__(self) -> bool:
+        return self._remaining > 0
+
+    def pop(self) -> int:
+        pos = self._rng.randrange(self._remaining)
+        last = self._remaining - 1
+        value = self._swapped.get(pos, self._ids[pos])
+        self._swapped[pos] = self._swapped.get(last, self._ids[last])
+        self._remaining = last
+        return value
+
+
+def sample_topic_questions(
+    tag_index: Mapping[str, Sequence[int]],
+    tags: Sequence[str],
+    questions_limit: int,
+    rng: random.Random,
+) -> list[int]:
+    """Round-robin over per-tag shuffled id queues, one question per tag per round.
+
+    Every id is popped at most once per tag, so the draw is O(pool + limit) in the
+    worst case and usually O(limit). Returns fewer than `questions_limit` ids only
+    if the tags do not cover enough questions.
+    """
+    queues = [
+        _ShuffledIdQueue(tag_index[tag], rng)
+        for tag in dict.fromkeys(tags)
+        if tag_index.get(tag)
+    ]
+
+    result: list[int] = []
+    chosen: set[int] = set()
+    while queues and len(result) < questions_limit:
+        next_round = []
+        for queue in queues:
+            q_id = None
+            while queue:
+                candidate = queue.pop()
+                if candidate not in chosen:
+                    q_id = candidate
                     break
+            if q_id is None:
+                continue
+
+            result.append(q_id)
+            chosen.add(q_id)
+            if len(result) == questions_limit:
+                break
+            next_round.append(queue)
+        queues = next_round
 
-            limiter -= 1
-            if limiter == 0:
-                return {
-                    'is_ok': False,
-                    'detail': f"while error",
-                }
+    return result
 
+
+def get_questions_list_for_topic_work(topic_id: int, questions_limit: int = 20, seed: Optional[int] = None) -> dict:
+    snapshot = get_pool_snapshot()
+    tag_index = snapshot.tag_index(active=True)
+    topic_tags_list = get_topic_tags(topic_id)
+
+    questions_ids = sample_topic_questions(tag_index, topic_tags_list, questions_limit, random.Random(seed))
+    if len(questions_ids) < questions_limit:
         return {
-            'is_ok': True,
-            'detail': result_questions_list
+            'is_ok': False,
+            'detail': f"more_than_exists ({len(questions_ids)} < {questions_limit})",
         }
+
+    return {
+        'is_ok': True,
+        'detail': snapshot.get_many(questions_ids)
+    }
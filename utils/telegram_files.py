@@ -0,0 +1,64 @@
+"""
+Send files to Telegram by `file_id` once they have been uploaded.
+
+Telegram returns a reusable `file_id` for every uploaded photo or document. The
+`telegram_file_cache` table maps `(kind, entity_id, content_hash)` to that id, so a
+question image goes over the wire once instead of once per student. The content hash
+makes a replaced file miss the cache on its own; the pool router also drops the rows
+of a replaced or removed image.
+"""
+
+import asyncio
+import hashlib
+from typing import Awaitable, Callable
+
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import FSInputFile, Message
+
+from db import async_crud
+from utils.file_hash import file_content_hash
+
+QUESTION_IMAGE = "question_image"
+ANSWER_IMAGE = "answer_image"
+THEORY_DOCUMENT = "theory_document"
+
+
+def _sent_file_id(message: Message, media_field: str) -> str | None:
+    if media_field == "photo" and message.photo:
+        return message.photo[-1].file_id
+    if media_field == "document" and message.document:
+        return message.document.file_id
+    return None
+
+
+async def send_cached_file(
+    send: Callable[..., Awaitable[Message]],
+    *,
+    kind: str,
+    entity_id: int,
+    path: str,
+    media_field: str,
+    filename: str | None = None,
+    **kwargs,
+) -> Message:
+    """Call `send` (e.g. `bot.send_photo`) with a cached `file_id`, uploading `path` on a miss.
+
+    `media_field` is the name of the file argument of `send`: "photo" or "document".
+    """
+    content_hash = await asyncio.to_thread(file_content_hash, path)
+    if filename:
+        # A cached document keeps the name it was uploaded with, so a rename must miss.
+        content_hash = hashlib.sha256(f"{content_hash}:{filename}".encode()).hexdigest()
+    file_id = await async_crud.get_telegram_file_id(kind, entity_id, content_hash)
+    if file_id:
+        try:
+            return await send(**{media_field: file_id}, **kwargs)
+        except TelegramBadRequest:
+            # The id is no longer accepted (e.g. the bot token changed); upload again.
+            await async_crud.delete_telegram_file_id(kind, entity_id, content_hash)
+
+    message = await send(**{media_field: FSInputFile(path, filename=filename)}, **kwargs)
+    file_id = _sent_file_id(message, media_field)
+    if file_id:
+        await async_crud.save_telegram_file_id(kind, entity_id, content_hash, file_id)
+    return message
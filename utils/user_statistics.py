@@ -1,100 +1,116 @@
-from typing import List
+from typing import Callable
 
 from db.crud import (
-    get_all_pool,
-    get_hand_work,
+    get_finished_work_overview,
+    get_finished_works_overview,
     get_output_mark,
-    get_topic_by_id,
+    get_output_marks_map,
     get_user,
     get_user_by_id,
-    get_user_works,
-    get_user_works_by_user_id,
-    get_work_questions,
+    get_works_question_marks,
 )
-from db.models import WorkQuestion
-
-
-def remove_none(work_questions_list: List[WorkQuestion]):
-    for question in work_questions_list:
-        if question.user_mark is None:
-            question.user_mark = 0
-    return work_questions_list
-
-
-def _build_user_statistics(user, user_works):
-    result = []
-    pool = get_all_pool(active=False)
-    finished_works = [work for work in user_works if work.end_datetime is not None]
-
-    for work in finished_works:
-        work_stats = {
-            "general": {
-                "user": user,
-                "type": work.work_type,
-                "work_id": work.id,
-                "share_token": work.share_token,
-                "name": "",
-                "time": {
-                    "start": work.start_datetime,
-                    "end": work.end_datetime,
-                },
-            },
-            "questions": {
-                "fully": [],
-                "semi": [],
-                "zero": [],
-            },
-            "results": {
-                "max_mark": 0,
-                "recieved_mark": 0,
-                "final_mark": 0,
-            },
-        }
-
-        if work.work_type == "topic":
-            topic = get_topic_by_id(work.topic_id)
-            work_stats["general"]["name"] = topic.name if topic else "Удалённая тема"
-        elif work.work_type == "ege":
-            work_stats["general"]["name"] = "КИМ ЕГЭ"
-        elif work.work_type == "hand_work":
-            hand_work = get_hand_work(work.hand_work_id)
-            work_stats["general"]["name"] = hand_work.name if hand_work else "Удалённая тренировка"
-
-        work_questions = remove_none(get_work_questions(work.id))
-        work_stats["general"]["questions_amount"] = len(work_questions)
-        work_stats["results"]["recieved_mark"] = sum(question.user_mark for question in work_questions)
-        work_stats["results"]["final_mark"] = work_stats["results"]["recieved_mark"]
-
-        for question in work_questions:
-            original_question = next((item for item in pool if item.id == question.question_id), None)
-            if original_question is None:
-                work_stats["questions"]["zero"].append(question)
-                continue
 
-            work_stats["results"]["max_mark"] += original_question.full_mark
-            if question.user_mark == original_question.full_mark:
-                work_stats["questions"]["fully"].append(question)
-            elif 0 < question.user_mark < original_question.full_mark:
-                work_stats["questions"]["semi"].append(question)
-            else:
-                work_stats["questions"]["zero"].append(question)
-
-        if work.work_type == "ege":
-            work_stats["results"]["final_mark"] = get_output_mark(work_stats["results"]["recieved_mark"])
-            work_stats["results"]["max_mark"] = 100
-
-        result.append(work_stats)
-
-    return result
+_WORK_NAMES = {
+    "ege": "КИМ ЕГЭ",
+}
+_DELETED_TOPIC_NAME = "Удалённая тема"
+_DELETED_HAND_WORK_NAME = "Удалённая тренировка"
+
+
+def _classify_question(user_mark: int, full_mark: int | None) -> str:
+    if full_mark is None:
+        return "zero"
+    if user_mark == full_mark:
+        return "fully"
+    if 0 < user_mark < full_mark:
+        return "semi"
+    return "zero"
+
+
+def _resolve_work_name(work) -> str:
+    if work.work_type == "topic":
+        return work.topic_name or _DELETED_TOPIC_NAME
+    if work.work_type == "hand_work":
+        return work.hand_work_name or _DELETED_HAND_WORK_NAME
+    return _WORK_NAMES.get(work.work_type, "")
+
+
+def _build_work_stats(user, work, questions: list, convert_mark: Callable[[int], int]) -> dict:
+    buckets = {"fully": [], "semi": [], "zero": []}
+    recieved_mark = 0
+    max_mark = 0
+
+    for question in questions:
+        recieved_mark += question.user_mark
+        if question.full_mark is not None:
+            max_mark += question.full_mark
+        buckets[_classify_question(question.user_mark, question.full_mark)].append(question)
+
+    final_mark = recieved_mark
+    if work.work_type == "ege":
+        final_mark = convert_mark(recieved_mark)
+        max_mark = 100
+
+    return {
+        "general": {
+            "user": user,
+            "type": work.work_type,
+            "work_id": work.id,
+            "share_token": work.share_token,
+            "name": _resolve_work_name(work),
+            "time": {
+                "start": work.start_datetime,
+                "end": work.end_datetime,
+            },
+            "questions_amount": len(questions),
+        },
+        "questions": buckets,
+        "results": {
+            "max_mark": max_mark,
+            "recieved_mark": recieved_mark,
+            "final_mark": final_mark,
+        },
+    }
+
+
+def _build_user_statistics(user) -> list[dict]:
+    if user is None:
+        return []
+
+    works = get_finished_works_overview(user.id)
+    if not works:
+        return []
+
+    questions_by_work: dict[int, list] = {}
+    for question in get_works_question_marks([work.id for work in works]):
+        questions_by_work.setdefault(question.work_id, []).append(question)
+
+    output_marks = get_output_marks_map() if any(work.work_type == "ege" for work in works) else {}
+
+    return [
+        _build_work_stats(
+            user,
+            work,
+            questions_by_work.get(work.id, []),
+            lambda mark: output_marks.get(mark, 0),
+        )
+        for work in works
+    ]
 
 
 def get_user_statistics(telegram_id: int):
-    user = get_user(telegram_id)
-    user_works = get_user_works(telegram_id)
-    return _build_user_statistics(user, user_works)
+    return _build_user_statistics(get_user(telegram_id))
 
 
 def get_user_statistics_by_user_id(user_id: int):
-    user = get_user_by_id(user_id)
-    user_works = get_user_works_by_user_id(user_id)
-    return _build_user_statistics(user, user_works)
+    return _build_user_statistics(get_user_by_id(user_id))
+
+
+def get_work_statistics(work_id: int, user=None) -> dict | None:
+    """Statistics of a single finished work; reads only that work's question rows."""
+    work = get_finished_work_overview(work_id)
+    if work is None:
+        return None
+    if user is None:
+        user = get_user_by_id(work.user_id)
+    return _build_work_stats(user, work, get_works_question_marks([work.id]), get_output_mark)
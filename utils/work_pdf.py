@@ -1,8 +1,17 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import html
+import json
+import multiprocessing
 import os
 import re
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
 from datetime import UTC, datetime
 from pathlib import Path
 from typing import Iterable
@@ -16,11 +25,60 @@ from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.platypus import HRFlowable, Image, Paragraph, SimpleDocTemplate, Spacer
 
+from utils.image_variants import variant_path
+
 
 _FONT_FAMILY = "Helvetica"
 _FONT_BOLD = "Helvetica-Bold"
 _FONT_REGISTERED = False
 
+# Bump when the PDF layout changes so existing cache entries stop matching.
+_PDF_RENDER_VERSION = 2
+WORK_PDF_CACHE_MAX_BYTES = int(float(os.getenv("WORK_PDF_CACHE_MAX_MB", "256")) * 1024 * 1024)
+# Entries used this recently are never evicted, so a file is not removed while it is being served.
+_PDF_CACHE_MIN_AGE_SECONDS = 60
+_PDF_CACHE_LOCK = threading.Lock()
+
+# Renders for the async API run in a separate process pool: ReportLab layout is CPU-bound
+# and would otherwise hold the GIL while question/answer requests wait behind it.
+WORK_PDF_RENDER_WORKERS = int(os.getenv("WORK_PDF_RENDER_WORKERS", "2"))
+# Renders queued or running at once; further requests are refused instead of piling up.
+WORK_PDF_RENDER_QUEUE = int(os.getenv("WORK_PDF_RENDER_QUEUE", "16"))
+WORK_PDF_RENDER_TIMEOUT_SECONDS = float(os.getenv("WORK_PDF_RENDER_TIMEOUT_SECONDS", "60"))
+
+_render_executor: ProcessPoolExecutor | None = None
+_render_slots = threading.BoundedSemaphore(WORK_PDF_RENDER_QUEUE)
+_render_lock = threading.RLock()
+_renders_in_flight: dict[str, Future] = {}
+
+
+class PdfRenderBusy(RuntimeError):
+    """The render queue is full."""
+
+
+class PdfRenderTimeout(TimeoutError):
+    """The render did not finish within the timeout; it keeps running and fills the cache."""
+
+
+@dataclass(frozen=True, slots=True)
+class _PdfQuestion:
+    id: int
+    text: str | None
+    question_image: bool
+    is_selfcheck: bool
+
+
+@dataclass(frozen=True, slots=True)
+class _PdfJob:
+    key: str
+    cache_dir: str
+    output_path: str
+    visible_name: str
+    root_folder: str
+    work_title: str
+    work_type_label: str
+    questions: tuple[_PdfQuestion, ...]
+
 
 def _font_candidates() -> list[tuple[str, str]]:
     return [
@@ -151,6 +209,100 @@ def _scaled_image(path: str, max_width: float, max_height: float) -> Image:
     return image
 
 
+def _pdf_cache_key(root_folder: str, work_title: str, work_type_label: str, questions: list) -> str:
+    """Hash of everything the rendered PDF depends on, including question image mtimes."""
+    parts = [_PDF_RENDER_VERSION, work_title, work_type_label]
+    for question in questions:
+        image_stat = None
+        if getattr(question, "question_image", False):
+            try:
+                stat = os.stat(_question_image_path(root_folder, question.id))
+                image_stat = [stat.st_mtime_ns, stat.st_size]
+            except FileNotFoundError:
+                pass
+        parts.append([
+            question.id,
+            getattr(question, "text", None),
+            bool(getattr(question, "is_selfcheck", False)),
+            image_stat,
+        ])
+    payload = json.dumps(parts, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+def _touch_cached_pdf(path: str) -> bool:
+    try:
+        os.utime(path)
+        return True
+    except FileNotFoundError:
+        return False
+
+
+def _evict_pdf_cache(cache_dir: str, max_bytes: int) -> None:
+    """Drop least recently used PDFs (by mtime) until the cache fits in `max_bytes`."""
+    with _PDF_CACHE_LOCK:
+        entries = []
+        for entry in os.scandir(cache_dir):
+            if entry.is_file() and entry.name.endswith(".pdf"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        keep_after = time.time() - _PDF_CACHE_MIN_AGE_SECONDS
+        for mtime, size, path in sorted(entries):
+            if total <= max_bytes or mtime >= keep_after:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+
+def _prepare_work_pdf(
+    root_folder: str,
+    work_id: int,
+    work_title: str,
+    work_type_label: str,
+    questions: Iterable,
+    output_dir: str | None,
+) -> _PdfJob:
+    # Plain picklable records: ORM rows cannot be sent to the render processes.
+    questions = tuple(
+        _PdfQuestion(
+            id=question.id,
+            text=getattr(question, "text", None),
+            question_image=bool(getattr(question, "question_image", False)),
+            is_selfcheck=bool(getattr(question, "is_selfcheck", False)),
+        )
+        for question in questions
+    )
+    cache_dir = output_dir or os.path.join(root_folder, "data", "cache", "work_pdfs")
+    Path(cache_dir).mkdir(parents=True, exist_ok=True)
+
+    key = _pdf_cache_key(root_folder, work_title, work_type_label, list(questions))
+    return _PdfJob(
+        key=key,
+        cache_dir=cache_dir,
+        output_path=os.path.join(cache_dir, f"{key}.pdf"),
+        visible_name=f"{_sanitize_filename(work_title)}_{work_id}.pdf",
+        root_folder=root_folder,
+        work_title=work_title,
+        work_type_label=work_type_label,
+        questions=questions,
+    )
+
+
+def _render_to_cache(job: _PdfJob) -> None:
+    tmp_path = f"{job.output_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        _render_work_pdf(tmp_path, job.root_folder, job.work_title, job.work_type_label, list(job.questions))
+        os.replace(tmp_path, job.output_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
 def build_work_pdf(
     *,
     root_folder: str,
@@ -160,12 +312,124 @@ def build_work_pdf(
     questions: Iterable,
     output_dir: str | None = None,
 ) -> tuple[str, str]:
-    styles = _build_styles()
-    base_output_dir = output_dir or os.path.join(root_folder, "data", "temp", "work_pdfs")
-    Path(base_output_dir).mkdir(parents=True, exist_ok=True)
+    """Path of the rendered PDF and the file name to show the user.
+
+    PDFs are cached on disk under a hash of their content, so the same hand work sent
+    to a whole class is rendered once; repeat calls only bump the entry's mtime.
+    """
+    job = _prepare_work_pdf(root_folder, work_id, work_title, work_type_label, questions, output_dir)
+    if not _touch_cached_pdf(job.output_path):
+        _render_to_cache(job)
+        _evict_pdf_cache(job.cache_dir, WORK_PDF_CACHE_MAX_BYTES)
+    return job.output_path, job.visible_name
+
+
+def _get_render_executor() -> ProcessPoolExecutor:
+    global _render_executor
+
+    with _render_lock:
+        if _render_executor is None:
+            # spawn: forking a process that already runs the event loop and DB pools is unsafe.
+            _render_executor = ProcessPoolExecutor(
+                max_workers=WORK_PDF_RENDER_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _render_executor
+
+
+def _discard_render_executor(executor) -> None:
+    """Drop a pool whose worker died; the next render starts a fresh one."""
+    global _render_executor
+
+    with _render_lock:
+        if _render_executor is executor:
+            _render_executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _finish_render(key: str, executor, future: Future) -> None:
+    with _render_lock:
+        _renders_in_flight.pop(key, None)
+    _render_slots.release()
+    if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+        _discard_render_executor(executor)
+
+
+def _submit_render(job: _PdfJob) -> Future:
+    """One render per cache key: concurrent requests for the same PDF share the future."""
+    with _render_lock:
+        future = _renders_in_flight.get(job.key)
+        if future is not None:
+            return future
+        if not _render_slots.acquire(blocking=False):
+            raise PdfRenderBusy("Слишком много PDF в очереди, попробуйте позже")
+        try:
+            executor = _get_render_executor()
+            try:
+                future = executor.submit(_render_to_cache, job)
+            except BrokenProcessPool:
+                # A worker died (OOM, crash in a native library) since the last render.
+                _discard_render_executor(executor)
+                executor = _get_render_executor()
+                future = executor.submit(_render_to_cache, job)
+        except BaseException:
+            _render_slots.release()
+            raise
+        _renders_in_flight[job.key] = future
+    future.add_done_callback(lambda done, key=job.key, pool=executor: _finish_render(key, pool, done))
+    return future
+
+
+async def build_work_pdf_async(
+    *,
+    root_folder: str,
+    work_id: int,
+    work_title: str,
+    work_type_label: str,
+    questions: Iterable,
+    output_dir: str | None = None,
+    timeout: float | None = None,
+) -> tuple[str, str]:
+    """`build_work_pdf` for async callers: cache misses are rendered in the process pool.
+
+    Raises `PdfRenderBusy` when the render queue is full and `PdfRenderTimeout` after
+    `timeout` (default `WORK_PDF_RENDER_TIMEOUT_SECONDS`) seconds.
+    """
+    job = _prepare_work_pdf(root_folder, work_id, work_title, work_type_label, questions, output_dir)
+    if _touch_cached_pdf(job.output_path):
+        return job.output_path, job.visible_name
 
-    visible_name = f"{_sanitize_filename(work_title)}_{work_id}.pdf"
-    output_path = os.path.join(base_output_dir, visible_name)
+    future = _submit_render(job)
+    try:
+        # shield: a timed-out caller must not cancel a render other requests are waiting for.
+        await asyncio.wait_for(
+            asyncio.shield(asyncio.wrap_future(future)),
+            WORK_PDF_RENDER_TIMEOUT_SECONDS if timeout is None else timeout,
+        )
+    except asyncio.TimeoutError:
+        raise PdfRenderTimeout(f"PDF для работы {work_id} не готов") from None
+
+    _evict_pdf_cache(job.cache_dir, WORK_PDF_CACHE_MAX_BYTES)
+    return job.output_path, job.visible_name
+
+
+def shutdown_pdf_renderer() -> None:
+    global _render_executor
+
+    with _render_lock:
+        executor, _render_executor = _render_executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _render_work_pdf(
+    output_path: str,
+    root_folder: str,
+    work_title: str,
+    work_type_label: str,
+    questions: list,
+) -> None:
+    styles = _build_styles()
 
     doc = SimpleDocTemplate(
         output_path,
@@ -206,12 +470,14 @@ def build_work_pdf(
         if text:
             story.append(Paragraph(_paragraph_text(text), styles["question_text"]))
 
-        image_path = _question_image_path(root_folder, question.id)
-        if getattr(question, "question_image", False) and os.path.exists(image_path):
+        image_path = None
+        if getattr(question, "question_image", False):
+            image_path = variant_path(os.path.join(root_folder, "data", "images"), "questions", question.id, "pdf")
+        if image_path:
             story.append(_scaled_image(image_path, image_max_width, image_max_height))
             story.append(Spacer(1, 8))
 
-        if not text and not (getattr(question, "question_image", False) and os.path.exists(image_path)):
+        if not text and not image_path:
             story.append(Paragraph(_paragraph_text("Текст задания отсутствует."), styles["note"]))
 
         story.append(Spacer(1, 10))
@@ -226,4 +492,3 @@ def build_work_pdf(
         canvas.restoreState()
 
     doc.build(story, onFirstPage=draw_page, onLaterPages=draw_page)
-    return output_path, visible_name
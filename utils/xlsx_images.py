@@ -0,0 +1,112 @@
+"""
+Lazy access to images embedded in an .xlsx sheet.
+
+openpyxl's read-only mode skips drawings, so the anchors are read straight from
+the package: workbook -> sheet -> drawing -> picture anchors -> media files.
+Only the anchor index is kept in memory; image bytes are read from the zip
+one cell at a time.
+"""
+
+import posixpath
+import zipfile
+from xml.etree import ElementTree
+
+_NS = {
+    "main": "http://schemas.openxmlformats.org/spreadsheetml/2006/main",
+    "rel": "http://schemas.openxmlformats.org/package/2006/relationships",
+    "xdr": "http://schemas.openxmlformats.org/drawingml/2006/spreadsheetDrawing",
+    "a": "http://schemas.openxmlformats.org/drawingml/2006/main",
+}
+_R_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+
+
+def _rels_path(part: str) -> str:
+    folder, name = posixpath.split(part)
+    return posixpath.join(folder, "_rels", f"{name}.rels")
+
+
+def _read_rels(archive: zipfile.ZipFile, part: str) -> dict[str, str]:
+    """Relationship id -> absolute part path for `part`."""
+    path = _rels_path(part)
+    if path not in archive.namelist():
+        return {}
+    root = ElementTree.fromstring(archive.read(path))
+    folder = posixpath.dirname(part)
+    result = {}
+    for rel in root.findall("rel:Relationship", _NS):
+        target = rel.get("Target", "")
+        if rel.get("TargetMode") == "External":
+            continue
+        if target.startswith("/"):
+            result[rel.get("Id")] = target.lstrip("/")
+        else:
+            result[rel.get("Id")] = posixpath.normpath(posixpath.join(folder, target))
+    return result
+
+
+def _sheet_part(archive: zipfile.ZipFile, sheet_name: str) -> str | None:
+    workbook_part = "xl/workbook.xml"
+    root = ElementTree.fromstring(archive.read(workbook_part))
+    rels = _read_rels(archive, workbook_part)
+    for sheet in root.findall("main:sheets/main:sheet", _NS):
+        if sheet.get("name") == sheet_name:
+            return rels.get(sheet.get(f"{{{_R_NS}}}id"))
+    return None
+
+
+def _column_letter(index: int) -> str:
+    letters = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(ord("A") + remainder) + letters
+    return letters
+
+
+class SheetImages:
+    """Cell coordinate (e.g. "D5") -> embedded image bytes, read on demand."""
+
+    def __init__(self, filepath: str, sheet_name: str):
+        self._archive = zipfile.ZipFile(filepath)
+        self._media_by_cell: dict[str, str] = {}
+
+        sheet_part = _sheet_part(self._archive, sheet_name)
+        if sheet_part is None:
+            return
+        for drawing_part in _read_rels(self._archive, sheet_part).values():
+            if "/drawings/" in drawing_part and drawing_part.endswith(".xml"):
+                self._index_drawing(drawing_part)
+
+    def _index_drawing(self, drawing_part: str):
+        rels = _read_rels(self._archive, drawing_part)
+        root = ElementTree.fromstring(self._archive.read(drawing_part))
+        for anchor in list(root):
+            cell_from = anchor.find("xdr:from", _NS)
+            blip = anchor.find(".//xdr:pic/xdr:blipFill/a:blip", _NS)
+            if cell_from is None or blip is None:
+                continue
+            media = rels.get(blip.get(f"{{{_R_NS}}}embed"))
+            if media is None:
+                continue
+            column = int(cell_from.findtext("xdr:col", "0", _NS))
+            row = int(cell_from.findtext("xdr:row", "0", _NS))
+            self._media_by_cell.setdefault(f"{_column_letter(column)}{row + 1}", media)
+
+    def __contains__(self, cell: str) -> bool:
+        return cell in self._media_by_cell
+
+    def __len__(self) -> int:
+        return len(self._media_by_cell)
+
+    def read(self, cell: str) -> bytes | None:
+        media = self._media_by_cell.get(cell)
+        return self._archive.read(media) if media else None
+
+    def close(self):
+        self._archive.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()